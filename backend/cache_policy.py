@@ -0,0 +1,168 @@
+"""
+TTL policy for cached Sleeper API responses.
+
+Each URL is classified by resource type, and its TTL is chosen from the state of the
+season it belongs to. A TTL of None means the payload is immutable and never expires.
+"""
+import re
+from typing import Any, Dict, Optional, Tuple
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Fallback for URLs the policy does not recognise
+DEFAULT_TTL_SECONDS = 7 * DAY
+
+NFL_STATE_TTL_SECONDS = 5 * MINUTE
+PLAYERS_TTL_SECONDS = DAY
+USER_TTL_SECONDS = DAY
+LIVE_TTL_SECONDS = 5 * MINUTE        # Current and previous week of an active season
+LIVE_STATS_TTL_SECONDS = 10 * MINUTE
+SETTLED_WEEK_TTL_SECONDS = DAY       # Earlier weeks of an active season (stat corrections, late edits)
+FUTURE_WEEK_TTL_SECONDS = HOUR
+ACTIVE_LEAGUE_TTL_SECONDS = HOUR
+ACTIVE_ROSTERS_TTL_SECONDS = 15 * MINUTE
+ACTIVE_DRAFT_TTL_SECONDS = 5 * MINUTE
+
+# Misses: 404s and null bodies
+NEGATIVE_TTL_SECONDS = DAY
+NEGATIVE_USER_TTL_SECONDS = HOUR  # A missing username may be registered at any time
+
+COMPLETE_LEAGUE_STATUSES = {"complete"}
+COMPLETE_DRAFT_STATUSES = {"complete"}
+
+_PATTERNS = [
+    ("nfl_state", re.compile(r"/state/nfl$")),
+    ("players", re.compile(r"/players/nfl$")),
+    ("user_leagues", re.compile(r"/user/(?P<user_id>[^/]+)/leagues/nfl/(?P<season>\d+)$")),
+    ("user", re.compile(r"/user/(?P<user_id>[^/]+)$")),
+    ("league", re.compile(r"/league/(?P<league_id>[^/]+)$")),
+    ("rosters", re.compile(r"/league/(?P<league_id>[^/]+)/rosters$")),
+    ("league_drafts", re.compile(r"/league/(?P<league_id>[^/]+)/drafts$")),
+    ("league_traded_picks", re.compile(r"/league/(?P<league_id>[^/]+)/traded_picks$")),
+    ("transactions", re.compile(r"/league/(?P<league_id>[^/]+)/transactions/(?P<week>\d+)$")),
+    ("matchups", re.compile(r"/league/(?P<league_id>[^/]+)/matchups/(?P<week>\d+)$")),
+    ("draft", re.compile(r"/draft/(?P<draft_id>[^/]+)$")),
+    ("draft_picks", re.compile(r"/draft/(?P<draft_id>[^/]+)/picks$")),
+    ("draft_traded_picks", re.compile(r"/draft/(?P<draft_id>[^/]+)/traded_picks$")),
+    ("stats", re.compile(r"/stats/nfl/regular/(?P<season>\d+)/(?P<week>\d+)$")),
+]
+
+# Resources whose TTL depends on the league / draft they belong to, or on the NFL calendar
+LEAGUE_SCOPED = {"rosters", "league_drafts", "league_traded_picks", "transactions", "matchups"}
+DRAFT_SCOPED = {"draft_picks", "draft_traded_picks"}
+NFL_STATE_SCOPED = {"transactions", "matchups", "stats", "user_leagues"}
+
+
+def classify(url: str) -> Tuple[str, Dict[str, str]]:
+    """Return the resource type of a Sleeper API URL and its path parameters."""
+    path = url.split("?", 1)[0]
+    for resource, pattern in _PATTERNS:
+        match = pattern.search(path)
+        if match:
+            return resource, match.groupdict()
+    return "other", {}
+
+
+def is_complete_league(league: Optional[Dict[str, Any]], nfl_state: Optional[Dict[str, Any]]) -> bool:
+    if not league:
+        return False
+    if league.get("status") in COMPLETE_LEAGUE_STATUSES:
+        return True
+    # A league from an earlier season than the NFL's current one can no longer change
+    season = league.get("season")
+    state_season = (nfl_state or {}).get("season")
+    return bool(season and state_season and int(season) < int(state_season))
+
+
+def current_leg(league: Optional[Dict[str, Any]], nfl_state: Optional[Dict[str, Any]]) -> int:
+    """The week new transactions and scores are landing in for this league."""
+    nfl_state = nfl_state or {}
+    league_season = (league or {}).get("season")
+    if league_season and nfl_state.get("season") and league_season != nfl_state.get("season"):
+        return 1  # Off-season moves for next season's league land in week 1
+    return int(nfl_state.get("leg") or nfl_state.get("week") or 1)
+
+
+def _weekly_ttl(week: int, current_week: int, live_ttl: float) -> float:
+    if week > current_week:
+        return FUTURE_WEEK_TTL_SECONDS
+    if week >= current_week - 1:
+        return live_ttl
+    return SETTLED_WEEK_TTL_SECONDS
+
+
+def ttl_for(
+    resource: str,
+    params: Dict[str, str],
+    payload: Any = None,
+    league: Optional[Dict[str, Any]] = None,
+    draft: Optional[Dict[str, Any]] = None,
+    nfl_state: Optional[Dict[str, Any]] = None,
+) -> Optional[float]:
+    """
+    TTL in seconds for a classified URL, or None if the payload never changes.
+
+    `payload` is the cached response itself, `league` / `draft` the object the resource
+    belongs to, and `nfl_state` the response of /state/nfl. Missing context falls back to
+    the conservative TTL for an active season.
+    """
+    if resource == "nfl_state":
+        return NFL_STATE_TTL_SECONDS
+    if resource == "players":
+        return PLAYERS_TTL_SECONDS
+    if resource == "user":
+        return USER_TTL_SECONDS
+
+    if resource == "user_leagues":
+        league_season = (nfl_state or {}).get("league_season") or (nfl_state or {}).get("season")
+        if league_season and int(params["season"]) < int(league_season):
+            return None
+        return ACTIVE_LEAGUE_TTL_SECONDS
+
+    if resource == "league":
+        return None if is_complete_league(payload, nfl_state) else ACTIVE_LEAGUE_TTL_SECONDS
+
+    if resource in LEAGUE_SCOPED:
+        if is_complete_league(league, nfl_state):
+            return None
+        if resource == "rosters":
+            return ACTIVE_ROSTERS_TTL_SECONDS
+        if resource in ("transactions", "matchups"):
+            return _weekly_ttl(int(params["week"]), current_leg(league, nfl_state), LIVE_TTL_SECONDS)
+        return ACTIVE_LEAGUE_TTL_SECONDS
+
+    if resource == "draft":
+        return None if (payload or {}).get("status") in COMPLETE_DRAFT_STATUSES else ACTIVE_DRAFT_TTL_SECONDS
+
+    if resource in DRAFT_SCOPED:
+        return None if (draft or {}).get("status") in COMPLETE_DRAFT_STATUSES else ACTIVE_DRAFT_TTL_SECONDS
+
+    if resource == "stats":
+        state_season = (nfl_state or {}).get("season")
+        season = int(params["season"])
+        if state_season and season < int(state_season):
+            return None
+        if state_season and season > int(state_season):
+            return FUTURE_WEEK_TTL_SECONDS
+        current_week = int((nfl_state or {}).get("week") or 1)
+        return _weekly_ttl(int(params["week"]), current_week, LIVE_STATS_TTL_SECONDS)
+
+    return DEFAULT_TTL_SECONDS
+
+
+def negative_ttl_for(
+    resource: str,
+    params: Dict[str, str],
+    nfl_state: Optional[Dict[str, Any]] = None,
+) -> Optional[float]:
+    """TTL in seconds for remembering that a URL had no data, or None if it never will."""
+    if resource == "stats":
+        # Sleeper does not backfill stats for seasons that have finished
+        state_season = (nfl_state or {}).get("season")
+        if state_season and int(params["season"]) < int(state_season):
+            return None
+    if resource in ("user", "user_leagues"):
+        return NEGATIVE_USER_TTL_SECONDS
+    return NEGATIVE_TTL_SECONDS
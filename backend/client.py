@@ -1,52 +1,566 @@
+import asyncio
+import functools
+import importlib.util
 import httpx
-import json
-from datetime import datetime, timedelta
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
 
-from . import database
+from . import cache_policy, codec, database
+from .memory_cache import MemoryCache, MISS
+from .rate_limiter import TokenBucket, backoff_delay, parse_retry_after
 
 
 API_URL = "https://api.sleeper.app/v1"
-CACHE_TTL_SECONDS = 604800  # 7 days
+PLAYERS_URL = f"{API_URL}/players/nfl"
+
+# Connection pool settings for the shared upstream client
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30.0
+HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+HTTP_READ_TIMEOUT_SECONDS = 30.0
+HTTP_POOL_TIMEOUT_SECONDS = 10.0
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# In-process tier in front of api_cache, sized by encoded JSON bytes
+MEMORY_CACHE_MAX_ENTRIES = 20000
+MEMORY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+memory_cache = MemoryCache(MEMORY_CACHE_MAX_ENTRIES, MEMORY_CACHE_MAX_BYTES)
+
+# Memory-tier hits refresh api_cache.last_accessed at most this often per URL, so
+# maintenance does not evict the hottest rows as least recently used
+ACCESS_RECORD_INTERVAL_SECONDS = 5 * 60
+# url -> when its last access was written
+_access_recorded: Dict[str, float] = {}
+
+# Expired entries younger than this past their TTL are served at once and refreshed in the background
+STALE_WHILE_REVALIDATE_SECONDS = 24 * 60 * 60
+
+# After this many consecutive upstream failures, stop calling Sleeper for the cooldown
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN_SECONDS = 30.0
+
+
+# Sleeper asks clients to stay under 1000 calls per minute
+UPSTREAM_RATE_PER_SECOND = 15.0
+UPSTREAM_BURST = 30
+UPSTREAM_MAX_IN_FLIGHT = 20
+
+# 429 and 5xx responses (and transport errors) are retried with jittered exponential backoff
+UPSTREAM_MAX_RETRIES = 3
+UPSTREAM_RETRY_BASE_DELAY_SECONDS = 0.5
+UPSTREAM_RETRY_MAX_DELAY_SECONDS = 10.0
+
+
+class UpstreamUnavailableError(Exception):
+    """The circuit breaker is open and there is no cached copy of the URL to serve."""
+
+
+# url -> task loading it; concurrent callers for the same URL await one load
+_in_flight: Dict[str, asyncio.Task] = {}
+_coalesced_requests = 0
+
+# url -> task refreshing a stale entry in the background
+_background_refreshes: Dict[str, asyncio.Task] = {}
+_stale_served = 0
+_negative_hits = 0
+
+# Memory-tier size charged for a cached miss
+NEGATIVE_ENTRY_SIZE = 64
+
+_consecutive_failures = 0
+_circuit_open_until = 0.0
+
+rate_limiter = TokenBucket(UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST)
+_upstream_slots: Optional[asyncio.Semaphore] = None
+_upstream_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+_upstream_in_flight = 0
+_upstream_requests = 0
+_throttled_responses = 0
+_retries = 0
+_failed_requests = 0
+
+# Per-request set of URLs served stale; set by the API middleware so responses can say so
+stale_urls: ContextVar[Optional[Set[str]]] = ContextVar("stale_urls", default=None)
+
+# Per-request {url: version} of the data a response was built from; set by the ETag middleware
+dependencies: ContextVar[Optional[Dict[str, Optional[str]]]] = ContextVar("dependencies", default=None)
+
+# url -> version of the payload currently cached: its content hash, or a marker for misses
+_versions: Dict[str, str] = {}
+NEGATIVE_VERSION = "none"
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            HTTP_READ_TIMEOUT_SECONDS,
+            connect=HTTP_CONNECT_TIMEOUT_SECONDS,
+            pool=HTTP_POOL_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+async def init_http_client():
+    """Create the process-wide upstream client. Called from the app lifespan."""
+    global _http_client, _http_client_loop
+    if _http_client is None:
+        _http_client = _create_http_client()
+        _http_client_loop = asyncio.get_running_loop()
+
+
+async def close_http_client():
+    """Close the shared upstream client and its pooled connections."""
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared upstream client.
+
+    Falls back to creating one lazily when the app lifespan did not run (scripts, tests
+    without a lifespan), and recreates it if it was bound to a different event loop,
+    since pooled connections cannot be reused across loops.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop:
+        if _http_client is not None:
+            _discard_http_client(_http_client, _http_client_loop)
+        _http_client = _create_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+def _discard_http_client(old_client: httpx.AsyncClient, old_loop: Optional[asyncio.AbstractEventLoop]):
+    """
+    Close a client bound to another event loop. Its connections can only be closed on that
+    loop: if it is still running (in another thread), they are closed there. Otherwise the
+    loop has finished (asyncio.run, a TestClient request), its transports cannot be closed
+    from any other loop, and the sockets are released when the dropped client is collected.
+    """
+    if old_loop is not None and old_loop.is_running():
+        asyncio.run_coroutine_threadsafe(old_client.aclose(), old_loop)
 
 
 async def get(url: str):
     """
     A generic, caching GET request for the Sleeper API.
+
+    Lookups go memory tier -> api_cache table -> upstream. Returned payloads are shared
+    with other callers through the memory tier, so treat them as read-only.
+    """
+    global _coalesced_requests, _stale_served
+
+    # 1. Check the in-process tier
+    cached_data = memory_cache.get(url)
+    if cached_data is not MISS:
+        record_dependency(url, _versions.get(url))
+        if cached_data is not None:  # Remembered misses have no api_cache row
+            _record_access(url)
+        return cached_data
+
+    # 2. Join a load of this URL that is already running, or start one
+    task = _in_flight.get(url)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        _coalesced_requests += 1
+    else:
+        task = asyncio.ensure_future(_load(url))
+        _in_flight[url] = task
+        task.add_done_callback(functools.partial(_forget_in_flight, url))
+
+    # Shield so one cancelled caller does not cancel the load for everyone else
+    try:
+        data, is_stale = await asyncio.shield(task)
+    except BaseException:
+        # Callers may carry on without this URL (gather with return_exceptions); a response
+        # built around the failure must not be tagged, or clients would keep it for good
+        record_dependency(url, None)
+        raise
+    # A stale copy's background refresh may already have replaced its version; leave it untagged
+    record_dependency(url, None if is_stale else _versions.get(url))
+    if is_stale:
+        _stale_served += 1
+        request_stale_urls = stale_urls.get()
+        if request_stale_urls is not None:
+            request_stale_urls.add(url)
+    return data
+
+
+def _record_access(url: str):
+    now = time.time()
+    recorded = _access_recorded.get(url)
+    if recorded is not None and now - recorded < ACCESS_RECORD_INTERVAL_SECONDS:
+        return
+    if len(_access_recorded) >= MEMORY_CACHE_MAX_ENTRIES:
+        _access_recorded.clear()
+    _access_recorded[url] = now
+    database.enqueue_write("UPDATE api_cache SET last_accessed = ? WHERE url = ?", (now, url))
+
+
+def record_dependency(key: str, version: Optional[str]):
+    """Note that the current request's response depends on `key` at `version` (None if unknown)."""
+    request_dependencies = dependencies.get()
+    if request_dependencies is not None:
+        request_dependencies[key] = version
+
+
+def current_version(url: str) -> Optional[str]:
+    """Version of a URL's in-process copy if it is still fresh, without loading it; otherwise None."""
+    # Not a lookup: leaves the hit/miss counters and LRU order alone
+    if memory_cache.expires_at(url) is MISS:
+        return None
+    return _versions.get(url)
+
+
+def cached_until(url: str) -> Any:
+    """When the in-process copy of a URL expires: Unix time, None if never, or MISS if not held."""
+    return memory_cache.expires_at(url)
+
+
+def _forget_in_flight(url: str, task: asyncio.Task):
+    if _in_flight.get(url) is task:
+        del _in_flight[url]
+    if not task.cancelled():
+        task.exception()  # Mark as retrieved in case every waiter was cancelled
+
+
+async def _load(url: str) -> Tuple[Any, bool]:
+    """
+    Load a URL from the SQLite cache, falling back to the upstream API.
+
+    Returns the payload and whether it is a stale copy.
     """
-    db = await database.get_db_connection()
+    global _negative_hits
+
+    # 1. Check the SQLite cache
+    db = await database.get_db()
+    cursor = await db.execute("""
+        SELECT COALESCE(b.data, c.data) AS data, COALESCE(b.format, c.format) AS format, c.timestamp, c.blob_hash
+        FROM api_cache c LEFT JOIN api_blobs b ON b.hash = c.blob_hash
+        WHERE c.url = ?
+    """, (url,))
+    row = await cursor.fetchone()
+    await cursor.close()
+
+    if row and row["data"] is not None:
+        if len(row["data"]) > codec.OFFLOAD_THRESHOLD_BYTES:
+            cached_data, size = await asyncio.to_thread(codec.decode, row["data"], row["format"])
+        else:
+            cached_data, size = codec.decode(row["data"], row["format"])
+        # Rows not yet moved to api_blobs have no hash; their write time identifies the payload
+        _versions[url] = row["blob_hash"] or row["timestamp"]
+        ttl = await _resolve_ttl(url, cached_data)
+        age = (datetime.utcnow() - datetime.fromisoformat(row["timestamp"])).total_seconds()
+        # Keep maintenance's view of the row current: the policy may have changed since it was written
+        now = time.time()
+        _access_recorded[url] = now
+        database.enqueue_write(
+            "UPDATE api_cache SET last_accessed = ?, expires_at = ? WHERE url = ?",
+            (now, now - age + ttl if ttl is not None else None, url),
+        )
+        if ttl is None or age < ttl:
+            memory_cache.set(url, cached_data, size, ttl - age if ttl is not None else None)
+            return cached_data, False
+
+        # 2. Recently expired: serve the stale copy now and refresh it in the background
+        if age - ttl < STALE_WHILE_REVALIDATE_SECONDS:
+            _refresh_in_background(url)
+            return cached_data, True
+
+        # 3. Long expired: refresh in the foreground, but fall back to the stale copy on error
+        try:
+            return await _fetch_and_store(url), False
+        except (httpx.HTTPError, UpstreamUnavailableError):
+            return cached_data, True
+
+    # 4. Remembered misses (404 / null body) cost nothing until their own TTL runs out
+    cursor = await db.execute("SELECT timestamp FROM api_negative_cache WHERE url = ?", (url,))
+    negative_row = await cursor.fetchone()
+    await cursor.close()
+    if negative_row:
+        ttl = await _resolve_negative_ttl(url)
+        age = (datetime.utcnow() - datetime.fromisoformat(negative_row["timestamp"])).total_seconds()
+        if ttl is None or age < ttl:
+            _negative_hits += 1
+            _versions[url] = NEGATIVE_VERSION
+            memory_cache.set(url, None, NEGATIVE_ENTRY_SIZE, ttl - age if ttl is not None else None)
+            return None, False
+
+    # 5. Not cached at all, so the upstream has to answer
+    return await _fetch_and_store(url), False
+
+
+async def _fetch_and_store(url: str):
+    """Fetch a URL over the shared connection pool and write it to both cache tiers."""
+    response = await _fetch(url)
+    # Do NOT raise_for_status() here. Handle 404 specifically in calling functions.
+    # response.raise_for_status()
+
+    if response.status_code != 404:
+        response.raise_for_status() # Raise for other errors (e.g., 5xx)
+    fresh_data = response.json() if response.status_code != 404 else None
+
+    # Write-behind: committed in batches by the database writer task
+    if fresh_data is None:
+        # Return None for 404 Not Found (and Sleeper's null bodies), and remember the miss
+        ttl = await _resolve_negative_ttl(url)
+        _versions[url] = NEGATIVE_VERSION
+        memory_cache.set(url, None, NEGATIVE_ENTRY_SIZE, ttl)
+        database.enqueue_writes([
+            ("DELETE FROM api_cache WHERE url = ?", (url,)),
+            (
+                "INSERT OR REPLACE INTO api_negative_cache (url, status, timestamp, expires_at) VALUES (?, ?, ?, ?)",
+                (url, response.status_code, datetime.utcnow().isoformat(), _expires_at(ttl)),
+            ),
+        ])
+        return None
+
+    ttl = await _resolve_ttl(url, fresh_data)
+    blob_hash = codec.content_hash(response.content)
+    _versions[url] = blob_hash
+    memory_cache.set(url, fresh_data, len(response.content), ttl)
+    if len(response.content) > codec.OFFLOAD_THRESHOLD_BYTES:
+        encoded = await asyncio.to_thread(codec.encode, response.content)
+    else:
+        encoded = codec.encode(response.content)
+    # One unit, so maintenance never sees the blob committed without the row that references it
+    database.enqueue_writes([
+        ("DELETE FROM api_negative_cache WHERE url = ?", (url,)),
+        (database.INSERT_BLOB_SQL, (blob_hash, encoded, codec.CURRENT_FORMAT)),
+        (
+            """
+            INSERT INTO api_cache (url, data, format, timestamp, expires_at, last_accessed, blob_hash)
+            VALUES (?, NULL, ?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                data = NULL, format = excluded.format, timestamp = excluded.timestamp,
+                expires_at = excluded.expires_at, last_accessed = excluded.last_accessed,
+                blob_hash = excluded.blob_hash
+            """,
+            (url, codec.CURRENT_FORMAT, datetime.utcnow().isoformat(), _expires_at(ttl), time.time(), blob_hash),
+        ),
+    ])
+    return fresh_data
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    return time.time() + ttl if ttl is not None else None
+
+
+def _get_upstream_slots() -> asyncio.Semaphore:
+    global _upstream_slots, _upstream_slots_loop
+    loop = asyncio.get_running_loop()
+    if _upstream_slots is None or _upstream_slots_loop is not loop:
+        _upstream_slots = asyncio.Semaphore(UPSTREAM_MAX_IN_FLIGHT)
+        _upstream_slots_loop = loop
+    return _upstream_slots
+
+
+async def _send(url: str) -> httpx.Response:
+    """One GET, admitted by the process-wide rate limiter and in-flight cap."""
+    global _upstream_in_flight, _upstream_requests
+    async with _get_upstream_slots():
+        await rate_limiter.acquire()
+        _upstream_in_flight += 1
+        _upstream_requests += 1
+        try:
+            return await get_http_client().get(url)
+        finally:
+            _upstream_in_flight -= 1
+
+
+async def _fetch(url: str) -> httpx.Response:
+    """GET from the upstream through the circuit breaker, retrying throttling and server errors."""
+    global _consecutive_failures, _throttled_responses, _retries, _failed_requests
+    attempt = 0
+    while True:
+        if time.time() < _circuit_open_until:
+            raise UpstreamUnavailableError(f"Sleeper API circuit is open; no cached copy of {url}")
+
+        retry_after = None
+        try:
+            response = await _send(url)
+        except httpx.TransportError:
+            if attempt >= UPSTREAM_MAX_RETRIES:
+                _failed_requests += 1
+                _record_upstream_failure()
+                raise
+        else:
+            if response.status_code == 429:
+                _throttled_responses += 1
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    rate_limiter.pause(retry_after)  # Back off for every caller, not just this one
+            elif response.status_code < 500:
+                _consecutive_failures = 0
+                return response
+            if attempt >= UPSTREAM_MAX_RETRIES:
+                _failed_requests += 1
+                if response.status_code >= 500:
+                    _record_upstream_failure()
+                return response
+
+        await asyncio.sleep(backoff_delay(
+            attempt, UPSTREAM_RETRY_BASE_DELAY_SECONDS, UPSTREAM_RETRY_MAX_DELAY_SECONDS, retry_after,
+        ))
+        attempt += 1
+        _retries += 1
+
+
+def _record_upstream_failure():
+    global _consecutive_failures, _circuit_open_until
+    _consecutive_failures += 1
+    # Once tripped, each failed trial request after the cooldown re-opens the circuit
+    if _consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+        _circuit_open_until = time.time() + CIRCUIT_COOLDOWN_SECONDS
+
+
+def _refresh_in_background(url: str):
+    task = _background_refreshes.get(url)
+    if task is not None and not task.done():
+        return
+    task = asyncio.ensure_future(_fetch_and_store(url))
+    _background_refreshes[url] = task
+    task.add_done_callback(functools.partial(_forget_background_refresh, url))
+
+
+def _forget_background_refresh(url: str, task: asyncio.Task):
+    if _background_refreshes.get(url) is task:
+        del _background_refreshes[url]
+    if not task.cancelled():
+        task.exception()  # A failed refresh keeps the stale copy; the breaker has counted it
+
+
+def circuit_open() -> bool:
+    return time.time() < _circuit_open_until
+
+
+async def _resolve_ttl(url: str, payload) -> Optional[float]:
+    """Look up the league, draft and NFL state a URL depends on and apply the TTL policy."""
+    resource, params = cache_policy.classify(url)
+    league = draft = nfl_state = None
     try:
-        # 1. Check cache
-        cursor = await db.execute("SELECT data, timestamp FROM api_cache WHERE url = ?", (url,))
-        row = await cursor.fetchone()
-
-        if row:
-            cached_data = json.loads(row["data"])
-            timestamp = datetime.fromisoformat(row["timestamp"])
-            if datetime.utcnow() - timestamp < timedelta(seconds=CACHE_TTL_SECONDS):
-                return cached_data
-
-        # 2. If not in cache or stale, fetch from API
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            # Do NOT raise_for_status() here. Handle 404 specifically in calling functions.
-            # response.raise_for_status()
-            
-            if response.status_code == 404:
-                return None # Return None for 404 Not Found
-
-            response.raise_for_status() # Raise for other errors (e.g., 5xx)
-            fresh_data = response.json()
-
-            # 3. Store in cache
-            await db.execute(
-                "INSERT OR REPLACE INTO api_cache (url, data, timestamp) VALUES (?, ?, ?)",
-                (url, json.dumps(fresh_data), datetime.utcnow().isoformat()),
-            )
-            await db.commit()
-            return fresh_data
-
-    finally:
-        await db.close()
+        if resource in cache_policy.NFL_STATE_SCOPED or resource == "league":
+            nfl_state = await get_nfl_state()
+        if resource in cache_policy.LEAGUE_SCOPED:
+            league = await get_league(params["league_id"])
+        if resource in cache_policy.DRAFT_SCOPED:
+            draft = await get_draft(params["draft_id"])
+    except (httpx.HTTPError, UpstreamUnavailableError):
+        pass  # Without context the policy falls back to active-season TTLs
+    return cache_policy.ttl_for(resource, params, payload, league=league, draft=draft, nfl_state=nfl_state)
+
+
+async def _resolve_negative_ttl(url: str) -> Optional[float]:
+    resource, params = cache_policy.classify(url)
+    nfl_state = None
+    if resource == "stats":
+        try:
+            nfl_state = await get_nfl_state()
+        except (httpx.HTTPError, UpstreamUnavailableError):
+            pass
+    return cache_policy.negative_ttl_for(resource, params, nfl_state=nfl_state)
+
+
+def cache_stats():
+    """Hit, miss and eviction counters for the in-process cache tier."""
+    return {
+        **memory_cache.stats(),
+        "in_flight": len(_in_flight),
+        "coalesced_requests": _coalesced_requests,
+        "stale_served": _stale_served,
+        "negative_hits": _negative_hits,
+        "background_refreshes": len(_background_refreshes),
+        "circuit_open": circuit_open(),
+        "consecutive_upstream_failures": _consecutive_failures,
+        "dropped_write_batches": database.dropped_write_batches,
+    }
+
+
+async def cache_usage():
+    """Rows and stored bytes in api_cache per resource type, plus the size of the database file."""
+    db = await database.get_db()
+    await database.flush_writes()
+    resources: Dict[str, Dict[str, int]] = {}
+    # Per resource, bytes count each row's payload in full even where it shares a blob
+    async with db.execute("""
+        SELECT c.url, COALESCE(length(c.data), length(b.data), 0)
+        FROM api_cache c LEFT JOIN api_blobs b ON b.hash = c.blob_hash
+    """) as cursor:
+        async for url, size in cursor:
+            resource, _ = cache_policy.classify(url)
+            usage = resources.setdefault(resource, {"rows": 0, "bytes": 0})
+            usage["rows"] += 1
+            usage["bytes"] += size
+    negative_rows = (await db.execute_fetchall("SELECT COUNT(*) FROM api_negative_cache"))[0][0]
+    blobs = (await db.execute_fetchall("SELECT COUNT(*) FROM api_blobs"))[0][0]
+    page_size = (await db.execute_fetchall("PRAGMA page_size"))[0][0]
+    page_count = (await db.execute_fetchall("PRAGMA page_count"))[0][0]
+    free_pages = (await db.execute_fetchall("PRAGMA freelist_count"))[0][0]
+    return {
+        "resources": dict(sorted(resources.items(), key=lambda item: -item[1]["bytes"])),
+        "negative_rows": negative_rows,
+        "blobs": blobs,
+        "stored_bytes": await database.stored_bytes(db),
+        "file_bytes": page_size * page_count,
+        "free_bytes": page_size * free_pages,
+        "max_bytes": database.CACHE_MAX_BYTES,
+    }
+
+
+async def purge_cache(path: str) -> Dict[str, int]:
+    """
+    Drop a URL and every URL below it from both cache tiers. `path` is a full URL or a
+    path under API_URL; "/league/123" covers /league/123/rosters but not /league/1234.
+    """
+    if not path.startswith(API_URL):
+        path = API_URL + "/" + path.strip("/")
+    url = path.rstrip("/")
+    memory_entries = memory_cache.delete_prefix(url + "/")
+    for cached_url in [cached_url for cached_url in _versions if cached_url == url or cached_url.startswith(url + "/")]:
+        del _versions[cached_url]
+    if url in memory_cache:
+        memory_cache.delete(url)
+        memory_entries += 1
+    return {"memory_entries": memory_entries, "rows": await database.purge_path(url)}
+
+
+async def purge_league(league_id: str) -> Dict[str, int]:
+    """Drop a league and everything cached under it (rosters, matchups, transactions, ...)."""
+    return await purge_cache(f"/league/{league_id}")
+
+
+def upstream_stats():
+    """Request, throttling and retry counters for calls to the Sleeper API."""
+    return {
+        "requests": _upstream_requests,
+        "in_flight": _upstream_in_flight,
+        "max_in_flight": UPSTREAM_MAX_IN_FLIGHT,
+        "rate_per_second": UPSTREAM_RATE_PER_SECOND,
+        "throttled_responses": _throttled_responses,
+        "retries": _retries,
+        "failed_requests": _failed_requests,
+        "rate_limit_waits": rate_limiter.waits,
+        "rate_limit_wait_seconds": round(rate_limiter.wait_seconds, 3),
+        "circuit_open": circuit_open(),
+    }
 
 
 async def get_user_by_username(username: str):
@@ -101,8 +615,7 @@ async def get_league_transactions(league_id: str, week: int):
 
 
 async def get_all_players():
-    url = f"{API_URL}/players/nfl"
-    return await get(url)
+    return await get(PLAYERS_URL)
 
 
 async def get_league(league_id: str):
@@ -110,6 +623,12 @@ async def get_league(league_id: str):
     return await get(url)
 
 
+async def get_nfl_state():
+    """Current NFL season, week and season type."""
+    url = f"{API_URL}/state/nfl"
+    return await get(url)
+
+
 async def get_league_history(league_id: str):
     history = []
     current_league_id = league_id
@@ -117,10 +636,12 @@ async def get_league_history(league_id: str):
     while current_league_id:
         try:
             league = await get_league(current_league_id)
-            history.append(league)
-            current_league_id = league.get("previous_league_id")
         except httpx.HTTPStatusError:
             break  # Stop if a league in the chain is not found
+        if not league:
+            break  # Missing leagues come back as None (and are negatively cached)
+        history.append(league)
+        current_league_id = league.get("previous_league_id")
 
     return history
 
@@ -0,0 +1,48 @@
+"""
+Storage encoding for cached API payloads.
+
+Rows in api_cache carry a `format` column so old and new encodings can be read side by side.
+"""
+import hashlib
+import zlib
+from typing import Any, Tuple, Union
+
+import orjson
+
+FORMAT_JSON_TEXT = 0  # Legacy rows: uncompressed JSON text
+FORMAT_ZLIB_JSON = 1  # zlib-compressed UTF-8 JSON, decoded with orjson
+CURRENT_FORMAT = FORMAT_ZLIB_JSON
+
+COMPRESSION_LEVEL = 6
+
+# Payloads larger than this are encoded/decoded off the event loop
+OFFLOAD_THRESHOLD_BYTES = 256 * 1024
+
+
+def encode(raw_json: bytes) -> bytes:
+    """Encode the raw JSON bytes of an upstream response for storage in CURRENT_FORMAT."""
+    return zlib.compress(raw_json, COMPRESSION_LEVEL)
+
+
+def content_hash(raw_json: bytes) -> str:
+    """Key of a payload in the api_blobs table. Hashes the raw JSON, so it is format independent."""
+    return hashlib.blake2b(raw_json, digest_size=16).hexdigest()
+
+
+def decode(data: Union[bytes, str], fmt: int) -> Tuple[Any, int]:
+    """Decode a stored payload. Returns the value and its uncompressed JSON size."""
+    if fmt == FORMAT_ZLIB_JSON:
+        raw_json = zlib.decompress(data)
+        return orjson.loads(raw_json), len(raw_json)
+    if fmt == FORMAT_JSON_TEXT:
+        return orjson.loads(data), len(data)
+    raise ValueError(f"Unknown cache payload format {fmt}")
+
+
+def raw_json(data: Union[bytes, str], fmt: int) -> bytes:
+    """The original JSON bytes of a stored payload."""
+    if fmt == FORMAT_ZLIB_JSON:
+        return zlib.decompress(data)
+    if fmt == FORMAT_JSON_TEXT:
+        return data.encode() if isinstance(data, str) else data
+    raise ValueError(f"Unknown cache payload format {fmt}")
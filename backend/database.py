@@ -1,25 +1,535 @@
-
 import aiosqlite
 import asyncio
+import logging
+import sys
+import time
+from itertools import groupby
+from typing import Any, Optional, Sequence, Tuple
+
+from . import cache_policy, codec
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = "sleeper_cache.db"
 
+# Bumped whenever _migrate_schema learns a new step; stored in PRAGMA user_version
+SCHEMA_VERSION = 4
+
+# Rows re-encoded per transaction by migrate_payloads()
+MIGRATION_BATCH_SIZE = 200
+
+# Cache writes are queued and committed by a single writer task in batches
+WRITE_BATCH_SIZE = 500
+
+# Periodic maintenance: purge long-expired rows, then evict least recently used rows
+# until the stored payloads fit in CACHE_MAX_BYTES
+CACHE_MAINTENANCE_INTERVAL_SECONDS = 60 * 60
+CACHE_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_EVICTION_TARGET_RATIO = 0.9  # Evict down to this fraction of the limit, not just under it
+# Expired rows are kept this long past expiry as a fallback for when Sleeper is down
+CACHE_EXPIRED_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+_db: Optional[aiosqlite.Connection] = None
+_db_lock: Optional[asyncio.Lock] = None
+_db_path: Optional[str] = None  # The file the shared connection has open
+_write_queue: Optional[asyncio.Queue] = None
+# Held around every transaction on the shared connection, so the writer's commits and
+# rollbacks never take in maintenance's or a purge's half-done work
+_write_lock: Optional[asyncio.Lock] = None
+_writer_task: Optional[asyncio.Task] = None
+_writer_loop: Optional[asyncio.AbstractEventLoop] = None
+_maintenance_task: Optional[asyncio.Task] = None
+dropped_write_batches = 0
+
+# Store a payload body; bodies already stored (same hash) are not written again
+INSERT_BLOB_SQL = "INSERT INTO api_blobs (hash, data, format) VALUES (?, ?, ?) ON CONFLICT (hash) DO NOTHING"
+
+
 async def get_db_connection():
+    """Open a standalone connection. Prefer get_db() on the request path."""
     db = await aiosqlite.connect(DATABASE_URL)
     db.row_factory = aiosqlite.Row
     return db
 
+
+async def _configure_connection(db: aiosqlite.Connection):
+    # Lets maintenance hand freed pages back to the OS. Only takes effect on new databases,
+    # or on existing ones after a VACUUM (`python -m backend.database migrate`).
+    await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets readers proceed while the writer task commits; NORMAL sync is safe under WAL
+    await db.execute("PRAGMA journal_mode=WAL")
+    await db.execute("PRAGMA synchronous=NORMAL")
+    await db.execute("PRAGMA busy_timeout=5000")
+
+
+# Payloads live in api_blobs, stored once per distinct body and shared by every URL that
+# returned it. Rows written before schema version 3 may still hold their payload inline
+# in api_cache.data until `python -m backend.database migrate` moves it.
+_API_CACHE_COLUMNS = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT UNIQUE NOT NULL,
+    data BLOB,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    format INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL,  -- Unix time; NULL for payloads that never change
+    last_accessed REAL,
+    blob_hash TEXT
+"""
+
+# Keep api_blobs.refcount equal to the number of api_cache rows pointing at each blob, and
+# drop blobs nobody references. Writers must upsert (ON CONFLICT DO UPDATE): INSERT OR
+# REPLACE deletes the old row without firing the delete trigger.
+_BLOB_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_cache_blob_insert AFTER INSERT ON api_cache
+    WHEN NEW.blob_hash IS NOT NULL
+    BEGIN
+        UPDATE api_blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_cache_blob_update AFTER UPDATE OF blob_hash ON api_cache
+    WHEN OLD.blob_hash IS NOT NEW.blob_hash
+    BEGIN
+        UPDATE api_blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+        UPDATE api_blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+        DELETE FROM api_blobs WHERE hash = OLD.blob_hash AND refcount <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_cache_blob_delete AFTER DELETE ON api_cache
+    WHEN OLD.blob_hash IS NOT NULL
+    BEGIN
+        UPDATE api_blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+        DELETE FROM api_blobs WHERE hash = OLD.blob_hash AND refcount <= 0;
+    END
+    """,
+]
+
+
+async def _create_tables(db: aiosqlite.Connection):
+    await db.execute(f"CREATE TABLE IF NOT EXISTS api_cache ({_API_CACHE_COLUMNS})")
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS api_blobs (
+            hash TEXT PRIMARY KEY,  -- codec.content_hash() of the raw JSON
+            data BLOB NOT NULL,
+            format INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # URLs the upstream answered with a 404 or an empty (null) body
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS api_negative_cache (
+            url TEXT PRIMARY KEY,
+            status INTEGER NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            expires_at REAL
+        )
+    """)
+    await _create_transaction_tables(db)
+    await _migrate_schema(db)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_expires_at ON api_cache (expires_at)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_last_accessed ON api_cache (last_accessed)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_api_negative_cache_expires_at ON api_negative_cache (expires_at)")
+    for trigger in _BLOB_TRIGGERS:
+        await db.execute(trigger)
+    await db.commit()
+
+
+# Normalised league transactions (see transaction_store). Rows are derived from the cached
+# transactions/{week} payloads and replaced a whole week at a time, so every table carries
+# the (league_id, week) it came from.
+_TRANSACTION_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS league_transactions (
+        transaction_id TEXT PRIMARY KEY,
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        position INTEGER NOT NULL,  -- Order within the week's payload
+        type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        status_updated INTEGER,  -- Unix time in ms
+        leg INTEGER,
+        data BLOB NOT NULL  -- The validated Transaction as JSON
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS transaction_assets (
+        transaction_id TEXT NOT NULL,
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        player_id TEXT NOT NULL,
+        roster_id INTEGER,
+        action TEXT NOT NULL  -- 'add' or 'drop'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS transaction_picks (
+        transaction_id TEXT NOT NULL,
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        season TEXT NOT NULL,
+        round INTEGER NOT NULL,
+        roster_id INTEGER NOT NULL,  -- Original owner of the pick
+        previous_owner_id INTEGER NOT NULL,
+        owner_id INTEGER NOT NULL
+    )
+    """,
+    # Per-week high-water marks: the payload each week's rows were built from, and whether
+    # the week can still change (final weeks are never fetched again)
+    """
+    CREATE TABLE IF NOT EXISTS transaction_weeks (
+        league_id TEXT NOT NULL,
+        week INTEGER NOT NULL,
+        version TEXT,  -- Content hash of the payload
+        final INTEGER NOT NULL DEFAULT 0,
+        synced_at REAL,
+        PRIMARY KEY (league_id, week)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_league_transactions_league_week ON league_transactions (league_id, week)",
+    "CREATE INDEX IF NOT EXISTS idx_league_transactions_type ON league_transactions (league_id, type)",
+    "CREATE INDEX IF NOT EXISTS idx_league_transactions_status_updated ON league_transactions (status_updated)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_assets_transaction_id ON transaction_assets (transaction_id)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_assets_player_id ON transaction_assets (player_id, league_id)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_assets_roster_id ON transaction_assets (league_id, roster_id)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_assets_league_week ON transaction_assets (league_id, week)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_picks_transaction_id ON transaction_picks (transaction_id)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_picks_pick ON transaction_picks (season, round, roster_id)",
+    "CREATE INDEX IF NOT EXISTS idx_transaction_picks_league_week ON transaction_picks (league_id, week)",
+]
+
+
+async def _create_transaction_tables(db: aiosqlite.Connection):
+    for statement in _TRANSACTION_TABLES:
+        await db.execute(statement)
+
+
+async def _migrate_schema(db: aiosqlite.Connection):
+    """Bring tables created by older versions of the app up to SCHEMA_VERSION."""
+    cursor = await db.execute("PRAGMA user_version")
+    version = (await cursor.fetchone())[0]
+    await cursor.close()
+    if version >= SCHEMA_VERSION:
+        return
+
+    if version < 1:
+        # Payload format column; pre-existing rows are legacy JSON text (format 0)
+        columns = {row[1] for row in await db.execute_fetchall("PRAGMA table_info(api_cache)")}
+        if "format" not in columns:
+            await db.execute("ALTER TABLE api_cache ADD COLUMN format INTEGER NOT NULL DEFAULT 0")
+
+    if version < 2:
+        # Numeric expiry and access times for maintenance. Existing rows get the default TTL
+        # from when they were fetched; the next read or refresh sets the real one.
+        columns = {row[1] for row in await db.execute_fetchall("PRAGMA table_info(api_cache)")}
+        if "expires_at" not in columns:
+            await db.execute("ALTER TABLE api_cache ADD COLUMN expires_at REAL")
+            await db.execute("ALTER TABLE api_cache ADD COLUMN last_accessed REAL")
+            await db.execute(
+                "UPDATE api_cache SET last_accessed = CAST(strftime('%s', timestamp) AS REAL), "
+                "expires_at = CAST(strftime('%s', timestamp) AS REAL) + ?",
+                (cache_policy.DEFAULT_TTL_SECONDS,),
+            )
+        columns = {row[1] for row in await db.execute_fetchall("PRAGMA table_info(api_negative_cache)")}
+        if "expires_at" not in columns:
+            await db.execute("ALTER TABLE api_negative_cache ADD COLUMN expires_at REAL")
+            await db.execute(
+                "UPDATE api_negative_cache SET expires_at = CAST(strftime('%s', timestamp) AS REAL) + ?",
+                (cache_policy.NEGATIVE_TTL_SECONDS,),
+            )
+
+    if version < 3:
+        # Rebuild api_cache with a nullable data column and a blob_hash column. SQLite cannot
+        # relax NOT NULL in place; the copy keeps payloads inline until migrate_payloads().
+        columns = {row[1] for row in await db.execute_fetchall("PRAGMA table_info(api_cache)")}
+        if "blob_hash" not in columns:
+            await db.execute(f"CREATE TABLE api_cache_v3 ({_API_CACHE_COLUMNS})")
+            await db.execute("""
+                INSERT INTO api_cache_v3 (id, url, data, timestamp, format, expires_at, last_accessed)
+                SELECT id, url, data, timestamp, format, expires_at, last_accessed FROM api_cache
+            """)
+            await db.execute("DROP TABLE api_cache")
+            await db.execute("ALTER TABLE api_cache_v3 RENAME TO api_cache")
+
+    if version < 4:
+        # Sync high-water marks; weeks synced before are re-polled once, then marked final
+        columns = {row[1] for row in await db.execute_fetchall("PRAGMA table_info(transaction_weeks)")}
+        if "final" not in columns:
+            await db.execute("ALTER TABLE transaction_weeks ADD COLUMN final INTEGER NOT NULL DEFAULT 0")
+            await db.execute("ALTER TABLE transaction_weeks ADD COLUMN synced_at REAL")
+
+    await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
 async def create_tables():
     async with aiosqlite.connect(DATABASE_URL) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS api_cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT UNIQUE NOT NULL,
-                data TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        await _create_tables(db)
+
+
+async def migrate_payloads() -> int:
+    """
+    One-shot move of payloads stored inline in api_cache (legacy JSON text or compressed)
+    into the shared api_blobs table in the current format, followed by a VACUUM to give
+    the space back. Safe to re-run. Returns rows converted.
+    """
+    converted = 0
+    async with aiosqlite.connect(DATABASE_URL) as db:
+        await _create_tables(db)
+        while True:
+            rows = await db.execute_fetchall(
+                "SELECT id, data, format FROM api_cache WHERE data IS NOT NULL LIMIT ?",
+                (MIGRATION_BATCH_SIZE,),
             )
-        """)
+            if not rows:
+                break
+            blobs, pointers = [], []
+            for row_id, data, fmt in rows:
+                raw_json = codec.raw_json(data, fmt)
+                blob_hash = codec.content_hash(raw_json)
+                blobs.append((blob_hash, codec.encode(raw_json), codec.CURRENT_FORMAT))
+                pointers.append((blob_hash, codec.CURRENT_FORMAT, row_id))
+            await db.executemany(INSERT_BLOB_SQL, blobs)
+            await db.executemany(
+                "UPDATE api_cache SET blob_hash = ?, data = NULL, format = ? WHERE id = ?", pointers,
+            )
+            await db.commit()
+            converted += len(rows)
+        # VACUUM also switches databases created before incremental auto-vacuum over to it
+        await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        await db.execute("VACUUM")
+    return converted
+
+
+async def init_db():
+    """Open the long-lived cache connection and start the writer and maintenance tasks. Called from the app lifespan."""
+    global _maintenance_task
+    await get_db()
+    _ensure_writer()
+    if _maintenance_task is None or _maintenance_task.done():
+        _maintenance_task = asyncio.ensure_future(_maintenance_loop())
+
+
+async def get_db() -> aiosqlite.Connection:
+    """
+    Return the shared cache connection, opening it on first use.
+
+    Reads go straight to this connection; writes should go through enqueue_write().
+    """
+    global _db, _db_lock, _db_path
+    if _db is None:
+        if _db_lock is None:
+            _db_lock = asyncio.Lock()
+        async with _db_lock:
+            if _db is None:
+                db = await get_db_connection()
+                await _configure_connection(db)
+                await _create_tables(db)
+                _db = db
+                _db_path = DATABASE_URL
+    return _db
+
+
+def _ensure_writer():
+    global _write_queue, _write_lock, _writer_task, _writer_loop
+    loop = asyncio.get_running_loop()
+    # The queue, lock and task are bound to the loop that created them (TestClient without a
+    # lifespan runs each request on a fresh loop), so restart them on a new loop.
+    if _writer_task is None or _writer_task.done() or _writer_loop is not loop:
+        _write_queue = asyncio.Queue()
+        _write_lock = asyncio.Lock()
+        _writer_loop = loop
+        _writer_task = loop.create_task(_writer())
+
+
+def _get_write_lock() -> asyncio.Lock:
+    _ensure_writer()
+    return _write_lock
+
+
+def enqueue_write(sql: str, params: Sequence[Any]):
+    """Queue a write for the writer task. Never waits on SQLite."""
+    enqueue_writes([(sql, params)])
+
+
+def enqueue_writes(statements: Sequence[Tuple[str, Sequence[Any]]]):
+    """Queue (sql, params) writes that the writer task always commits together."""
+    _ensure_writer()
+    _write_queue.put_nowait(tuple((sql, tuple(params)) for sql, params in statements))
+
+
+async def flush_writes():
+    """Wait until every queued write has been committed."""
+    if _write_queue is not None and _writer_loop is asyncio.get_running_loop():
+        await _write_queue.join()
+
+
+async def write_transaction(statements: Sequence[Tuple[str, Sequence[Sequence[Any]]]]):
+    """
+    Run (sql, rows) statements as one transaction, each through executemany. Unlike
+    enqueue_write() this waits and raises on failure, and it runs on its own connection
+    so readers of the shared one see all of it or none of it.
+    """
+    await get_db()  # Make sure the schema exists
+    async with aiosqlite.connect(_db_path) as db:
+        await db.execute("PRAGMA busy_timeout=5000")
+        for sql, rows in statements:
+            await db.executemany(sql, rows)
         await db.commit()
 
+
+async def _writer():
+    global dropped_write_batches
+    queue, lock = _write_queue, _write_lock
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < WRITE_BATCH_SIZE:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+        try:
+            async with lock:
+                try:
+                    db = await get_db()
+                    # Consecutive writes of the same statement go through one executemany
+                    statements = [statement for item in batch for statement in item]
+                    for sql, group in groupby(statements, key=lambda statement: statement[0]):
+                        await db.executemany(sql, [params for _, params in group])
+                    await db.commit()
+                except Exception:
+                    # Cache writes are best-effort; drop the batch rather than kill the writer
+                    dropped_write_batches += 1
+                    logger.exception("Dropped a batch of %d cache writes", len(batch))
+                    try:
+                        await _db.rollback()
+                    except Exception:
+                        pass
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def _maintenance_loop():
+    while True:
+        await asyncio.sleep(CACHE_MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            await run_maintenance()
+        except Exception:
+            # Try again next interval; the cache keeps working without maintenance
+            logger.exception("Cache maintenance failed")
+
+
+async def run_maintenance(max_bytes: Optional[int] = None) -> dict:
+    """
+    Purge rows long past expiry, evict least recently used rows while the cached payloads
+    exceed `max_bytes` (CACHE_MAX_BYTES by default), and return freed pages to the OS.
+    """
+    db = await get_db()
+    await flush_writes()
+    async with _get_write_lock():
+        return await _run_maintenance(db, CACHE_MAX_BYTES if max_bytes is None else max_bytes)
+
+
+async def _run_maintenance(db: aiosqlite.Connection, max_bytes: int) -> dict:
+    purge_before = time.time() - CACHE_EXPIRED_RETENTION_SECONDS
+
+    # 1. Expired beyond the retention window
+    cursor = await db.execute("DELETE FROM api_cache WHERE expires_at < ?", (purge_before,))
+    expired = cursor.rowcount
+    cursor = await db.execute("DELETE FROM api_negative_cache WHERE expires_at < ?", (purge_before,))
+    expired += cursor.rowcount
+    # Blobs whose api_cache row never got written (a dropped batch, an interrupted migration)
+    # are never decremented to zero by the triggers, but still count towards the size limit.
+    # A blob is queued together with its row (enqueue_writes), so none is between the two here.
+    cursor = await db.execute("""
+        DELETE FROM api_blobs WHERE refcount <= 0
+        AND NOT EXISTS (SELECT 1 FROM api_cache WHERE blob_hash = api_blobs.hash)
+    """)
+    orphaned = cursor.rowcount
+    await db.commit()
+
+    # 2. Over the size limit: drop least recently used rows. A row frees its blob only if
+    # it is the last reference, so the estimate errs towards evicting a little more.
+    evicted = 0
+    total_bytes = await stored_bytes(db)
+    if total_bytes > max_bytes:
+        to_free = total_bytes - max_bytes * CACHE_EVICTION_TARGET_RATIO
+        victims = []
+        async with db.execute("""
+            SELECT c.id, COALESCE(length(c.data), 0) + CASE WHEN b.refcount = 1 THEN length(b.data) ELSE 0 END
+            FROM api_cache c LEFT JOIN api_blobs b ON b.hash = c.blob_hash
+            ORDER BY c.last_accessed
+        """) as cursor:
+            async for row_id, size in cursor:
+                victims.append((row_id,))
+                to_free -= size
+                if to_free <= 0:
+                    break
+        await db.executemany("DELETE FROM api_cache WHERE id = ?", victims)
+        await db.commit()
+        evicted = len(victims)
+        total_bytes = await stored_bytes(db)
+
+    # 3. Give the freed pages back (no-op unless auto_vacuum is INCREMENTAL)
+    await db.execute_fetchall("PRAGMA incremental_vacuum")
+    return {"expired_rows_purged": expired, "orphaned_blobs_purged": orphaned, "rows_evicted": evicted, "payload_bytes": total_bytes}
+
+
+async def stored_bytes(db: aiosqlite.Connection) -> int:
+    """Payload bytes on disk: shared blobs plus payloads still stored inline."""
+    blobs = (await db.execute_fetchall("SELECT COALESCE(SUM(length(data)), 0) FROM api_blobs"))[0][0]
+    inline = (await db.execute_fetchall("SELECT COALESCE(SUM(length(data)), 0) FROM api_cache"))[0][0]
+    return blobs + inline
+
+
+async def purge_path(url: str) -> int:
+    """Delete the cached rows, including remembered misses, for `url` and every URL below it."""
+    db = await get_db()
+    await flush_writes()
+    # Range scan on the url index rather than LIKE, which would need escaping and a full scan
+    prefix = url + "/"
+    params = (url, prefix, prefix + "\U0010ffff")
+    purged = 0
+    async with _get_write_lock():
+        for table in ("api_cache", "api_negative_cache"):
+            cursor = await db.execute(f"DELETE FROM {table} WHERE url = ? OR (url >= ? AND url < ?)", params)
+            purged += cursor.rowcount
+        await db.commit()
+    return purged
+
+
+async def _stop_task(task: Optional[asyncio.Task]):
+    # A task started on another (finished) loop cannot be cancelled from here; it went with its loop
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        return
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+async def close_db():
+    """Flush pending writes, stop the background tasks and close the shared connection."""
+    global _db, _write_queue, _write_lock, _writer_task, _writer_loop, _maintenance_task
+    await _stop_task(_maintenance_task)
+    _maintenance_task = None
+    await flush_writes()
+    await _stop_task(_writer_task)
+    if _db is not None:
+        await _db.close()
+    _db = None
+    _write_queue = None
+    _write_lock = None
+    _writer_task = None
+    _writer_loop = None
+
+
 if __name__ == "__main__":
-    asyncio.run(create_tables())
+    # `python -m backend.database` creates the tables; `... migrate` also converts legacy payloads
+    if sys.argv[1:] == ["migrate"]:
+        print(f"Converted {asyncio.run(migrate_payloads())} cached payloads")
+    else:
+        asyncio.run(create_tables())
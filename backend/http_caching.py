@@ -0,0 +1,181 @@
+"""
+Conditional GETs and compression for API responses.
+
+ETags are derived from the versions of the upstream data a response was built from: every
+cached Sleeper URL it read (by content hash) and the player index generation, collected per
+request through client.dependencies. The dependencies seen for each route are remembered,
+so a request whose If-None-Match still matches, with every dependency still fresh in memory,
+is answered 304 without running the endpoint.
+"""
+import asyncio
+import gzip
+import hashlib
+import importlib.util
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from . import client, codec, player_index
+
+# Brotli needs the optional `brotli` package; gzip alone is offered without it
+BROTLI_ENABLED = importlib.util.find_spec("brotli") is not None
+if BROTLI_ENABLED:
+    import brotli
+
+# Bodies smaller than this are sent as they are
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "text/")
+
+# Compressed bodies kept per (ETag, encoding), so prebuilt responses are compressed once
+COMPRESSED_CACHE_MAX_ENTRIES = 64
+
+# Routes whose last ETag and dependencies are remembered for 304s
+MAX_TRACKED_ROUTES = 10000
+
+# Bump when response shapes change, so clients do not keep bodies from older code
+ETAG_SALT = "1"
+
+# Dependency keys that are not Sleeper URLs, and how to read their current version
+_VERSION_SOURCES = {"player_index": player_index.current_version}
+
+# route (path and query) -> (ETag, {dependency: version}, whether its body is compressed when accepted)
+_routes: "OrderedDict[str, Tuple[str, Dict[str, str], bool]]" = OrderedDict()
+_compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+
+def compute_etag(route: str, dependencies: Dict[str, str]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{ETAG_SALT}\n{route}\n".encode())
+    for key in sorted(dependencies):
+        digest.update(f"{key}={dependencies[key]}\n".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def remember(route: str, dependencies: Dict[str, Optional[str]], compressible: bool = True) -> Optional[str]:
+    """
+    ETag for a response built from `dependencies`, remembered for `route` along with whether
+    its body is `compressible`. None when it cannot be tagged: it read nothing versioned, or
+    some dependency had no known version.
+    """
+    if not dependencies or any(version is None for version in dependencies.values()):
+        _routes.pop(route, None)
+        return None
+    etag = compute_etag(route, dependencies)
+    _routes[route] = (etag, dict(dependencies), compressible)
+    _routes.move_to_end(route)
+    if len(_routes) > MAX_TRACKED_ROUTES:
+        _routes.popitem(last=False)
+    return etag
+
+
+def current_etag(route: str) -> Optional[str]:
+    """The route's remembered ETag if every dependency behind it is unchanged and still fresh."""
+    entry = _routes.get(route)
+    if entry is None:
+        return None
+    etag, dependencies, _ = entry
+    for key, version in dependencies.items():
+        current = _VERSION_SOURCES[key]() if key in _VERSION_SOURCES else client.current_version(key)
+        if current != version:
+            return None
+    return etag
+
+
+def route_compressible(route: str) -> bool:
+    """Whether the route's remembered response body is compressed for clients that accept it."""
+    entry = _routes.get(route)
+    return entry is not None and entry[2]
+
+
+def _opaque_tags(if_none_match: str) -> List[str]:
+    # Weak comparison, as If-None-Match uses; compressed variants carry an encoding suffix
+    tags = []
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        for encoding in ("br", "gzip"):
+            suffix = f'-{encoding}"'
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+        tags.append(tag)
+    return tags
+
+
+def matching_tag(if_none_match: Optional[str], etag: Optional[str]) -> Optional[str]:
+    """The tag from If-None-Match that matches `etag`, as the client sent it, or None."""
+    if not if_none_match or not etag:
+        return None
+    sent = [tag.strip() for tag in if_none_match.split(",")]
+    for original, opaque in zip(sent, _opaque_tags(if_none_match)):
+        if opaque == etag or original == "*":
+            return original
+    return None
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The preferred encoding the client accepts (q > 0): br if available, then gzip."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in (["br"] if BROTLI_ENABLED else []) + ["gzip"]:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    return bool(media_type) and media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+
+def is_compressible_body(media_type: Optional[str], content_length: Optional[str]) -> bool:
+    """Whether a 200 with these headers is compressed for clients that accept an encoding; unknown lengths may be."""
+    if not is_compressible(media_type):
+        return False
+    return content_length is None or int(content_length) >= COMPRESSION_MIN_BYTES
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """The ETag of the representation of `etag` in `encoding` (None for the identity)."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+async def compress(body: bytes, encoding: str, etag: Optional[str] = None) -> bytes:
+    """`body` in `encoding`, reusing the result for bodies with the same ETag."""
+    key = (etag, encoding) if etag else None
+    if key is not None and key in _compressed:
+        _compressed.move_to_end(key)
+        return _compressed[key]
+    if len(body) > codec.OFFLOAD_THRESHOLD_BYTES:
+        compressed = await asyncio.to_thread(_compress, body, encoding)
+    else:
+        compressed = _compress(body, encoding)
+    if key is not None:
+        _compressed[key] = compressed
+        if len(_compressed) > COMPRESSED_CACHE_MAX_ENTRIES:
+            _compressed.popitem(last=False)
+    return compressed
+
+
+def reset():
+    """Forget every remembered route and compressed body. For tests."""
+    _routes.clear()
+    _compressed.clear()
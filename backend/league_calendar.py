@@ -0,0 +1,132 @@
+"""
+Which weeks of a season can have data, from a league's settings and the NFL state.
+
+Weekly fan-outs (matchups, transactions, stats) used to request weeks 1-18 whatever the
+league or the date. A league plays from its start_week to the end of its playoffs, and
+during the season nothing exists past the current week, so fan-outs request only those
+weeks. The calls skipped are counted for /admin/upstream/stats: each week URL left out
+counts once, since without the calendar it would have been fetched once and then cached.
+"""
+import asyncio
+import math
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from . import cache_policy, client, nfl_calendar
+from .nfl_calendar import WEEKS
+
+calls_saved = 0
+# Skipped week URLs already counted in calls_saved
+_counted_skips: Set[str] = set()
+MAX_COUNTED_SKIPS = 100000
+
+
+def final_week(settings: Optional[Dict[str, Any]]) -> int:
+    """Last week a league plays: the end of its playoffs, or WEEKS when its settings do not say."""
+    settings = settings or {}
+    playoff_week_start = settings.get("playoff_week_start")
+    if not playoff_week_start:
+        return WEEKS
+    playoff_teams = settings.get("playoff_teams") or 0
+    rounds = max(1, math.ceil(math.log2(playoff_teams))) if playoff_teams > 1 else 1
+    # playoff_round_type: 0 one week per round, 1 two-week championship, 2 two weeks per round
+    round_type = settings.get("playoff_round_type") or 0
+    playoff_weeks = rounds * 2 if round_type == 2 else rounds + (1 if round_type == 1 else 0)
+    last_week = max(playoff_week_start + playoff_weeks - 1, settings.get("last_scored_leg") or 0)
+    return min(last_week, WEEKS)
+
+
+def _through_current_week(league: Dict[str, Any], nfl_state: Optional[Dict[str, Any]], last_week: int) -> int:
+    # Past seasons run to their end; without the NFL state, assume they might
+    if nfl_state is None or cache_policy.is_complete_league(league, nfl_state):
+        return last_week
+    return min(cache_policy.current_leg(league, nfl_state), last_week)
+
+
+def transaction_weeks(league: Dict[str, Any], nfl_state: Optional[Dict[str, Any]]) -> List[int]:
+    """Weeks whose transactions endpoint can have data. Off-season moves land in week 1."""
+    last_week = _through_current_week(league, nfl_state, final_week(league.get("settings")))
+    return list(range(1, max(last_week, 1) + 1))
+
+
+def matchup_weeks(league: Dict[str, Any], nfl_state: Optional[Dict[str, Any]]) -> List[int]:
+    """Weeks the league has played (or is playing) matchups in."""
+    settings = league.get("settings") or {}
+    last_week = _through_current_week(league, nfl_state, final_week(settings))
+    return list(range(settings.get("start_week") or 1, last_week + 1))
+
+
+def stats_weeks(season: str, nfl_state: Optional[Dict[str, Any]]) -> List[int]:
+    """Weeks of a season with NFL stats: every week once the regular season is over, none before it starts."""
+    year = int(season)
+    now = datetime.utcnow()  # Naive UTC, like week_start
+    if nfl_calendar.week_start(year, WEEKS + 1) <= now:
+        return list(range(1, WEEKS + 1))
+    if now < nfl_calendar.week_start(year, 1):
+        return []
+    if nfl_state is not None and str(nfl_state.get("season")) == season and nfl_state.get("season_type") == "regular":
+        current_week = int(nfl_state.get("week") or 1)
+    else:
+        current_week = nfl_calendar.season_week(nfl_calendar.timestamp_ordinal(int(time.time() * 1000)))[1]
+    return list(range(1, min(max(current_week, 1), WEEKS) + 1))
+
+
+def count_skipped(url_pattern: str, weeks: Iterable[int]):
+    """
+    Record the calls a fan-out over `weeks` saved against requesting every week, where
+    `url_pattern` formats a week into its URL. Weeks already counted are not counted again.
+    """
+    global calls_saved
+    requested = set(weeks)
+    for week in range(1, WEEKS + 1):
+        url = url_pattern.format(week=week)
+        if week in requested or url in _counted_skips:
+            continue
+        if len(_counted_skips) >= MAX_COUNTED_SKIPS:
+            _counted_skips.clear()
+        _counted_skips.add(url)
+        calls_saved += 1
+
+
+def transactions_url_pattern(league_id: str) -> str:
+    return f"{client.API_URL}/league/{league_id}/transactions/{{week}}"
+
+
+async def get_nfl_state() -> Optional[Dict[str, Any]]:
+    try:
+        return await client.get_nfl_state() or None
+    except (httpx.HTTPError, client.UpstreamUnavailableError):
+        return None
+
+
+async def _get_league(league_id: str) -> Dict[str, Any]:
+    try:
+        return await client.get_league(league_id) or {"league_id": league_id}
+    except (httpx.HTTPError, client.UpstreamUnavailableError):
+        return {"league_id": league_id}
+
+
+async def get_transaction_weeks(league_id: str) -> List[int]:
+    league, nfl_state = await asyncio.gather(_get_league(league_id), get_nfl_state())
+    weeks = transaction_weeks(league, nfl_state)
+    count_skipped(transactions_url_pattern(league_id), weeks)
+    return weeks
+
+
+async def get_matchup_weeks(league_id: str) -> List[int]:
+    league, nfl_state = await asyncio.gather(_get_league(league_id), get_nfl_state())
+    weeks = matchup_weeks(league, nfl_state)
+    count_skipped(f"{client.API_URL}/league/{league_id}/matchups/{{week}}", weeks)
+    return weeks
+
+
+async def get_stats_weeks(season: str) -> List[int]:
+    # The NFL state is only needed while the season is in progress
+    weeks = stats_weeks(season, None)
+    if 0 < len(weeks) < WEEKS:
+        weeks = stats_weeks(season, await get_nfl_state())
+    count_skipped(f"{client.API_URL}/stats/nfl/regular/{season}/{{week}}", weeks)
+    return weeks
@@ -0,0 +1,161 @@
+"""
+League-wide index of every player's lifecycle: draft picks and transactions, in order.
+
+The index is built in one pass over every season's drafts and the league's stored
+transactions, so a single player's lifecycle is a dictionary read. When a sync changes
+transactions, only those are taken out and put back in, using the transaction store's
+change log; changed drafts (rare once a draft completes) rebuild the index.
+"""
+import asyncio
+from bisect import insort
+from itertools import count
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from . import client, transaction_store
+from .models.sleeper import Draft, Pick, Transaction
+
+# Events sort by timestamp (drafts have none and come first), then in the order they were indexed
+EventKey = Tuple[int, int]
+
+
+class LifecycleIndex:
+    """player_id -> ordered lifecycle events for one league's history. Treat events as read-only."""
+
+    def __init__(self, drafts: Sequence[Tuple[Draft, Sequence[Pick]]], transactions: Iterable[Transaction], generation: int):
+        self.generation = generation
+        self._sequence = count()
+        self._events: Dict[str, List[Tuple[EventKey, Dict[str, Any]]]] = {}
+        self._transaction_players: Dict[str, Set[str]] = {}
+
+        # Oldest draft first, so a player's latest draft is their last draft event
+        for draft, picks in sorted(drafts, key=lambda item: item[0].season):
+            for pick in picks:
+                if pick.player_id:
+                    self._insert(pick.player_id, 0, {
+                        "type": f"{draft.type} draft",
+                        "timestamp": None,
+                        "details": {
+                            "roster_id": pick.roster_id,
+                            "round": pick.round,
+                            "pick": pick.pick_no,
+                            "draft_id": draft.draft_id,
+                            "season": draft.season,
+                        },
+                    })
+        self.add_transactions(transactions)
+
+    def _insert(self, player_id: str, timestamp: int, event: Dict[str, Any]):
+        # Sequence numbers are unique, so events themselves are never compared
+        insort(self._events.setdefault(player_id, []), ((timestamp, next(self._sequence)), event))
+
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        for tx in transactions:
+            player_ids = {*(tx.adds or {}), *(tx.drops or {})}
+            if not player_ids:
+                continue
+            event = {
+                "type": tx.type,
+                "timestamp": tx.status_updated,
+                "details": {
+                    "transaction_id": tx.transaction_id,
+                    "league_id": tx.league_id,
+                    "leg": tx.leg,
+                    "roster_ids": tx.roster_ids,
+                    "adds": tx.adds,
+                    "drops": tx.drops,
+                },
+            }
+            self._transaction_players[tx.transaction_id] = player_ids
+            for player_id in player_ids:
+                self._insert(player_id, tx.status_updated or 0, event)
+
+    def remove_transactions(self, transaction_ids: Iterable[str]):
+        for transaction_id in transaction_ids:
+            for player_id in self._transaction_players.pop(transaction_id, ()):
+                self._events[player_id] = [
+                    item for item in self._events[player_id]
+                    if item[1]["details"].get("transaction_id") != transaction_id
+                ]
+
+    def events(self, player_id: str) -> List[Dict[str, Any]]:
+        return [event for _, event in self._events.get(player_id, ())]
+
+    def __contains__(self, player_id: str) -> bool:
+        return bool(self._events.get(player_id))
+
+
+# league key -> (draft and pick payloads the index was built from, index)
+_indexes: Dict[str, Tuple[Tuple[Any, ...], LifecycleIndex]] = {}
+_building: Dict[str, asyncio.Task] = {}
+builds = 0
+updates = 0
+
+
+async def _draft_payloads(league_ids: Sequence[str]) -> Tuple[List[Any], List[Any]]:
+    drafts_results = await asyncio.gather(*[client.get_league_drafts(league_id) for league_id in league_ids], return_exceptions=True)
+    drafts_payloads = [result if isinstance(result, list) else None for result in drafts_results]
+    draft_ids = [draft["draft_id"] for drafts in drafts_payloads for draft in drafts or [] if draft.get("draft_id")]
+    picks_results = await asyncio.gather(*[client.get_draft_picks(draft_id) for draft_id in draft_ids], return_exceptions=True)
+    return drafts_payloads, [result if isinstance(result, list) else None for result in picks_results]
+
+
+def _same_payloads(a: Tuple[Any, ...], b: Tuple[Any, ...]) -> bool:
+    # The client cache hands out the same objects until an entry is refreshed
+    return len(a) == len(b) and all(x is y or (not x and not y) for x, y in zip(a, b))
+
+
+async def _build(league_id: str, drafts_payloads: List[Any], picks_payloads: List[Any]) -> LifecycleIndex:
+    global builds
+    generation = transaction_store.generation()
+    transactions = await transaction_store.league_transactions(league_id)
+    picks_by_draft: Dict[str, List[Pick]] = {}
+    for picks in picks_payloads:
+        for pick in picks or []:
+            model = Pick(**pick)
+            picks_by_draft.setdefault(model.draft_id, []).append(model)
+    drafts = [Draft(**draft) for drafts in drafts_payloads for draft in drafts or [] if draft.get("draft_id")]
+    index = LifecycleIndex([(draft, picks_by_draft.get(draft.draft_id, [])) for draft in drafts], transactions, generation)
+    builds += 1
+    return index
+
+
+async def get_lifecycle_index(league_id: str) -> LifecycleIndex:
+    """
+    The lifecycle index for a league's whole history, with new transactions synced in.
+    Built once, then updated in place for changed transactions; rebuilt if a draft changed.
+    """
+    global updates
+    league_ids = (await transaction_store.sync_league(league_id))["league_ids"]
+    key = ",".join(league_ids)
+    drafts_payloads, picks_payloads = await _draft_payloads(league_ids)
+    payloads = (*drafts_payloads, *picks_payloads)
+
+    cached = _indexes.get(key)
+    if cached is not None and _same_payloads(cached[0], payloads):
+        index = cached[1]
+        generation = transaction_store.generation()
+        changes = transaction_store.changes_since(index.generation)
+        if changes is not None:
+            written, removed = changes
+            changed = await transaction_store.transactions_by_id(league_id, written)
+            # A concurrent caller may have applied the same or newer changes meanwhile
+            if index.generation < generation:
+                index.remove_transactions(written | removed)
+                index.add_transactions(changed)
+                index.generation = generation
+                updates += 1
+            return index
+
+    task = _building.get(key)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_build(league_id, drafts_payloads, picks_payloads))
+        _building[key] = task
+    index = await asyncio.shield(task)
+    _indexes[key] = (payloads, index)
+    return index
+
+
+def reset():
+    """Forget every built index. For tests."""
+    _indexes.clear()
+    _building.clear()
@@ -1,22 +1,118 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from . import database
+from . import client, database, http_caching, league_calendar, player_index, player_search, responses, stats_store, transaction_store, validation
 from .services import sleeper_service
 from .models.sleeper import User, League, Roster, Draft, Player, Stats, Transaction, Matchup, PlayerStint, DraftPickInfo, DraftPickOwnership, TradeAsset, TradeNode, TradeTree, PickChain, PickIdentity, TradeGroup, CompleteAssetTree, TradeGraph, GraphBasedAssetGenealogy
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await database.create_tables()
+    await database.init_db()
+    await client.init_http_client()
+    player_index.warm_up()
     yield
+    await client.close_http_client()
+    await database.close_db()
 
 
 app = FastAPI(lifespan=lifespan)
 
-# Configure CORS for frontend integration
+@app.middleware("http")
+async def flag_stale_responses(request: Request, call_next):
+    """Tell the caller when any upstream data behind the response was served from a stale cache entry."""
+    request_stale_urls = set()
+    token = client.stale_urls.set(request_stale_urls)
+    try:
+        response = await call_next(request)
+    finally:
+        client.stale_urls.reset(token)
+    if request_stale_urls:
+        response.headers["X-Data-Stale"] = "true"
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return response
+
+
+def _route(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}" if request.url.query else request.url.path
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """
+    Tag GET responses with an ETag derived from the versions of the data behind them, and
+    answer 304 when the client already has that version, skipping the endpoint if possible.
+    """
+    if request.method != "GET":
+        return await call_next(request)
+    route = _route(request)
+    if_none_match = request.headers.get("if-none-match")
+    # A 304 carries the ETag of the representation this request would get, whatever the client sent
+    accepted_encoding = http_caching.choose_encoding(request.headers.get("accept-encoding"))
+
+    # 1. Nothing the route read last time has changed: no need to run it
+    etag = http_caching.current_etag(route)
+    if http_caching.matching_tag(if_none_match, etag):
+        encoding = accepted_encoding if http_caching.route_compressible(route) else None
+        return _not_modified(http_caching.variant_etag(etag, encoding))
+
+    # 2. Run it, recording what it reads
+    request_dependencies = {}
+    token = client.dependencies.set(request_dependencies)
+    try:
+        response = await call_next(request)
+    finally:
+        client.dependencies.reset(token)
+    if response.status_code != 200:
+        return response
+    compressible = http_caching.is_compressible_body(response.headers.get("content-type"), response.headers.get("content-length"))
+    etag = http_caching.remember(route, request_dependencies, compressible)
+    if etag is None:
+        return response
+    if http_caching.matching_tag(if_none_match, etag):
+        return _not_modified(http_caching.variant_etag(etag, accepted_encoding if compressible else None))
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    """Compress large JSON bodies with the best encoding the client accepts."""
+    response = await call_next(request)
+    media_type = response.headers.get("content-type")
+    if response.status_code != 200 or "content-encoding" in response.headers or not http_caching.is_compressible(media_type):
+        return response
+    response.headers.append("Vary", "Accept-Encoding")
+    encoding = http_caching.choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = [(name, value) for name, value in response.raw_headers if name != b"content-length"]
+    if len(body) >= http_caching.COMPRESSION_MIN_BYTES:
+        etag = response.headers.get("etag")
+        body = await http_caching.compress(body, encoding, etag)
+        headers = [(name, value) for name, value in headers if name != b"etag"]
+        headers.append((b"content-encoding", encoding.encode()))
+        if etag:
+            # A distinct strong ETag per encoding; conditional_get strips the suffix when matching
+            headers.append((b"etag", http_caching.variant_etag(etag, encoding).encode()))
+    compressed = Response(content=body, status_code=response.status_code)
+    compressed.raw_headers = headers + [(b"content-length", str(len(body)).encode())]
+    return compressed
+
+
+# Configure CORS for frontend integration. Added last so it wraps the middleware above,
+# and 304s and compressed responses carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -28,14 +124,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Data-Stale", "ETag"],
 )
 
 
+@app.exception_handler(client.UpstreamUnavailableError)
+async def upstream_unavailable_handler(request: Request, exc: client.UpstreamUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Sleeper API is unavailable and no cached data exists for this request"},
+        headers={"Retry-After": str(int(client.CIRCUIT_COOLDOWN_SECONDS))},
+    )
+
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 
+@app.get("/admin/cache/stats")
+def get_cache_stats():
+    """Counters for the in-process API cache tier, for sizing it."""
+    return client.cache_stats()
+
+
+@app.get("/admin/cache/usage")
+async def get_cache_usage():
+    """Size of the SQLite cache per resource type."""
+    return await client.cache_usage()
+
+
+@app.delete("/admin/cache")
+async def purge_cache(path: Optional[str] = None, league_id: Optional[str] = None):
+    """Purge cached responses for a URL path and everything below it, or for one league."""
+    if (path is None) == (league_id is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of path or league_id")
+    if league_id is not None:
+        purged = await client.purge_league(league_id)
+        # Weeks marked final are never fetched again unless their marks go too
+        purged["transactions"] = await transaction_store.purge_league(league_id)
+        return purged
+    return await client.purge_cache(path)
+
+
+@app.post("/admin/cache/maintenance")
+async def run_cache_maintenance():
+    """Run the periodic cache maintenance now: purge expired rows and enforce the size limit."""
+    return await database.run_maintenance()
+
+
+@app.get("/admin/upstream/stats")
+def get_upstream_stats():
+    """Rate limiting, throttling and retry counters for calls to the Sleeper API, and weekly calls skipped."""
+    return {**client.upstream_stats(), "week_calls_saved": league_calendar.calls_saved}
+
+
 @app.get("/user/{username}", response_model=User)
 async def get_user(username: str):
     user_data = await sleeper_service.client.get_user_by_username(username)
@@ -79,30 +222,40 @@ async def get_league_drafts(league_id: str):
 @app.get("/league/{league_id}/rosters", response_model=List[Roster])
 async def get_league_rosters(league_id: str):
     rosters_data = await sleeper_service.client.get_league_rosters(league_id)
-    return [Roster(**roster) for roster in rosters_data]
+    rosters = validation.validate_list(validation.ROSTERS, rosters_data)
+    return responses.model_response(rosters, validation.ROSTERS)
 
 
 @app.get("/league/{league_id}/transactions/{week}", response_model=List[Transaction])
 async def get_league_transactions(league_id: str, week: int):
     transactions_data = await sleeper_service.client.get_league_transactions(league_id, week)
-    if transactions_data:
-        for tx in transactions_data:
-            tx["league_id"] = league_id
-            # Convert draft_picks to DraftPickMovement objects
-            if "draft_picks" in tx and tx["draft_picks"]:
-                from .models.sleeper import DraftPickMovement
-                draft_pick_movements = []
-                for pick_data in tx["draft_picks"]:
-                    if isinstance(pick_data, dict):
-                        draft_pick_movements.append(DraftPickMovement(**pick_data))
-                tx["draft_picks"] = draft_pick_movements
-    return [Transaction(**tx) for tx in transactions_data] if transactions_data else []
+    transactions = validation.validate_list(validation.TRANSACTIONS, transactions_data, league_id=league_id)
+    return responses.model_response(transactions, validation.TRANSACTIONS)
 
 
 @app.get("/players", response_model=Dict[str, Player])
 async def get_all_players():
-    players_data = await sleeper_service.client.get_all_players()
-    return {player_id: Player(**player_data) for player_id, player_data in players_data.items()}
+    index = await player_index.get_player_index()
+
+    async def render():
+        return await asyncio.to_thread(lambda: responses.encode({player_id: record.as_player_dict() for player_id, record in index.records()}))
+
+    return await responses.prebuilt_response("players", index, render)
+
+
+@app.get("/players/search", response_model=List[Player])
+async def search_players(
+    q: str,
+    limit: int = Query(player_search.DEFAULT_LIMIT, ge=1, le=player_search.MAX_LIMIT),
+    position: Optional[str] = None,
+    team: Optional[str] = None,
+    league_id: Optional[str] = None,
+):
+    """Players whose names match `q`, best first; optionally only a position, an NFL team, or players seen in a league's history."""
+    search_index = await player_search.get_search_index()
+    league_player_ids = await player_search.get_league_player_ids(league_id, sleeper_service.get_league_player_ids) if league_id else None
+    matches = search_index.search(q, limit=limit, position=position, team=team, player_ids=league_player_ids)
+    return [record.as_player_dict() for _, record in matches]
 
 
 @app.get("/league/{league_id}/history", response_model=List[League])
@@ -113,7 +266,14 @@ async def get_league_history(league_id: str):
 
 @app.get("/league/{league_id}/transactions", response_model=List[Transaction])
 async def get_all_league_transactions(league_id: str):
-    return await sleeper_service.get_all_league_transactions(league_id)
+    transactions = await sleeper_service.get_all_league_transactions(league_id)
+    return responses.model_response(transactions, validation.TRANSACTIONS)
+
+
+@app.post("/league/{league_id}/sync")
+async def sync_league_transactions(league_id: str):
+    """Fetch new transactions for the weeks of the league's history that can still change, and report what changed."""
+    return await transaction_store.sync_league(league_id, refresh=True)
 
 
 @app.get("/league/{league_id}/player/{player_id}/lifecycle", response_model=List[Dict[str, Any]])
@@ -128,7 +288,35 @@ async def get_roster_analysis(league_id: str, roster_id: int):
 
 @app.get("/stats/nfl/{season}", response_model=Dict[str, Dict[int, Stats]])
 async def get_nfl_player_stats(season: str):
-    return await sleeper_service.get_all_player_weekly_stats_for_season(season)
+    # The season's stats store is replaced whenever any of its weekly payloads is refreshed
+    store = await stats_store.get_season_stats(season)
+
+    async def render():
+        stats = await sleeper_service.get_all_player_weekly_stats_for_season(season)
+        return await asyncio.to_thread(validation.SEASON_STATS.dump_json, stats)
+
+    return await responses.prebuilt_response(f"stats/{season}", store, render)
+
+
+# Upper bounds for one /stats/aggregates request
+MAX_AGGREGATE_PLAYERS = 500
+MAX_AGGREGATE_SEASONS = 20
+
+
+def _split_csv(values: List[str]) -> List[str]:
+    return [item.strip() for value in values for item in value.split(",") if item.strip()]
+
+
+@app.get("/stats/aggregates", response_model=Dict[str, Dict[str, Dict[str, Any]]])
+async def get_players_aggregated_stats(player_ids: List[str] = Query(...), seasons: List[str] = Query(...)):
+    """Season aggregates for many players at once, as {season: {player_id: aggregates}}. Values may be repeated or comma-separated."""
+    player_ids, seasons = _split_csv(player_ids), _split_csv(seasons)
+    if len(player_ids) > MAX_AGGREGATE_PLAYERS or len(seasons) > MAX_AGGREGATE_SEASONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_AGGREGATE_PLAYERS} player ids and {MAX_AGGREGATE_SEASONS} seasons per request",
+        )
+    return await sleeper_service.get_players_aggregated_stats(player_ids, seasons)
 
 
 @app.get("/player/{player_id}/aggregated_stats/{season}", response_model=Dict[str, Any])
@@ -139,7 +327,8 @@ async def get_player_aggregated_stats(player_id: str, season: str):
 @app.get("/league/{league_id}/matchups/{week}", response_model=List[Matchup])
 async def get_league_matchups(league_id: str, week: int):
     matchups_data = await sleeper_service.client.get_league_matchups(league_id, week)
-    return [Matchup(**matchup) for matchup in matchups_data]
+    matchups = validation.validate_list(validation.MATCHUPS, matchups_data, league_id=league_id, week=week)
+    return responses.model_response(matchups, validation.MATCHUPS)
 
 
 @app.get("/analysis/league/{league_id}/player/{player_id}/since_transaction/{transaction_id}", response_model=Dict[str, Any])
@@ -173,15 +362,13 @@ async def get_league_draft_picks(league_id: str, season: str):
 async def analyze_trade_assets_endpoint(league_id: str, transaction_id: str):
     """Analyze what assets (players and picks) were involved in a specific trade."""
     # Get the specific transaction
-    all_transactions = await sleeper_service.get_all_league_transactions(league_id)
-    target_transaction = next((tx for tx in all_transactions if tx.transaction_id == transaction_id), None)
+    target_transaction = await transaction_store.get_transaction(league_id, transaction_id)
     
     if not target_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     # Get player data for name lookups
-    all_players_data = await sleeper_service.client.get_all_players()
-    all_players_map = {p_id: Player(**p_data) for p_id, p_data in all_players_data.items()} if all_players_data else {}
+    all_players_map = await player_index.get_player_index()
     
     return await sleeper_service.analyze_trade_assets(target_transaction, all_players_map, league_id)
 
@@ -237,19 +424,19 @@ async def get_league_trade_groups(league_id: str, time_window_days: int = 7):
 @app.get("/analysis/league/{league_id}/asset_tree/{root_asset_id}", response_model=CompleteAssetTree)
 async def get_complete_asset_tree(league_id: str, root_asset_id: str):
     """Build complete asset genealogy tree starting from a root asset (like Travis Kelce)."""
-    return await sleeper_service.build_complete_asset_tree(league_id, root_asset_id)
+    return responses.model_response(await sleeper_service.build_complete_asset_tree(league_id, root_asset_id))
 
 
 @app.get("/analysis/league/{league_id}/complete_trade_graph", response_model=TradeGraph)
 async def get_complete_trade_graph(league_id: str):
     """Build comprehensive trade graph from all historical transactions."""
-    return await sleeper_service.build_complete_trade_graph(league_id)
+    return responses.model_response(await sleeper_service.build_complete_trade_graph(league_id))
 
 
 @app.get("/analysis/league/{league_id}/asset_genealogy/{root_asset_id}", response_model=GraphBasedAssetGenealogy)
 async def get_graph_based_asset_genealogy(league_id: str, root_asset_id: str):
     """Get true multi-hop asset genealogy using complete trade graph analysis."""
-    return await sleeper_service.trace_asset_genealogy_from_graph(league_id, root_asset_id)
+    return responses.model_response(await sleeper_service.trace_asset_genealogy_from_graph(league_id, root_asset_id))
 
 
 @app.get("/analysis/league/{league_id}/manager/{roster_id}/asset_trace/{asset_id}")
@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+
+# Sentinel returned on a miss, so that cached falsy payloads ([] / {}) still count as hits
+MISS = object()
+
+
+class _Entry(NamedTuple):
+    value: Any
+    size: int
+    expires_at: Optional[float]  # Unix time; None never expires
+
+
+class MemoryCache:
+    """
+    Bounded in-process cache of decoded API payloads, evicting least-recently-used
+    entries when either the entry count or the byte budget is exceeded.
+
+    Sizes are the encoded JSON length of a payload, which is a cheap, stable proxy for
+    its decoded footprint. Values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        if entry.expires_at is not None and entry.expires_at <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def expires_at(self, key: str) -> Any:
+        """Unix time a live entry expires (None if never), or MISS. Does not count as a lookup."""
+        entry = self._entries.get(key)
+        if entry is None or (entry.expires_at is not None and entry.expires_at <= time.time()):
+            return MISS
+        return entry.expires_at
+
+    def set(self, key: str, value: Any, size: int, ttl_seconds: Optional[float] = None):
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            return  # Would evict everything else; leave it to the SQLite tier
+
+        expires_at = time.time() + ttl_seconds if ttl_seconds is not None else None
+        self._entries[key] = _Entry(value, size, expires_at)
+        self.current_bytes += size
+
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        if key in self._entries:
+            self._remove(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every entry whose key starts with `prefix`. Returns how many were dropped."""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
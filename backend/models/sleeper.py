@@ -1,6 +1,6 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 
 class User(BaseModel):
@@ -87,12 +87,21 @@ class Transaction(BaseModel):
     type: str
     status: str
     status_updated: Optional[int] = None  # Unix timestamp in ms
+    leg: Optional[int] = None  # Week the transaction was processed for
     adds: Optional[Dict[str, Any]] = None
     drops: Optional[Dict[str, Any]] = None
     roster_ids: Optional[List[int]] = None
     draft_picks: Optional[List[DraftPickMovement]] = None
     metadata: Optional[Dict[str, Any]] = None
 
+    @field_validator("draft_picks", mode="before")
+    @classmethod
+    def _skip_malformed_picks(cls, value):
+        # Sleeper occasionally lists non-object picks; skip them rather than fail the whole week
+        if isinstance(value, list):
+            return [pick for pick in value if isinstance(pick, dict)]
+        return value
+
 
 class Matchup(BaseModel):
     matchup_id: Optional[int] = None
@@ -0,0 +1,96 @@
+"""
+NFL regular-season week boundaries, for placing timestamps and transactions in (season, week).
+
+Week 1 kicks off the Thursday after Labor Day (the first Monday in September), and each week
+runs Tuesday to Monday, so week w of a season covers [tuesday_after_labor_day + 7 * (w - 1),
++7 days). Times between seasons fall in week 0 of the next season.
+
+Positions are "week ordinals": season * (WEEKS + 1) + week, which order correctly across
+seasons and compare as plain integers. Lookups are np.searchsorted over the sorted week
+boundaries of every season, so whole arrays of timestamps are placed at once.
+"""
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+WEEKS = 18
+
+# Boundaries fall early Tuesday morning US time, after Monday night games have finished
+WEEK_BOUNDARY_HOUR_UTC = 9
+
+FIRST_SEASON = 2010
+
+
+def labor_day(season: int) -> date:
+    september_first = date(season, 9, 1)
+    return september_first + timedelta(days=(7 - september_first.weekday()) % 7)
+
+
+def week_start(season: int, week: int) -> datetime:
+    """Start of `week` (1-based) of a season, as a naive UTC datetime."""
+    tuesday = labor_day(season) + timedelta(days=1, weeks=week - 1)
+    return datetime(tuesday.year, tuesday.month, tuesday.day, WEEK_BOUNDARY_HOUR_UTC)
+
+
+def _timestamp_ms(moment: datetime) -> int:
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def week_ordinal(season: int, week: int) -> int:
+    """Ordinal for `week` of a season; week 0 is the offseason before it."""
+    return season * (WEEKS + 1) + week
+
+
+def season_week(ordinal: int) -> Tuple[int, int]:
+    return divmod(int(ordinal), WEEKS + 1)
+
+
+def season_ordinals(season: int) -> np.ndarray:
+    """Ordinals of weeks 1..WEEKS, aligned with the stats store's week columns."""
+    return week_ordinal(season, 1) + np.arange(WEEKS)
+
+
+@lru_cache(maxsize=8)
+def _boundaries(last_season: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Sorted boundary timestamps (ms) and the ordinal that starts at each
+    starts, ordinals = [], []
+    for season in range(FIRST_SEASON, last_season + 1):
+        for week in range(1, WEEKS + 1):
+            starts.append(_timestamp_ms(week_start(season, week)))
+            ordinals.append(week_ordinal(season, week))
+        starts.append(_timestamp_ms(week_start(season, WEEKS + 1)))
+        ordinals.append(week_ordinal(season + 1, 0))
+    return np.array(starts, dtype=np.int64), np.array(ordinals, dtype=np.int64)
+
+
+def timestamp_ordinals(timestamps_ms: Sequence[int]) -> np.ndarray:
+    """Week ordinal of each Unix timestamp in milliseconds."""
+    timestamps = np.asarray(timestamps_ms, dtype=np.int64)
+    if timestamps.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    latest_year = datetime.fromtimestamp(int(timestamps.max()) / 1000, tz=timezone.utc).year
+    starts, ordinals = _boundaries(max(latest_year, datetime.now(timezone.utc).year) + 1)
+    index = np.searchsorted(starts, timestamps, side="right") - 1
+    return np.where(index >= 0, ordinals[np.maximum(index, 0)], week_ordinal(FIRST_SEASON, 0))
+
+
+def timestamp_ordinal(timestamp_ms: int) -> int:
+    return int(timestamp_ordinals([timestamp_ms])[0])
+
+
+def event_ordinal(timestamp_ms: Optional[int], season: Optional[str] = None, leg: Optional[int] = None) -> Optional[int]:
+    """
+    Ordinal for a league event. Sleeper's `leg` (the week a transaction was processed for)
+    wins over the timestamp when the season is known; events with neither, such as drafts,
+    sit in the offseason before their season.
+    """
+    if season and str(season).isdigit():
+        if leg and 1 <= leg <= WEEKS:
+            return week_ordinal(int(season), leg)
+        if not timestamp_ms:
+            return week_ordinal(int(season), 0)
+    if timestamp_ms:
+        return timestamp_ordinal(timestamp_ms)
+    return None
@@ -0,0 +1,372 @@
+"""
+Process-wide index of NFL players, shared by every endpoint that needs names and positions.
+
+The /players/nfl payload is large (10k+ players); turning it into pydantic models per request
+is expensive. The index keeps one compact, read-only record per player.
+
+The index is persisted as a memory-mapped snapshot file next to the cache database, so every
+worker process maps the same pages instead of decoding its own copy of the payload, and a cold
+worker serves lookups as soon as the file is mapped. The snapshot is rewritten when the
+players payload it was built from expires and has been refreshed.
+"""
+import asyncio
+import mmap
+import os
+import struct
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from . import client, database
+
+# Snapshot age limit when the payload's own expiry is unknown (e.g. it was served stale)
+SNAPSHOT_RECHECK_SECONDS = 5 * 60
+
+
+class PlayerRecord(NamedTuple):
+    """The subset of a Sleeper player object the services use. Attribute-compatible with models.Player."""
+    player_id: str
+    full_name: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    position: Optional[str]
+    team: Optional[str]
+    age: Optional[int]
+    search_rank: Optional[int]
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.first_name or ''} {self.last_name or ''}".strip()
+
+    def as_player_dict(self) -> Dict[str, Any]:
+        """The fields of models.Player, in its order."""
+        return {
+            "player_id": self.player_id,
+            "full_name": self.full_name,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "position": self.position,
+            "team": self.team,
+            "age": self.age,
+        }
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PlayerIndex(Mapping):
+    """Read-only mapping of player_id -> PlayerRecord, iterated in the payload's order."""
+
+    expires_at: Optional[float] = None  # Unix time the source payload expires; None if unknown
+    generated_at: Optional[float] = None  # Unix time the index was built; identifies its version
+
+    def __init__(self, records: Dict[str, PlayerRecord]):
+        self._records = records
+
+    def __getitem__(self, player_id: str) -> PlayerRecord:
+        return self._records[player_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, player_id: object) -> bool:
+        return player_id in self._records
+
+    def get(self, player_id: str, default: Optional[PlayerRecord] = None) -> Optional[PlayerRecord]:
+        return self._records.get(player_id, default)
+
+    def records(self) -> Iterator[Tuple[str, PlayerRecord]]:
+        """(player_id, record) pairs in the payload's order."""
+        return iter(self._records.items())
+
+    def name(self, player_id: str) -> Optional[str]:
+        record = self.get(player_id)
+        return record.display_name if record else None
+
+
+def build_player_index(players_data: Optional[Dict[str, Dict[str, Any]]]) -> PlayerIndex:
+    records = {}
+    for player_id, data in (players_data or {}).items():
+        if not isinstance(data, dict):
+            continue
+        records[player_id] = PlayerRecord(
+            data.get("player_id") or player_id,
+            data.get("full_name"),
+            data.get("first_name"),
+            data.get("last_name"),
+            data.get("position"),
+            data.get("team"),
+            _as_int(data.get("age")),
+            _as_int(data.get("search_rank")),
+        )
+    return PlayerIndex(records)
+
+
+EMPTY_INDEX = PlayerIndex({})
+
+
+# Snapshot file layout (little-endian):
+#   header
+#   id table: uint32 record numbers, sorted by the UTF-8 bytes of each record's key
+#   records:  fixed-size, in payload order; strings are (offset, length) into the string heap
+#   string heap: UTF-8
+SNAPSHOT_MAGIC = b"SLPX"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sHIddIII")  # magic, version, count, generated_at, expires_at, id/record/string offsets
+_RECORD = struct.Struct("<" + "IH" * 7 + "hi")  # key, player_id, full/first/last name, position, team, age, search_rank
+_ID_ENTRY = struct.Struct("<I")
+_STRING_REF = struct.Struct("<IH")
+_NONE_LENGTH = 0xFFFF
+_NONE_AGE = -0x8000
+_NONE_RANK = -0x80000000
+_NO_EXPIRY = 0.0
+
+
+def snapshot_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(database.DATABASE_URL)), "players.snapshot")
+
+
+def write_snapshot(path: str, index: PlayerIndex, expires_at: Optional[float]):
+    """Write `index` as a snapshot file. The file is replaced atomically, so mapped readers are unaffected."""
+    heap = bytearray()
+    heap_offsets: Dict[str, int] = {}
+
+    def string_ref(value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return 0, _NONE_LENGTH
+        if value not in heap_offsets:
+            heap_offsets[value] = len(heap)
+            heap.extend(value.encode()[:_NONE_LENGTH - 1])
+        return heap_offsets[value], len(value.encode()[:_NONE_LENGTH - 1])
+
+    keys = []
+    record_bytes = bytearray()
+    for key, record in index.records():
+        keys.append(key)
+        fields = []
+        for value in (key, record.player_id, record.full_name, record.first_name, record.last_name, record.position, record.team):
+            fields.extend(string_ref(value))
+        age = record.age if record.age is not None and -0x8000 < record.age < 0x8000 else _NONE_AGE
+        rank = record.search_rank if record.search_rank is not None and -0x80000000 < record.search_rank < 0x80000000 else _NONE_RANK
+        record_bytes.extend(_RECORD.pack(*fields, age, rank))
+
+    order = sorted(range(len(keys)), key=lambda i: keys[i].encode())
+    id_table = struct.pack(f"<{len(order)}I", *order)
+
+    id_offset = _HEADER.size
+    records_offset = id_offset + len(id_table)
+    strings_offset = records_offset + len(record_bytes)
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(keys), index.generated_at or time.time(),
+        expires_at if expires_at is not None else _NO_EXPIRY, id_offset, records_offset, strings_offset,
+    )
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(id_table)
+        f.write(record_bytes)
+        f.write(heap)
+    os.replace(temp_path, path)
+
+
+class PlayerSnapshot(PlayerIndex):
+    """A PlayerIndex backed by a memory-mapped snapshot file; lookups binary-search the id table."""
+
+    def __init__(self, buffer):
+        magic, version, count, generated_at, expires_at, id_offset, records_offset, strings_offset = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Not a player snapshot, or written by another version")
+        self._buffer = buffer
+        self._count = count
+        self._id_offset = id_offset
+        self._records_offset = records_offset
+        self._strings_offset = strings_offset
+        self.generated_at = generated_at
+        self.expires_at = expires_at if expires_at != _NO_EXPIRY else None
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if length == _NONE_LENGTH:
+            return None
+        start = self._strings_offset + offset
+        return self._buffer[start:start + length].decode()
+
+    def _key_bytes(self, record_number: int) -> bytes:
+        offset, length = _STRING_REF.unpack_from(self._buffer, self._records_offset + record_number * _RECORD.size)
+        start = self._strings_offset + offset
+        return self._buffer[start:start + length]
+
+    def _find(self, player_id: str) -> int:
+        target = player_id.encode()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record_number = _ID_ENTRY.unpack_from(self._buffer, self._id_offset + mid * _ID_ENTRY.size)[0]
+            key = self._key_bytes(record_number)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return record_number
+        return -1
+
+    def _record(self, record_number: int) -> Tuple[str, PlayerRecord]:
+        fields = _RECORD.unpack_from(self._buffer, self._records_offset + record_number * _RECORD.size)
+        strings = [self._string(fields[i], fields[i + 1]) for i in range(0, 14, 2)]
+        age, rank = fields[14], fields[15]
+        return strings[0], PlayerRecord(
+            *strings[1:],
+            age if age != _NONE_AGE else None,
+            rank if rank != _NONE_RANK else None,
+        )
+
+    def __getitem__(self, player_id: str) -> PlayerRecord:
+        record_number = self._find(player_id) if isinstance(player_id, str) else -1
+        if record_number < 0:
+            raise KeyError(player_id)
+        return self._record(record_number)[1]
+
+    def __iter__(self) -> Iterator[str]:
+        for record_number in range(self._count):
+            yield self._key_bytes(record_number).decode()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, player_id: object) -> bool:
+        return isinstance(player_id, str) and self._find(player_id) >= 0
+
+    def get(self, player_id: str, default: Optional[PlayerRecord] = None) -> Optional[PlayerRecord]:
+        record_number = self._find(player_id) if isinstance(player_id, str) else -1
+        return self._record(record_number)[1] if record_number >= 0 else default
+
+    def records(self) -> Iterator[Tuple[str, PlayerRecord]]:
+        for record_number in range(self._count):
+            yield self._record(record_number)
+
+
+def open_snapshot(path: str) -> Optional[PlayerSnapshot]:
+    """Map a snapshot file read-only, or return None if there is no usable one."""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None  # Missing, unreadable, or empty
+    try:
+        return PlayerSnapshot(buffer)
+    except (ValueError, struct.error):
+        buffer.close()
+        return None
+
+
+_index: Optional[PlayerIndex] = None
+_snapshot_stat: Optional[Tuple[int, int]] = None  # (inode, mtime) of the mapped snapshot file
+_refresh_task: Optional[asyncio.Task] = None
+rebuilds = 0
+
+
+async def get_player_index() -> PlayerIndex:
+    """
+    Return the current player index.
+
+    Maps the newest snapshot on disk, which may have been written by another worker. If the
+    payload behind it has expired, a refresh runs in the background and callers keep the
+    current index meanwhile. Only the very first build, with no snapshot on disk, is awaited.
+    """
+    _map_newest_snapshot()
+    if _index is None:
+        await asyncio.shield(_start_refresh())
+    elif _index.expires_at is not None and time.time() >= _index.expires_at:
+        _start_refresh()
+    index = _index or EMPTY_INDEX
+    client.record_dependency("player_index", repr(index.generated_at))
+    return index
+
+
+def current_version() -> Optional[str]:
+    """Version of the index get_player_index() would return now, or None if it needs building or refreshing."""
+    _map_newest_snapshot()
+    if _index is None or (_index.expires_at is not None and time.time() >= _index.expires_at):
+        return None
+    return repr(_index.generated_at)
+
+
+def warm_up():
+    """Map or build the index in the background. Called from the app lifespan; never blocks startup."""
+    _map_newest_snapshot()
+    if _index is None or (_index.expires_at is not None and time.time() >= _index.expires_at):
+        _start_refresh()
+
+
+def _map_newest_snapshot():
+    global _index, _snapshot_stat
+    path = snapshot_path()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+    key = (stat.st_ino, stat.st_mtime_ns)
+    if key == _snapshot_stat:
+        return
+    snapshot = open_snapshot(path)
+    if snapshot is not None:
+        # The replaced mapping stays valid for anyone still holding it and is unmapped once unreferenced
+        _index, _snapshot_stat = snapshot, key
+
+
+def _start_refresh() -> asyncio.Task:
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done() or _refresh_task.get_loop() is not asyncio.get_running_loop():
+        _refresh_task = asyncio.ensure_future(_refresh())
+        _refresh_task.add_done_callback(_forget_refresh)
+    return _refresh_task
+
+
+def _forget_refresh(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()  # A failed refresh keeps the current index; the next expired lookup retries
+
+
+async def _refresh():
+    """Load the players payload (refetching it if expired) and publish a new index and snapshot."""
+    global _index, _snapshot_stat, rebuilds
+    players_data = await client.get_all_players()
+    if not players_data:
+        return
+    expires_at = client.cached_until(client.PLAYERS_URL)
+    if expires_at is client.MISS:
+        expires_at = time.time() + SNAPSHOT_RECHECK_SECONDS
+
+    index = await asyncio.to_thread(build_player_index, players_data)
+    index.expires_at = expires_at
+    index.generated_at = time.time()
+    path = snapshot_path()
+    try:
+        await asyncio.to_thread(write_snapshot, path, index, expires_at)
+        snapshot = open_snapshot(path)
+    except OSError:
+        snapshot = None  # Read-only or full disk: serve the in-memory index
+    if snapshot is not None:
+        stat = os.stat(path)
+        _index, _snapshot_stat = snapshot, (stat.st_ino, stat.st_mtime_ns)
+    else:
+        _index = index
+    rebuilds += 1
+
+
+def reset():
+    """Forget the current index. For tests."""
+    global _index, _snapshot_stat, _refresh_task
+    _index = None
+    _snapshot_stat = None
+    _refresh_task = None
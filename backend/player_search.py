@@ -0,0 +1,234 @@
+"""
+Name search over the player index.
+
+Names are normalised (accents, case and punctuation dropped) and indexed three ways: sorted
+name and word tables for prefix lookups by bisection, and trigram posting lists for
+substring matches. Candidate sets, filters and ranking are NumPy operations over record
+numbers, so a query touches only the players it can match.
+"""
+import asyncio
+import re
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from . import client, player_index, transaction_store
+from .player_index import PlayerIndex, PlayerRecord
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# A league's player ids (rosters, drafts and transactions of every season) take dozens of
+# lookups to collect, so searches filtered by league reuse them for this long
+LEAGUE_PLAYERS_TTL_SECONDS = 5 * 60
+
+# Ranking tiers, best first
+EXACT, FULL_PREFIX, LAST_PREFIX, FIRST_PREFIX, WORD_PREFIX, SUBSTRING = range(6)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase ASCII words separated by single spaces: "D'André Swift" -> "d andre swift"."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    return _NON_ALNUM.sub(" ", ascii_text).strip()
+
+
+def _trigrams(text: str) -> Iterable[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _PrefixTable:
+    """Sorted (key, record number) pairs; every record whose key starts with a prefix is one slice."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]]):
+        ordered = sorted(pair for pair in pairs if pair[0])
+        self.keys = [key for key, _ in ordered]
+        self.records = np.array([record for _, record in ordered], dtype=np.int64)
+
+    def lookup(self, prefix: str) -> np.ndarray:
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\uffff", start)
+        return np.unique(self.records[start:end])
+
+    def exact(self, key: str) -> np.ndarray:
+        start = bisect_left(self.keys, key)
+        return self.records[start:bisect_right(self.keys, key, start)]
+
+
+class PlayerSearchIndex:
+    """Search structures for one PlayerIndex, built once and then read-only."""
+
+    def __init__(self, players: PlayerIndex):
+        entries = list(players.records())
+        self.player_ids = [player_id for player_id, _ in entries]
+        self.row_of = {player_id: row for row, player_id in enumerate(self.player_ids)}
+        self.records = [record for _, record in entries]
+        self.full_names = [normalize(record.display_name) for record in self.records]
+        self.positions = np.array([record.position or "" for record in self.records], dtype=object)
+        self.teams = np.array([record.team or "" for record in self.records], dtype=object)
+
+        # Order players by Sleeper's search_rank (lower is more relevant), unranked last
+        ranks = np.array([record.search_rank if record.search_rank is not None else np.iinfo(np.int64).max for record in self.records], dtype=np.int64)
+        self.rank_order = np.empty(len(ranks), dtype=np.int64)
+        self.rank_order[np.argsort(ranks, kind="stable")] = np.arange(len(ranks))
+
+        self.full = _PrefixTable((name, row) for row, name in enumerate(self.full_names))
+        self.first = _PrefixTable((normalize(record.first_name), row) for row, record in enumerate(self.records))
+        self.last = _PrefixTable((normalize(record.last_name), row) for row, record in enumerate(self.records))
+        self.words = _PrefixTable((word, row) for row, name in enumerate(self.full_names) for word in name.split())
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for row, name in enumerate(self.full_names):
+            for trigram in _trigrams(name):
+                postings[trigram].append(row)
+        self.trigrams = {trigram: np.array(rows, dtype=np.int64) for trigram, rows in postings.items()}
+
+    def _substring_matches(self, query: str) -> np.ndarray:
+        if len(query) < 3:
+            return _EMPTY
+        # Rarest trigrams first, so the candidate set shrinks fastest
+        posting_lists = sorted((self.trigrams.get(trigram, _EMPTY) for trigram in _trigrams(query)), key=len)
+        candidates = posting_lists[0]
+        for posting in posting_lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        return np.array([row for row in candidates if query in self.full_names[row]], dtype=np.int64)
+
+    def search(
+        self,
+        query: str,
+        limit: int = DEFAULT_LIMIT,
+        position: Optional[str] = None,
+        team: Optional[str] = None,
+        player_ids: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, PlayerRecord]]:
+        """
+        Players matching `query`, best first: every query word prefixes a word of the name, or
+        the query appears anywhere in the name. Optionally only `position`, `team`, or `player_ids`.
+        """
+        query = normalize(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+
+        # 1. Candidates: word prefixes for every query word, plus substring matches
+        word_matches = None
+        for term in query.split():
+            rows = self.words.lookup(term)
+            word_matches = rows if word_matches is None else np.intersect1d(word_matches, rows, assume_unique=True)
+        candidates = np.union1d(word_matches, self._substring_matches(query))
+
+        # 2. Filters
+        if position:
+            candidates = candidates[self.positions[candidates] == position.upper()]
+        if team:
+            candidates = candidates[self.teams[candidates] == team.upper()]
+        if player_ids is not None:
+            allowed = np.array([self.row_of[player_id] for player_id in player_ids if player_id in self.row_of], dtype=np.int64)
+            candidates = candidates[np.isin(candidates, allowed)]
+        if not len(candidates):
+            return []
+
+        # 3. Rank: match tier, then search_rank
+        tiers = np.full(len(candidates), SUBSTRING)
+        for tier, rows in (
+            (WORD_PREFIX, word_matches),
+            (FIRST_PREFIX, self.first.lookup(query)),
+            (LAST_PREFIX, self.last.lookup(query)),
+            (FULL_PREFIX, self.full.lookup(query)),
+            (EXACT, self.full.exact(query)),
+        ):
+            tiers[np.isin(candidates, rows)] = tier
+        order = np.lexsort((self.rank_order[candidates], tiers))[:limit]
+        return [(self.player_ids[row], self.records[row]) for row in candidates[order]]
+
+
+_search_index: Optional[Tuple[PlayerIndex, PlayerSearchIndex]] = None
+_building: Optional[Tuple[PlayerIndex, asyncio.Task]] = None
+builds = 0
+
+
+async def get_search_index() -> PlayerSearchIndex:
+    """The search index for the current player index, rebuilt (off the event loop) when that is replaced."""
+    global _building
+    players = await player_index.get_player_index()
+    if _search_index is not None and _search_index[0] is players:
+        return _search_index[1]
+    if _building is None or _building[0] is not players or _building[1].get_loop() is not asyncio.get_running_loop():
+        _building = (players, asyncio.ensure_future(_build(players)))
+    return await asyncio.shield(_building[1])
+
+
+async def _build(players: PlayerIndex) -> PlayerSearchIndex:
+    global _search_index, builds
+    search_index = await asyncio.to_thread(PlayerSearchIndex, players)
+    _search_index = (players, search_index)
+    builds += 1
+    return search_index
+
+
+# league_id -> (transaction store generation, built at, player ids, {url: version} read, URLs served stale)
+_league_players: Dict[str, Tuple[int, float, FrozenSet[str], Dict[str, Optional[str]], Set[str]]] = {}
+_loading_league_players: Dict[str, asyncio.Task] = {}
+league_player_loads = 0
+
+
+async def get_league_player_ids(league_id: str, load: Callable[[str], Awaitable[Set[str]]]) -> FrozenSet[str]:
+    """
+    `load(league_id)`, reused until the transaction store changes or LEAGUE_PLAYERS_TTL_SECONDS
+    pass. Concurrent searches for a league share one load.
+    """
+    cached = _league_players.get(league_id)
+    if cached is None or cached[0] != transaction_store.generation() or time.time() - cached[1] >= LEAGUE_PLAYERS_TTL_SECONDS:
+        task = _loading_league_players.get(league_id)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(_load_league_player_ids(league_id, load))
+            _loading_league_players[league_id] = task
+        cached = await asyncio.shield(task)
+    _, _, player_ids, read, stale = cached
+    # The response depends on what the load read, whichever request ran it
+    for url, version in read.items():
+        client.record_dependency(url, version)
+    request_stale_urls = client.stale_urls.get()
+    if request_stale_urls is not None:
+        request_stale_urls.update(stale)
+    return player_ids
+
+
+async def _load_league_player_ids(league_id: str, load: Callable[[str], Awaitable[Set[str]]]):
+    global league_player_loads
+    # Runs as its own task, in a copy of the first caller's context: collect what it reads apart
+    read: Dict[str, Optional[str]] = {}
+    stale: Set[str] = set()
+    client.dependencies.set(read)
+    client.stale_urls.set(stale)
+    try:
+        player_ids = frozenset(await load(league_id))
+        entry = (transaction_store.generation(), time.time(), player_ids, read, stale)
+        league_player_loads += 1
+        # A set built around a failed or stale lookup is served once, not kept
+        if not stale and all(version is not None for version in read.values()):
+            _league_players[league_id] = entry
+        return entry
+    finally:
+        if _loading_league_players.get(league_id) is asyncio.current_task():
+            del _loading_league_players[league_id]
+
+
+def reset():
+    """Forget the built index and league player ids. For tests."""
+    global _search_index, _building
+    _search_index = None
+    _building = None
+    _league_players.clear()
+    _loading_league_players.clear()
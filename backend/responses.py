@@ -0,0 +1,52 @@
+"""
+JSON responses for heavy endpoints, serialised once instead of through response_model.
+
+Returning models or large dicts through response_model makes FastAPI dump them, validate
+the result against the model again, and encode it with the json module. These helpers
+encode already-trusted data directly (pydantic-core for models, orjson for plain data) and
+keep prebuilt bodies for data that only changes when its source object is replaced. The
+output matches FastAPI's compact encoding, so clients see the same bytes.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+MEDIA_TYPE = "application/json"
+
+
+def model_response(value: Any, adapter: Optional[TypeAdapter] = None) -> Response:
+    """Response for a validated model, or for a container of them described by `adapter`."""
+    body = adapter.dump_json(value) if adapter is not None else value.model_dump_json().encode()
+    return Response(content=body, media_type=MEDIA_TYPE)
+
+
+def encode(value: Any) -> bytes:
+    """Compact UTF-8 JSON for plain data (dicts, lists, str, numbers, None); int keys become strings."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+# key -> (source the body was built from, body)
+_bodies: Dict[str, Tuple[Any, bytes]] = {}
+builds = 0
+
+
+async def prebuilt_response(key: str, source: Any, render: Callable[[], Awaitable[bytes]]) -> Response:
+    """
+    The body `render` produced for `source` under `key`, rendered again only once a
+    different source object is passed. Renderers should encode off the event loop.
+    """
+    global builds
+    cached = _bodies.get(key)
+    if cached is None or cached[0] is not source:
+        body = await render()
+        _bodies[key] = (source, body)
+        builds += 1
+        cached = _bodies[key]
+    return Response(content=cached[1], media_type=MEDIA_TYPE)
+
+
+def reset():
+    """Forget every prebuilt body. For tests."""
+    _bodies.clear()
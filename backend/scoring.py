@@ -0,0 +1,121 @@
+"""
+Fantasy points under a league's own scoring settings.
+
+Sleeper's weekly stats carry pts_ppr/pts_half_ppr/pts_std, which ignore per-league settings
+such as TE premium or custom yardage and turnover values. A league's `scoring_settings` maps
+stat fields to points, so it becomes a weight vector over the stats store's columns and every
+player-week is scored at once as a matrix-vector product.
+"""
+import asyncio
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import player_index, stats_store
+from .models.sleeper import League
+
+# Settings that are not stat fields: points per `field` for players at `position` only
+POSITION_BONUSES = {
+    "bonus_rec_te": ("TE", "rec"),
+    "bonus_rec_rb": ("RB", "rec"),
+    "bonus_rec_wr": ("WR", "rec"),
+    "bonus_rec_qb": ("QB", "rec"),
+}
+
+# Used when a league has no usable scoring settings
+DEFAULT_POINTS_FIELD = "pts_ppr"
+
+
+class ScoringWeights:
+    """A league's scoring settings as stat fields, their weights, and position-specific bonuses."""
+
+    def __init__(self, scoring_settings: Optional[Mapping[str, Any]]):
+        weights: Dict[str, float] = {}
+        bonuses: Dict[str, Dict[str, float]] = {}
+        settings = {
+            key: float(value) for key, value in (scoring_settings or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value != 0
+        }
+        for key, value in settings.items():
+            if key in POSITION_BONUSES:
+                position, field = POSITION_BONUSES[key]
+                bonuses.setdefault(position, {})[field] = value
+            else:
+                weights[key] = value
+        self.fields: List[str] = list(weights)
+        self.vector = np.array(list(weights.values()), dtype=float)
+        self.position_bonuses = bonuses
+        # Identifies the scoring for cache validation
+        self.key = tuple(sorted(settings.items()))
+
+    def __bool__(self) -> bool:
+        return bool(self.fields or self.position_bonuses)
+
+
+class SeasonPoints:
+    """
+    Points for every player-week of a season under one league's scoring. `matrix` has the
+    stats store's rows and WEEKS columns, 0 where the player has no stats.
+    """
+
+    def __init__(self, stats: stats_store.SeasonStats, weights: ScoringWeights, positions: Sequence[Optional[str]]):
+        self.season = stats.season
+        self.rows = stats.rows
+        if not weights:
+            self.matrix = np.nan_to_num(stats.column(DEFAULT_POINTS_FIELD))
+        else:
+            # (fields, players, weeks) . (fields,) -> (players, weeks)
+            values = np.nan_to_num(stats.columns(weights.fields))
+            self.matrix = np.tensordot(weights.vector, values, axes=1) if weights.fields else np.zeros((len(self.rows), stats_store.WEEKS))
+            if weights.position_bonuses:
+                position_array = np.array([position or "" for position in positions])
+                for position, bonus in weights.position_bonuses.items():
+                    in_position = position_array == position
+                    if not in_position.any():
+                        continue
+                    bonus_fields = list(bonus)
+                    bonus_values = np.nan_to_num(stats.columns(bonus_fields)[:, in_position])
+                    self.matrix[in_position] += np.tensordot(np.array(list(bonus.values())), bonus_values, axes=1)
+        self.matrix.flags.writeable = False
+
+    def player_row(self, player_id: str) -> np.ndarray:
+        row = self.rows.get(player_id)
+        return self.matrix[row] if row is not None else np.zeros(stats_store.WEEKS)
+
+    def total(self, player_id: str, week_mask: Optional[np.ndarray] = None) -> float:
+        values = self.player_row(player_id)
+        if week_mask is not None:
+            values = values[week_mask]
+        return float(values.sum())
+
+
+# (league_id, season) -> (stats store, player index and scoring the points were computed from, points)
+_points: Dict[Tuple[str, str], Tuple[Tuple[Any, Any, Tuple], SeasonPoints]] = {}
+computations = 0
+
+
+def _compute(stats: stats_store.SeasonStats, weights: ScoringWeights, players: Mapping[str, Any]) -> SeasonPoints:
+    positions = [getattr(players.get(player_id), "position", None) for player_id in stats.rows] if weights.position_bonuses else []
+    return SeasonPoints(stats, weights, positions)
+
+
+async def get_season_points(league: League) -> SeasonPoints:
+    """Points for every player-week of the league's season under its scoring, cached per (league, season)."""
+    global computations
+    weights = ScoringWeights(league.scoring_settings)
+    stats, players = await asyncio.gather(stats_store.get_season_stats(league.season), player_index.get_player_index())
+    cache_key = (league.league_id, league.season)
+    cached = _points.get(cache_key)
+    if cached is not None:
+        (cached_stats, cached_players, cached_weights), points = cached
+        if cached_stats is stats and cached_players is players and cached_weights == weights.key:
+            return points
+    points = await asyncio.to_thread(_compute, stats, weights, players)
+    _points[cache_key] = ((stats, players, weights.key), points)
+    computations += 1
+    return points
+
+
+def reset():
+    """Forget every computed season. For tests."""
+    _points.clear()
@@ -1,17 +1,17 @@
 import asyncio
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set
 
+import numpy as np
 
-from .. import client
+from .. import client, league_calendar, lifecycle_index, nfl_calendar, player_index, scoring, stats_store, transaction_store, validation
+from ..player_index import PlayerIndex
 from ..models.sleeper import (
     League,
     Roster,
     Draft,
     Pick,
-    Player,
     Stats,
-    DraftPickMovement,
     Transaction,
     Matchup,
     PlayerStint,
@@ -44,71 +44,51 @@ from ..models.sleeper import (
 
 # These constants will eventually move to config.py
 API_URL = "https://api.sleeper.app/v1"
-CACHE_TTL_SECONDS = 604800  # 7 days
 
 
 async def get_all_player_weekly_stats_for_season(season: str) -> Dict[str, Dict[int, Stats]]:
-    tasks = [client.get_player_weekly_stats(season, week) for week in range(1, 19)]
+    weeks = await league_calendar.get_stats_weeks(season)
+    tasks = [client.get_player_weekly_stats(season, week) for week in weeks]
     weekly_stats_results = await asyncio.gather(*tasks, return_exceptions=True)
 
     all_stats: Dict[str, Dict[int, Stats]] = {}
-    for i, weekly_stats_data in enumerate(weekly_stats_results):
+    for week, weekly_stats_data in zip(weeks, weekly_stats_results):
         if isinstance(weekly_stats_data, dict):
-            for player_id, stats_data in weekly_stats_data.items():
-                if player_id not in all_stats:
-                    all_stats[player_id] = {}
-                # Ensure stats_data is a dictionary before passing to Stats
-                if isinstance(stats_data, dict):
-                    all_stats[player_id][i + 1] = Stats(player_id=player_id, week=i + 1, season=season, **stats_data)
+            # Players without a stats object still get an (empty) entry
+            for player_id in weekly_stats_data:
+                all_stats.setdefault(player_id, {})
+            for stats in validation.validate_weekly_stats(weekly_stats_data, season, week):
+                all_stats[stats.player_id][week] = stats
 
     return all_stats
 
 
 async def get_player_aggregated_stats(player_id: str, season: str) -> Dict[str, Any]:
-    all_season_total_stats_by_player = await get_all_player_weekly_stats_for_season(season)
+    aggregates = await stats_store.get_season_aggregates(season)
+    return aggregates.for_player(player_id)
 
-    total_points = 0.0
-    games_played = 0
-
-    player_total_stats = all_season_total_stats_by_player.get(player_id)
-
-    if player_total_stats:
-        for week, stats in player_total_stats.items():
-            # stats is already a Stats object
-            total_points += stats.pts_ppr if stats.pts_ppr is not None else 0
-            if stats.gp is not None and stats.gp > 0:
-                games_played += 1
-
-    avg_ppg = total_points / games_played if games_played > 0 else 0.0
 
+async def get_players_aggregated_stats(player_ids: List[str], seasons: List[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Aggregates for many players over many seasons: {season: {player_id: aggregates}}."""
+    seasons = list(dict.fromkeys(seasons))
+    all_aggregates = await asyncio.gather(*[stats_store.get_season_aggregates(season) for season in seasons])
     return {
-        "player_id": player_id,
-        "season": season,
-        "total_points": round(total_points, 2),
-        "avg_ppg": round(avg_ppg, 2),
+        season: {player_id: aggregates.for_player(player_id) for player_id in player_ids}
+        for season, aggregates in zip(seasons, all_aggregates)
     }
 
 
 async def get_single_season_transactions(league_id: str) -> List[Transaction]:
     """Get all transactions for a single season (league ID)."""
-    transaction_tasks = [client.get_league_transactions(league_id, week) for week in range(1, 19)]
+    weeks = await league_calendar.get_transaction_weeks(league_id)
+    transaction_tasks = [client.get_league_transactions(league_id, week) for week in weeks]
     weekly_transactions_results = await asyncio.gather(*transaction_tasks, return_exceptions=True)
 
     all_transactions: List[Transaction] = []
     for result in weekly_transactions_results:
         if isinstance(result, list):
-            for tx_data in result:
-                tx_data["league_id"] = league_id
-                
-                # Convert draft_picks to DraftPickMovement objects
-                if "draft_picks" in tx_data and tx_data["draft_picks"]:
-                    draft_pick_movements = []
-                    for pick_data in tx_data["draft_picks"]:
-                        if isinstance(pick_data, dict):
-                            draft_pick_movements.append(DraftPickMovement(**pick_data))
-                    tx_data["draft_picks"] = draft_pick_movements
-                
-                all_transactions.append(Transaction(**tx_data))
+            # One validation call per week, nested draft_picks included
+            all_transactions.extend(validation.validate_list(validation.TRANSACTIONS, result, league_id=league_id))
         # Optionally log other exceptions if needed
 
     return all_transactions
@@ -116,99 +96,44 @@ async def get_single_season_transactions(league_id: str) -> List[Transaction]:
 
 async def get_all_league_transactions(league_id: str) -> List[Transaction]:
     """Get all transactions across all seasons in the league's history."""
-    # Get the full league history
-    league_history_data = await client.get_league_history(league_id)
-    league_history = [League(**item) for item in league_history_data] if league_history_data else []
-    
-    if not league_history:
-        # Fallback to single season if no history available
-        return await get_single_season_transactions(league_id)
-    
-    # Fetch transactions from all seasons in parallel
-    transaction_tasks = [get_single_season_transactions(season_league.league_id) for season_league in league_history]
-    all_seasons_transactions = await asyncio.gather(*transaction_tasks, return_exceptions=True)
-    
-    # Flatten all transactions from all seasons
-    all_transactions = []
-    for season_transactions in all_seasons_transactions:
-        if isinstance(season_transactions, list):
-            all_transactions.extend(season_transactions)
-    
-    return all_transactions
+    return await transaction_store.league_transactions(league_id)
 
 
-async def _get_single_season_lifecycle(league_id: str, player_id: str) -> List[Dict[str, Any]]:
-    league_drafts_data = await client.get_league_drafts(league_id)
-    league_drafts = [Draft(**d) for d in league_drafts_data] if league_drafts_data else []
+async def get_league_player_ids(league_id: str) -> Set[str]:
+    """Every player rostered, drafted, or added/dropped in any season of the league's history."""
+    league_history_data = await client.get_league_history(league_id)
+    season_league_ids = [item["league_id"] for item in league_history_data or [] if item.get("league_id")] or [league_id]
 
-    transactions = await get_all_league_transactions(league_id)
-    lifecycle = []
+    rosters_results, drafts_results, player_ids = await asyncio.gather(
+        asyncio.gather(*[client.get_league_rosters(season_league_id) for season_league_id in season_league_ids], return_exceptions=True),
+        asyncio.gather(*[client.get_league_drafts(season_league_id) for season_league_id in season_league_ids], return_exceptions=True),
+        transaction_store.league_player_ids(league_id),
+    )
+    draft_ids = [draft["draft_id"] for drafts in drafts_results if isinstance(drafts, list) for draft in drafts if draft.get("draft_id")]
+    picks_results = await asyncio.gather(*[client.get_draft_picks(draft_id) for draft_id in draft_ids], return_exceptions=True)
 
-    for draft in league_drafts:
-        draft_id = draft.draft_id
-        if not draft_id:
-            continue
-        picks_data = await client.get_draft_picks(draft_id)
-        picks = [Pick(**p) for p in picks_data] if picks_data else []
-        for pick in picks:
-            if pick.player_id == player_id:
-                lifecycle.append({
-                    "type": f"{draft.type} draft",
-                    "timestamp": None,
-                    "details": {
-                        "roster_id": pick.roster_id,
-                        "round": pick.round,
-                        "pick": pick.pick_no,
-                        "draft_id": draft_id,
-                        "season": draft.season,
-                    },
-                })
-
-    for tx in transactions:
-        is_involved = False
-        if tx.adds and player_id in tx.adds:
-            is_involved = True
-        if tx.drops and player_id in tx.drops:
-            is_involved = True
-        if is_involved:
-            lifecycle.append({
-                "type": tx.type,
-                "timestamp": tx.status_updated,
-                "details": {
-                    "transaction_id": tx.transaction_id,
-                    "roster_ids": tx.roster_ids,
-                    "adds": tx.adds,
-                    "drops": tx.drops,
-                },
-            })
-    return lifecycle
+    for rosters in rosters_results:
+        if isinstance(rosters, list):
+            for roster in rosters:
+                player_ids.update(roster.get("players") or [])
+                player_ids.update(roster.get("reserve") or [])
+    for picks in picks_results:
+        if isinstance(picks, list):
+            player_ids.update(pick["player_id"] for pick in picks if pick.get("player_id"))
+    return player_ids
 
 
 async def get_player_lifecycle(league_id: str, player_id: str) -> List[Dict[str, Any]]:
-    history_data = await client.get_league_history(league_id)
-    history = [League(**item) for item in history_data] if history_data else []
-
-    tasks = [
-        _get_single_season_lifecycle(season.league_id, player_id)
-        for season in history
-        if season.league_id
-    ]
-    seasonal_lifecycles = await asyncio.gather(*tasks)
-
-    full_lifecycle = []
-    for season_events in seasonal_lifecycles:
-        full_lifecycle.extend(season_events)
-
-    full_lifecycle.sort(key=lambda x: x.get("timestamp") or 0)
-    return full_lifecycle
+    """Draft picks and transactions involving a player across the league's history, in order."""
+    index = await lifecycle_index.get_lifecycle_index(league_id)
+    return index.events(player_id)
 
 
 async def get_roster_analysis(league_id: str, roster_id: int) -> List[Dict[str, Any]]:
     rosters_data = await client.get_league_rosters(league_id)
-    rosters = [Roster(**r) for r in rosters_data] if rosters_data else []
+    rosters = validation.validate_list(validation.ROSTERS, rosters_data)
 
-    all_players_map_data = await client.get_all_players()
-    all_players_map = {p_id: Player(**p_data) for p_id, p_data in all_players_map_data.items()} if all_players_map_data else {}
+    all_players_map = await player_index.get_player_index()
 
     target_roster = next((r for r in rosters if r.roster_id == roster_id), None)
 
@@ -216,63 +141,68 @@ async def get_roster_analysis(league_id: str, roster_id: int) -> List[Dict[str,
         return []
 
     player_ids = target_roster.players
-    semaphore = asyncio.Semaphore(5)
+    # One index for the whole roster; each player's lifecycle is then a lookup
+    lifecycles = await lifecycle_index.get_lifecycle_index(league_id)
 
-    async def get_player_acquisition(player_id):
-        async with semaphore:
-            try:
-                lifecycle = await get_player_lifecycle(league_id, player_id)
-                player_info = all_players_map.get(player_id) # This is already a Player object or None
-                acquisition_event = lifecycle[-1] if lifecycle else None
-
-                timestamp = acquisition_event.get("timestamp") if acquisition_event else None
-                acquisition_method = acquisition_event.get("type") if acquisition_event else "unknown"
-                acquisition_details = acquisition_event.get("details") if acquisition_event else {}
-
-                acquisition_date = None
-                if timestamp:
-                    acquisition_date = datetime.fromtimestamp(timestamp / 1000).isoformat()
-                elif "draft" in acquisition_method:
-                    season = acquisition_details.get("season")
-                    if season:
-                        acquisition_date = f"{season}-06-01T00:00:00"
+    def get_player_acquisition(player_id):
+        try:
+            lifecycle = lifecycles.events(player_id)
+            player_info = all_players_map.get(player_id) # A PlayerRecord or None
+            acquisition_event = lifecycle[-1] if lifecycle else None
+
+            timestamp = acquisition_event.get("timestamp") if acquisition_event else None
+            acquisition_method = acquisition_event.get("type") if acquisition_event else "unknown"
+            acquisition_details = acquisition_event.get("details") if acquisition_event else {}
+
+            acquisition_date = None
+            if timestamp:
+                acquisition_date = datetime.fromtimestamp(timestamp / 1000).isoformat()
+            elif "draft" in acquisition_method:
+                season = acquisition_details.get("season")
+                if season:
+                    acquisition_date = f"{season}-06-01T00:00:00"
 
-                return {
-                    "player_id": player_id,
-                    "first_name": player_info.first_name if player_info else None,
-                    "last_name": player_info.last_name if player_info else None,
-                    "position": player_info.position if player_info else None,
-                    "acquisition_method": acquisition_method,
-                    "acquisition_date": acquisition_date,
-                    "acquisition_details": acquisition_details,
-                }
-            except Exception as e:
-                return {"player_id": player_id, "error": f"An error occurred: {repr(e)}"}
+            return {
+                "player_id": player_id,
+                "first_name": player_info.first_name if player_info else None,
+                "last_name": player_info.last_name if player_info else None,
+                "position": player_info.position if player_info else None,
+                "acquisition_method": acquisition_method,
+                "acquisition_date": acquisition_date,
+                "acquisition_details": acquisition_details,
+            }
+        except Exception as e:
+            return {"player_id": player_id, "error": f"An error occurred: {repr(e)}"}
 
-    analysis_tasks = [get_player_acquisition(pid) for pid in player_ids]
-    return await asyncio.gather(*analysis_tasks)
+    return [get_player_acquisition(pid) for pid in player_ids]
 
 
 async def get_all_league_matchups(league_id: str) -> List[Matchup]:
-    matchup_tasks = [client.get_league_matchups(league_id, week) for week in range(1, 19)]
+    weeks = await league_calendar.get_matchup_weeks(league_id)
+    matchup_tasks = [client.get_league_matchups(league_id, week) for week in weeks]
     weekly_matchups_results = await asyncio.gather(*matchup_tasks, return_exceptions=True)
 
     all_matchups: List[Matchup] = []
-    for i, result in enumerate(weekly_matchups_results):
+    for week, result in zip(weeks, weekly_matchups_results):
         if isinstance(result, list):
-            for matchup_data in result:
-                matchup_data["league_id"] = league_id
-                matchup_data["week"] = i + 1
-                all_matchups.append(Matchup(**matchup_data))
+            all_matchups.extend(validation.validate_list(validation.MATCHUPS, result, league_id=league_id, week=week))
     return all_matchups
 
 
-def get_week_start_date(season: int, week: int) -> datetime:
-    # This is a simplified approximation. NFL seasons typically start in early September.
-    # Week 1 is usually the first full week of games.
-    # For simplicity, we'll assume Sept 1st of the season year is a good approximation for week 1 start.
-    # A more accurate implementation would involve actual NFL schedule data.
-    return datetime(season, 9, 1) + timedelta(weeks=week - 1)
+def _add_window_totals(season_totals: Dict[str, Any], season_year: str, season_points: scoring.SeasonPoints, player_id: str, week_mask: np.ndarray):
+    """Record (total league-scored points, weeks) for the player's weeks in `week_mask`, if there are any."""
+    weeks = int(week_mask.sum())
+    if weeks:
+        season_totals[season_year] = (season_points.total(player_id, week_mask), weeks)
+
+
+def _leagues_by_season(league_history: List[League]) -> Dict[str, League]:
+    """The league for each season in the history (newest first, as Sleeper returns it)."""
+    leagues: Dict[str, League] = {}
+    for league in league_history:
+        if league.season:
+            leagues.setdefault(league.season, league)
+    return leagues
 
 
 async def get_player_performance_since_transaction(league_id: str, player_id: str, transaction_id: str) -> Dict[str, Any]:
@@ -283,55 +213,41 @@ async def get_player_performance_since_transaction(league_id: str, player_id: st
     if not league_history:
         return {"error": f"Could not find league history for league {league_id}"}
 
-    # 2. Fetch all transactions from all seasons in the league's history
-    all_transactions = await get_all_league_transactions(league_id)
-
-    # 3. Find the target transaction and its timestamp
-    target_transaction = next((tx for tx in all_transactions if tx.transaction_id == transaction_id), None)
+    # 2. Find the target transaction and its timestamp
+    target_transaction = await transaction_store.get_transaction(league_id, transaction_id)
     if not target_transaction:
         return {"error": f"Transaction {transaction_id} not found in the history of league {league_id}"}
     transaction_timestamp_ms = target_transaction.status_updated
     transaction_date = datetime.fromtimestamp(transaction_timestamp_ms / 1000) if transaction_timestamp_ms else datetime.min # Handle None
+    league_seasons = {league.league_id: league.season for league in league_history}
+    transaction_week = nfl_calendar.event_ordinal(transaction_timestamp_ms, league_seasons.get(target_transaction.league_id), target_transaction.leg) or 0
 
     # 4. Get player data across all seasons
-    seasons = [league.season for league in league_history if league.season]
-    stats_tasks = [get_all_player_weekly_stats_for_season(season) for season in seasons]
+    leagues_by_season = _leagues_by_season(league_history)
+    seasons = list(leagues_by_season)
+    stats_tasks = [stats_store.get_season_stats(season) for season in seasons]
+    points_tasks = [scoring.get_season_points(leagues_by_season[season]) for season in seasons]
     matchup_tasks = [get_all_league_matchups(season_league.league_id) for season_league in league_history]
 
     all_seasons_stats_results = await asyncio.gather(*stats_tasks)
+    all_seasons_points = await asyncio.gather(*points_tasks)
     await asyncio.gather(*matchup_tasks) # Removed assignment to all_seasons_matchup_results
 
-    # 5. Flatten the data for easier processing
-    player_weekly_stats: Dict[str, Stats] = {}
-    for i, season_year in enumerate(seasons):
-        season_stats = all_seasons_stats_results[i]
-        if player_id in season_stats:
-            for week, stats in season_stats[player_id].items():
-                player_weekly_stats[f"{season_year}-{week}"] = stats
-
-    # 6. Analyze the player's performance week by week
+    # 5-6. Split the player's weeks by period and activity, one vectorized mask per season
     analysis = {
         "before_trade": {"active": {}, "inactive": {}},
         "after_trade": {"active": {}, "inactive": {}},
     }
-
-    for week_str, stats in player_weekly_stats.items():
-        if not stats: # Filter out empty stats
+    for season_year, season_stats, season_points in zip(seasons, all_seasons_stats_results, all_seasons_points):
+        if player_id not in season_stats:
             continue
-
-        season_year = stats.season
-        week = stats.week
-        week_timestamp = get_week_start_date(int(season_year), int(week))
-
-        period = "before_trade" if week_timestamp < transaction_date else "after_trade"
-
-        player_status = "inactive"
-        if stats.gp is not None and stats.gp > 0: # If games played > 0, player was active
-            player_status = "active"
-
-        if season_year not in analysis[period][player_status]:
-            analysis[period][player_status][season_year] = []
-        analysis[period][player_status][season_year].append(stats.model_dump()) # Convert Pydantic model back to dict for analysis
+        # The transaction's own week counts as after it
+        before = nfl_calendar.season_ordinals(int(season_year)) < transaction_week
+        present = season_stats.player_present(player_id)
+        active = season_stats.active_weeks(player_id)
+        for period, in_period in (("before_trade", before), ("after_trade", ~before)):
+            for player_status, status_mask in (("active", active), ("inactive", ~active)):
+                _add_window_totals(analysis[period][player_status], season_year, season_points, player_id, present & in_period & status_mask)
 
     # 7. Summarize the results
     summary = {}
@@ -341,9 +257,7 @@ async def get_player_performance_since_transaction(league_id: str, player_id: st
             total_points_overall = 0
             games_played_overall = 0
 
-            for season_year, weekly_scores in season_data.items():
-                total_points_season = sum(s.get("pts_ppr", 0) or 0 for s in weekly_scores if s)
-                games_played_season = len(weekly_scores)
+            for season_year, (total_points_season, games_played_season) in season_data.items():
                 avg_ppg_season = total_points_season / games_played_season if games_played_season > 0 else 0
 
                 summary[period]["breakdown_by_season"][f"{status}_{season_year}"] = {
@@ -376,61 +290,51 @@ async def get_player_performance_between_transactions(league_id: str, player_id:
     if not league_history:
         return {"error": f"Could not find league history for league {league_id}"}
 
-    # 2. Fetch all transactions from all seasons in the league's history
-    all_transactions = await get_all_league_transactions(league_id)
-
-    # 3. Find the target transactions and their timestamps
-    target_transaction_x = next((tx for tx in all_transactions if tx.transaction_id == transaction_id_x), None)
+    # 2. Find the target transactions and their timestamps
+    target_transaction_x = await transaction_store.get_transaction(league_id, transaction_id_x)
     if not target_transaction_x:
         return {"error": f"Transaction {transaction_id_x} not found in the history of league {league_id}"}
     transaction_date_x = datetime.fromtimestamp(target_transaction_x.status_updated / 1000) if target_transaction_x.status_updated else datetime.min
 
-    target_transaction_y = next((tx for tx in all_transactions if tx.transaction_id == transaction_id_y), None)
+    target_transaction_y = await transaction_store.get_transaction(league_id, transaction_id_y)
     if not target_transaction_y:
         return {"error": f"Transaction {transaction_id_y} not found in the history of league {league_id}"}
     transaction_date_y = datetime.fromtimestamp(target_transaction_y.status_updated / 1000) if target_transaction_y.status_updated else datetime.min
 
+    league_seasons = {league.league_id: league.season for league in league_history}
+    transaction_week_x = nfl_calendar.event_ordinal(target_transaction_x.status_updated, league_seasons.get(target_transaction_x.league_id), target_transaction_x.leg) or 0
+    transaction_week_y = nfl_calendar.event_ordinal(target_transaction_y.status_updated, league_seasons.get(target_transaction_y.league_id), target_transaction_y.leg) or 0
+
     # Ensure transaction_date_x is before transaction_date_y
     if transaction_date_x > transaction_date_y:
         transaction_date_x, transaction_date_y = transaction_date_y, transaction_date_x
+        transaction_week_x, transaction_week_y = transaction_week_y, transaction_week_x
 
     # 4. Get player data across all seasons
-    seasons = [league.season for league in league_history if league.season]
-    stats_tasks = [get_all_player_weekly_stats_for_season(season) for season in seasons]
+    leagues_by_season = _leagues_by_season(league_history)
+    seasons = list(leagues_by_season)
+    stats_tasks = [stats_store.get_season_stats(season) for season in seasons]
+    points_tasks = [scoring.get_season_points(leagues_by_season[season]) for season in seasons]
     matchup_tasks = [get_all_league_matchups(season_league.league_id) for season_league in league_history]
 
     all_seasons_stats_results = await asyncio.gather(*stats_tasks)
+    all_seasons_points = await asyncio.gather(*points_tasks)
     await asyncio.gather(*matchup_tasks) # Removed assignment to all_seasons_matchup_results
 
-    # 5. Flatten the data for easier processing
-    player_weekly_stats: Dict[str, Stats] = {}
-    for i, season_year in enumerate(seasons):
-        season_stats = all_seasons_stats_results[i]
-        if player_id in season_stats:
-            for week, stats in season_stats[player_id].items():
-                player_weekly_stats[f"{season_year}-{week}"] = stats
-
-    # 6. Analyze the player's performance week by week
+    # 5-6. Select the player's weeks between the two transactions, one vectorized mask per season
     analysis = {
         "between_transactions": {"active": {}, "inactive": {}},
     }
-
-    for week_str, stats in player_weekly_stats.items():
-        if not stats: # Filter out empty stats
+    for season_year, season_stats, season_points in zip(seasons, all_seasons_stats_results, all_seasons_points):
+        if player_id not in season_stats:
             continue
-
-        season_year = stats.season
-        week = stats.week
-        week_timestamp = get_week_start_date(int(season_year), int(week))
-
-        if transaction_date_x <= week_timestamp <= transaction_date_y:
-            player_status = "inactive"
-            if stats.gp is not None and stats.gp > 0: # If games played > 0, player was active
-                player_status = "active"
-
-            if season_year not in analysis["between_transactions"][player_status]:
-                analysis["between_transactions"][player_status][season_year] = []
-            analysis["between_transactions"][player_status][season_year].append(stats.model_dump()) # Convert Pydantic model back to dict for analysis
+        # From transaction x's week up to, not including, transaction y's week
+        week_ordinals = nfl_calendar.season_ordinals(int(season_year))
+        between = (transaction_week_x <= week_ordinals) & (week_ordinals < transaction_week_y)
+        present = season_stats.player_present(player_id)
+        active = season_stats.active_weeks(player_id)
+        for player_status, status_mask in (("active", active), ("inactive", ~active)):
+            _add_window_totals(analysis["between_transactions"][player_status], season_year, season_points, player_id, present & between & status_mask)
 
     # 7. Summarize the results
     summary = {}
@@ -440,9 +344,7 @@ async def get_player_performance_between_transactions(league_id: str, player_id:
             total_points_overall = 0
             games_played_overall = 0
 
-            for season_year, weekly_scores in season_data.items():
-                total_points_season = sum(s.get("pts_ppr", 0) or 0 for s in weekly_scores if s)
-                games_played_season = len(weekly_scores)
+            for season_year, (total_points_season, games_played_season) in season_data.items():
                 avg_ppg_season = total_points_season / games_played_season if games_played_season > 0 else 0
 
                 summary[period]["breakdown_by_season"][f"{status}_{season_year}"] = {
@@ -479,17 +381,23 @@ async def get_player_stints_with_performance(league_id: str, player_id: str) ->
     league_history = [League(**item) for item in league_history_data] if league_history_data else []
     
     # Get unique seasons from league history
-    seasons = list(set(league.season for league in league_history if league.season))
+    leagues_by_season = _leagues_by_season(league_history)
+    seasons = list(leagues_by_season)
     
-    # Batch fetch all season stats in parallel
-    stats_tasks = [get_all_player_weekly_stats_for_season(season) for season in seasons]
+    # Batch fetch all season stats, and points under each season's scoring, in parallel
+    stats_tasks = [stats_store.get_season_stats(season) for season in seasons]
     all_seasons_stats_results = await asyncio.gather(*stats_tasks, return_exceptions=True)
+    points_tasks = [scoring.get_season_points(leagues_by_season[season]) for season in seasons]
+    all_seasons_points_results = await asyncio.gather(*points_tasks, return_exceptions=True)
     
-    # Create comprehensive stats lookup: {season: {player_id: {week: Stats}}}
+    # Create comprehensive stats lookup: {season: SeasonStats} and {season: SeasonPoints}
     all_stats_by_season = {}
+    all_points_by_season = {}
     for i, season in enumerate(seasons):
-        if i < len(all_seasons_stats_results) and isinstance(all_seasons_stats_results[i], dict):
+        if i < len(all_seasons_stats_results) and isinstance(all_seasons_stats_results[i], stats_store.SeasonStats):
             all_stats_by_season[season] = all_seasons_stats_results[i]
+        if i < len(all_seasons_points_results) and isinstance(all_seasons_points_results[i], scoring.SeasonPoints):
+            all_points_by_season[season] = all_seasons_points_results[i]
 
     # 2b. Pre-fetch matchup data for all seasons to determine starter/bench status
     matchup_tasks = [get_all_league_matchups(season_league.league_id) for season_league in league_history]
@@ -514,7 +422,9 @@ async def get_player_stints_with_performance(league_id: str, player_id: str) ->
     # 3. Process events to determine stints
     stints = []
     current_stint_start_date = None
+    current_stint_start_week = None
     current_roster_id = None
+    league_seasons = {league.league_id: league.season for league in league_history}
 
     # 4. Pre-fetch all roster and user data to avoid redundant API calls
     # Get all unique roster IDs from lifecycle events
@@ -571,6 +481,8 @@ async def get_player_stints_with_performance(league_id: str, player_id: str) ->
     for i, event in enumerate(lifecycle_events):
         event_type = event["type"]
         event_timestamp = event["timestamp"]
+        event_season = event["details"].get("season") or league_seasons.get(event["details"].get("league_id"))
+        event_week = nfl_calendar.event_ordinal(event_timestamp, event_season, event["details"].get("leg")) or 0
         
         # Extract roster_id based on event type
         if "draft" in event_type:
@@ -586,6 +498,7 @@ async def get_player_stints_with_performance(league_id: str, player_id: str) ->
             # A new stint begins or an existing one changes
             if current_roster_id is None: # First event for this player
                 current_stint_start_date = datetime.fromtimestamp(event_timestamp / 1000) if event_timestamp else datetime.min
+                current_stint_start_week = event_week
                 current_roster_id = event_roster_id
             elif event_roster_id != current_roster_id: # Player moved teams
                 # End previous stint
@@ -597,10 +510,12 @@ async def get_player_stints_with_performance(league_id: str, player_id: str) ->
                         team_name=roster_info["team_name"],
                         owner_username=roster_info["owner_username"],
                         owner_display_name=roster_info["owner_display_name"],
-                        aggregated_stats={"roster_id": current_roster_id}  # Store roster_id for matchup lookup
+                        # Store roster_id for matchup lookup and the stint's weeks for stats
+                        aggregated_stats={"roster_id": current_roster_id, "start_week": current_stint_start_week, "end_week": event_week}
                     ))
                 # Start new stint
                 current_stint_start_date = datetime.fromtimestamp(event_timestamp / 1000) if event_timestamp else datetime.min
+                current_stint_start_week = event_week
                 current_roster_id = event_roster_id
 
     # Handle the last stint (player still on team)
@@ -612,42 +527,46 @@ async def get_player_stints_with_performance(league_id: str, player_id: str) ->
             team_name=roster_info["team_name"],
             owner_username=roster_info["owner_username"],
             owner_display_name=roster_info["owner_display_name"],
-            aggregated_stats={"roster_id": current_roster_id}  # Store roster_id for matchup lookup
+            # Store roster_id for matchup lookup and the stint's weeks for stats
+            aggregated_stats={"roster_id": current_roster_id, "start_week": current_stint_start_week, "end_week": None}
         ))
 
     # 5. Enhanced performance aggregation with starter/bench breakdown
     for stint in stints:
         roster_id = stint.aggregated_stats["roster_id"]  # Get stored roster_id
-        start_year = stint.start_date.year
-        end_year = stint.end_date.year if stint.end_date else datetime.now().year
+        start_week = stint.aggregated_stats["start_week"]
+        end_week = stint.aggregated_stats["end_week"]
 
         # Initialize detailed stats tracking
         starting_stats = {"total_points": 0.0, "games": 0}
         bench_stats = {"total_points": 0.0, "games": 0}
         overall_stats = {"total_points": 0.0, "games_rostered": 0, "games_active": 0, "games_started": 0}
 
-        for year in range(start_year, end_year + 1):
-            season_str = str(year)
-            season_stats = all_stats_by_season.get(season_str)
+        for season_str, season_stats in all_stats_by_season.items():
             season_matchups = all_matchups_by_season.get(season_str)
+            season_points = all_points_by_season.get(season_str)
             
-            if not season_stats:
+            if not season_points or player_id not in season_stats:
                 continue
-                
-            player_season_stats = season_stats.get(player_id)
-            if not player_season_stats:
+
+            # Only process weeks within this stint's timeframe: from its first week up to the week it ended
+            week_ordinals = nfl_calendar.season_ordinals(int(season_str))
+            in_stint = week_ordinals >= start_week
+            if end_week is not None:
+                in_stint &= week_ordinals < end_week
+            if not in_stint.any():
                 continue
 
+            points_by_week = season_points.player_row(player_id)
+            active_by_week = season_stats.active_weeks(player_id)
+
             # Process each week's performance with starter/bench classification
-            for week, stats in player_season_stats.items():
-                week_start_date = get_week_start_date(year, week)
-                
-                # Only process weeks within this stint's timeframe
-                if not (stint.start_date <= week_start_date and (stint.end_date is None or week_start_date < stint.end_date)):
+            for week in season_stats.player_weeks(player_id):
+                if not in_stint[week - 1]:
                     continue
                 
-                points = stats.pts_ppr if stats.pts_ppr is not None else 0
-                is_active = stats.gp is not None and stats.gp > 0
+                points = float(points_by_week[week - 1])
+                is_active = bool(active_by_week[week - 1])
                 
                 # Determine starter/bench status from matchup data
                 is_starting = False
@@ -789,7 +708,7 @@ def _parse_draft_pick_identifier(asset_id: str) -> Dict[str, Any]:
     return pick_info
 
 
-async def analyze_trade_assets(transaction: Transaction, all_players_map: Dict[str, Player], league_id: str = None) -> List[TradeAsset]:
+async def analyze_trade_assets(transaction: Transaction, all_players_map: PlayerIndex, league_id: str = None) -> List[TradeAsset]:
     """Analyze a trade transaction to identify all assets (players and picks) involved."""
     assets = []
     
@@ -902,12 +821,11 @@ async def get_draft_pick_ownership_history(league_id: str, season: str) -> List[
     # Get all draft picks for the season
     draft_picks = await get_league_draft_picks(league_id, season)
     
-    # Get all transactions for the league across all years
-    all_transactions = await get_all_league_transactions(league_id)
+    # Get all trades for the league across all years
+    all_transactions = await transaction_store.league_transactions(league_id, type="trade")
     
     # Get player data for name lookups
-    all_players_data = await client.get_all_players()
-    all_players_map = {p_id: Player(**p_data) for p_id, p_data in all_players_data.items()} if all_players_data else {}
+    all_players_map = await player_index.get_player_index()
     
     ownership_histories = []
     
@@ -1008,10 +926,8 @@ async def get_draft_pick_journey(league_id: str, season: str, pick_no: int) -> D
             league_history = [League(**item) for item in league_history_data] if league_history_data else []
             seasons = list(set(league.season for league in league_history if league.season))
             
-            career_stats = {}
-            for season_year in seasons:
-                season_stats = await get_player_aggregated_stats(target_pick.player_id, season_year)
-                career_stats[season_year] = season_stats
+            stats_by_season = await get_players_aggregated_stats([target_pick.player_id], seasons)
+            career_stats = {season_year: stats_by_season[season_year][target_pick.player_id] for season_year in seasons}
             
             player_performance = {
                 "stints": player_stints,
@@ -1068,18 +984,14 @@ async def find_connected_trades(league_id: str, time_window_hours: int = 24) ->
     Find connected trade relationships within a league.
     Trades are considered connected if they involve the same assets within a time window.
     """
-    # Get all transactions
-    all_transactions = await get_all_league_transactions(league_id)
-    
-    # Filter only trade transactions
-    trade_transactions = [tx for tx in all_transactions if tx.type == "trade"]
+    # Get all trade transactions
+    trade_transactions = list(await transaction_store.league_transactions(league_id, type="trade"))
     
     # Sort by timestamp
     trade_transactions.sort(key=lambda x: x.status_updated or 0)
     
     # Get player data for asset analysis
-    all_players_data = await client.get_all_players()
-    all_players_map = {p_id: Player(**p_data) for p_id, p_data in all_players_data.items()} if all_players_data else {}
+    all_players_map = await player_index.get_player_index()
     
     # Build trade nodes with asset information
     trade_nodes = []
@@ -1251,13 +1163,14 @@ async def get_historical_data_coverage(league_id: str) -> Dict[str, Any]:
     
     coverage_info = []
     total_transactions = 0
+
+    # Every season's transaction count comes from the store in one indexed query
+    transaction_counts = await transaction_store.transaction_counts(league_id)
     
     # Check each season
     for season_league in league_history:
         try:
-            # Get transactions for this season
-            season_transactions = await get_single_season_transactions(season_league.league_id)
-            transaction_count = len(season_transactions)
+            transaction_count = transaction_counts.get(season_league.league_id, 0)
             total_transactions += transaction_count
             
             # Get draft information if available
@@ -1431,7 +1344,7 @@ async def create_pick_identities(league_id: str) -> List[PickIdentity]:
         
         # Get rosters to determine original pick assignments
         rosters_data = await client.get_league_rosters(season_league.league_id)
-        rosters = [Roster(**r) for r in rosters_data] if rosters_data else []
+        rosters = validation.validate_list(validation.ROSTERS, rosters_data)
         
         # Generate pick identities for each roster/round combination
         for roster in rosters:
@@ -1487,15 +1400,13 @@ async def find_trade_groups(league_id: str, time_window_days: int = 7) -> List[T
     This helps identify multi-part deals like the Travis Kelce trade scenario.
     """
     # Get all trade transactions
-    all_transactions = await get_all_league_transactions(league_id)
-    trade_transactions = [tx for tx in all_transactions if tx.type == "trade"]
+    trade_transactions = list(await transaction_store.league_transactions(league_id, type="trade"))
     
     # Sort by timestamp
     trade_transactions.sort(key=lambda x: x.status_updated or 0)
     
     # Get player data for asset analysis
-    all_players_data = await client.get_all_players()
-    all_players_map = {p_id: Player(**p_data) for p_id, p_data in all_players_data.items()} if all_players_data else {}
+    all_players_map = await player_index.get_player_index()
     
     trade_groups = []
     processed_transactions = set()
@@ -1902,13 +1813,11 @@ async def build_complete_trade_graph(league_id: str) -> TradeGraph:
     This creates the complete network needed for accurate asset genealogy tracking.
     """
     # Get all trade transactions chronologically
-    all_transactions = await get_all_league_transactions(league_id)
-    trade_transactions = [tx for tx in all_transactions if tx.type == "trade"]
+    trade_transactions = list(await transaction_store.league_transactions(league_id, type="trade"))
     trade_transactions.sort(key=lambda x: x.status_updated or 0)
     
     # Get player data for asset names
-    all_players_data = await client.get_all_players()
-    all_players_map = {p_id: Player(**p_data) for p_id, p_data in all_players_data.items()} if all_players_data else {}
+    all_players_map = await player_index.get_player_index()
     
     # Get league history for roster context
     league_history_data = await client.get_league_history(league_id)
@@ -0,0 +1,252 @@
+"""
+Columnar store of weekly NFL stats: one players x weeks matrix per stat field and season.
+
+Sleeper serves stats as one {player_id: {field: value}} payload per week. Analyses read a few
+fields for a few players across many weeks, so instead of a Stats model per player-week the
+store keeps a player-id -> row index plus lazily built NumPy columns, and aggregations are
+masked reductions over them.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import client, league_calendar, player_index
+from .nfl_calendar import WEEKS
+
+# Columns every analysis reads; built with the store, off the event loop. Others build on first use.
+PREBUILT_FIELDS = ("pts_ppr", "gp")
+
+
+class SeasonStats:
+    """
+    Stats for one season. Column `field` is a float matrix of shape (players, WEEKS) with NaN
+    where the player has no value; week w is column w - 1. Treat arrays as read-only.
+    Columns may be built from worker threads (scoring runs off the event loop), so building
+    them is serialised.
+    """
+
+    def __init__(self, season: str, weekly_payloads: Sequence[Any]):
+        self.season = season
+        self._payloads = [payload if isinstance(payload, dict) else {} for payload in weekly_payloads]
+        self._columns: Dict[str, np.ndarray] = {}
+        self._columns_lock = threading.Lock()
+
+        # Rows in order of first appearance (week 1 first), matching the per-player dicts
+        # get_all_player_weekly_stats_for_season builds, so outputs keep their key order
+        self.rows: Dict[str, int] = {}
+        present_rows: List[List[int]] = []
+        for payload in self._payloads:
+            week_rows = []
+            for player_id, stats_data in payload.items():
+                if isinstance(stats_data, dict):
+                    week_rows.append(self.rows.setdefault(player_id, len(self.rows)))
+            present_rows.append(week_rows)
+
+        # present[row, week - 1]: Sleeper returned a stats object for that player-week
+        self.present = np.zeros((len(self.rows), WEEKS), dtype=bool)
+        for week_index, week_rows in enumerate(present_rows):
+            self.present[week_rows, week_index] = True
+
+    @property
+    def player_ids(self) -> List[str]:
+        return list(self.rows)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.rows
+
+    def column(self, field: str) -> np.ndarray:
+        """The (players, WEEKS) matrix for a stat field, built on first use."""
+        matrix = self._columns.get(field)
+        if matrix is None:
+            with self._columns_lock:
+                self._build_missing([field])
+            matrix = self._columns[field]
+        return matrix
+
+    def columns(self, fields: Sequence[str]) -> np.ndarray:
+        """Stacked matrices for several fields, shape (len(fields), players, WEEKS). Missing columns are built in one pass."""
+        with self._columns_lock:
+            self._build_missing(fields)
+        if not fields:
+            return np.zeros((0, len(self.rows), WEEKS))
+        return np.stack([self._columns[field] for field in fields])
+
+    def _build_missing(self, fields: Sequence[str]):
+        # Callers hold _columns_lock
+        missing = [field for field in dict.fromkeys(fields) if field not in self._columns]
+        if missing:
+            built = {field: np.full((len(self.rows), WEEKS), np.nan) for field in missing}
+            for week_index, payload in enumerate(self._payloads):
+                for player_id, stats_data in payload.items():
+                    if not isinstance(stats_data, dict):
+                        continue
+                    row = self.rows[player_id]
+                    for field in missing:
+                        value = stats_data.get(field)
+                        if isinstance(value, (int, float)) and not isinstance(value, bool):
+                            built[field][row, week_index] = value
+            for field, matrix in built.items():
+                matrix.flags.writeable = False
+                self._columns.setdefault(field, matrix)
+
+    def player_row(self, player_id: str, field: str) -> Optional[np.ndarray]:
+        """One player's WEEKS values for `field`, or None if the player has no stats this season."""
+        row = self.rows.get(player_id)
+        return None if row is None else self.column(field)[row]
+
+    def player_present(self, player_id: str) -> np.ndarray:
+        row = self.rows.get(player_id)
+        return self.present[row] if row is not None else np.zeros(WEEKS, dtype=bool)
+
+    def player_weeks(self, player_id: str) -> List[int]:
+        """Weeks (1-based) Sleeper has a stats object for the player."""
+        return [int(week) + 1 for week in np.flatnonzero(self.player_present(player_id))]
+
+    def total(self, player_id: str, field: str = "pts_ppr", week_mask: Optional[np.ndarray] = None) -> float:
+        """Sum of `field` over the player's weeks (optionally only those in `week_mask`); missing values count as 0."""
+        values = self.player_row(player_id, field)
+        if values is None:
+            return 0.0
+        if week_mask is not None:
+            values = values[week_mask]
+        return float(np.nansum(values))
+
+    def active_weeks(self, player_id: str) -> np.ndarray:
+        """Boolean WEEKS mask of weeks the player played (gp > 0)."""
+        games = self.player_row(player_id, "gp")
+        if games is None:
+            return np.zeros(WEEKS, dtype=bool)
+        return np.nan_to_num(games) > 0
+
+
+class SeasonAggregates:
+    """Season totals, PPG and positional rank for every player in a SeasonStats, computed in one pass."""
+
+    def __init__(self, stats: SeasonStats, players: Mapping[str, Any]):
+        self.season = stats.season
+        self.rows = stats.rows
+        self.total_points = np.nansum(stats.column("pts_ppr"), axis=1)
+        self.games_played = (np.nan_to_num(stats.column("gp")) > 0).sum(axis=1)
+        self.avg_ppg = np.divide(
+            self.total_points, self.games_played,
+            out=np.zeros_like(self.total_points), where=self.games_played > 0,
+        )
+        self.positions = [getattr(players.get(player_id), "position", None) for player_id in stats.rows]
+        self.position_rank = _rank_within_groups(self.positions, self.total_points)
+
+    def for_player(self, player_id: str) -> Dict[str, Any]:
+        """Aggregates for one player; zeros if they have no stats this season."""
+        row = self.rows.get(player_id)
+        if row is None:
+            return {
+                "player_id": player_id, "season": self.season, "total_points": 0.0, "avg_ppg": 0.0,
+                "games_played": 0, "position": None, "position_rank": None,
+            }
+        rank = int(self.position_rank[row])
+        return {
+            "player_id": player_id,
+            "season": self.season,
+            "total_points": round(float(self.total_points[row]), 2),
+            "avg_ppg": round(float(self.avg_ppg[row]), 2),
+            "games_played": int(self.games_played[row]),
+            "position": self.positions[row],
+            "position_rank": rank if rank > 0 else None,
+        }
+
+
+def _rank_within_groups(groups: Sequence[Optional[str]], values: np.ndarray) -> np.ndarray:
+    """1-based rank of each value (highest first) among rows in the same group; 0 where the group is None."""
+    ranks = np.zeros(len(groups), dtype=np.int64)
+    ranked = np.array([group is not None for group in groups], dtype=bool)
+    if not ranked.any():
+        return ranks
+    rows = np.flatnonzero(ranked)
+    _, codes = np.unique(np.array([groups[row] for row in rows]), return_inverse=True)
+    # Sort by group, then by value descending; stable, so ties keep row order
+    order = np.lexsort((-values[rows], codes))
+    sorted_codes = codes[order]
+    group_starts = np.searchsorted(sorted_codes, sorted_codes, side="left")
+    ranks[rows[order]] = np.arange(len(order)) - group_starts + 1
+    return ranks
+
+
+# season -> (weekly payloads the store was built from, store)
+_seasons: Dict[str, Tuple[Tuple[Any, ...], SeasonStats]] = {}
+_building: Dict[str, asyncio.Task] = {}
+builds = 0
+
+
+async def get_season_stats(season: str) -> SeasonStats:
+    """
+    Return the store for a season, built once and reused until any weekly payload is
+    refreshed in the client cache. Failed weeks count as empty, as they always have.
+    """
+    # Weeks that cannot have stats yet are not requested and count as empty
+    weeks = await league_calendar.get_stats_weeks(season)
+    results = await asyncio.gather(
+        *[client.get_player_weekly_stats(season, week) for week in weeks],
+        return_exceptions=True,
+    )
+    fetched = dict(zip(weeks, results))
+    payloads = tuple(
+        fetched[week] if isinstance(fetched.get(week), dict) else None for week in range(1, WEEKS + 1)
+    )
+
+    cached = _seasons.get(season)
+    if cached is not None and _same_payloads(cached[0], payloads):
+        return cached[1]
+
+    task = _building.get(season)
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_build(season, payloads))
+        _building[season] = task
+    return await asyncio.shield(task)
+
+
+def _same_payloads(a: Tuple[Any, ...], b: Tuple[Any, ...]) -> bool:
+    # The client cache hands out the same objects until a week is refreshed; empty weeks
+    # (future weeks, failed fetches) are interchangeable
+    return len(a) == len(b) and all(x is y or (not x and not y) for x, y in zip(a, b))
+
+
+def _build_store(season: str, payloads: Tuple[Any, ...]) -> SeasonStats:
+    store = SeasonStats(season, payloads)
+    for field in PREBUILT_FIELDS:
+        store.column(field)
+    return store
+
+
+async def _build(season: str, payloads: Tuple[Any, ...]) -> SeasonStats:
+    global builds
+    try:
+        store = await asyncio.to_thread(_build_store, season, payloads)
+        _seasons[season] = (payloads, store)
+        builds += 1
+        return store
+    finally:
+        if _building.get(season) is asyncio.current_task():
+            del _building[season]
+
+
+# season -> (store and player index the aggregates were computed from, aggregates)
+_aggregates: Dict[str, Tuple[Tuple[SeasonStats, Any], SeasonAggregates]] = {}
+
+
+async def get_season_aggregates(season: str) -> SeasonAggregates:
+    """Aggregates for every player in a season, recomputed only when its stats or the player index change."""
+    stats, players = await asyncio.gather(get_season_stats(season), player_index.get_player_index())
+    cached = _aggregates.get(season)
+    if cached is not None and cached[0][0] is stats and cached[0][1] is players:
+        return cached[1]
+    aggregates = SeasonAggregates(stats, players)
+    _aggregates[season] = ((stats, players), aggregates)
+    return aggregates
+
+
+def reset():
+    """Forget every built season. For tests."""
+    _seasons.clear()
+    _building.clear()
+    _aggregates.clear()
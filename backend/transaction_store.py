@@ -0,0 +1,422 @@
+"""
+Normalised, indexed store of league transactions in SQLite, synced week by week.
+
+Each week's transactions payload is flattened once into rows: one per transaction, one per
+player added or dropped, and one per draft pick moved. Analyses look transactions up by id,
+player, roster, type or time with indexed queries instead of rebuilding every season's
+Transaction models and scanning them.
+
+Syncing keeps a high-water mark per league and week (transaction_weeks): the content hash of
+the payload its rows came from, and whether the week is final. Weeks of completed seasons,
+and weeks of the active season before the previous one, are final once stored from a fresh
+(not stale) payload and never fetched again; the current and previous week are re-polled,
+and their rows replaced only when the payload changed.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from . import cache_policy, client, database, league_calendar, validation
+from .models.sleeper import Transaction
+from .nfl_calendar import WEEKS
+
+# Query results kept as models, most recently used last; dropped whenever rows change
+MAX_MEMOISED_QUERIES = 256
+
+# Syncs whose changed transaction ids are kept for readers catching up (see changes_since)
+MAX_TRACKED_CHANGES = 256
+
+_DELETE_WEEK_SQL = [
+    "DELETE FROM transaction_assets WHERE league_id = ? AND week = ?",
+    "DELETE FROM transaction_picks WHERE league_id = ? AND week = ?",
+    "DELETE FROM league_transactions WHERE league_id = ? AND week = ?",
+]
+_INSERT_TRANSACTION_SQL = """
+    INSERT OR REPLACE INTO league_transactions
+        (transaction_id, league_id, week, position, type, status, status_updated, leg, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_ASSET_SQL = """
+    INSERT INTO transaction_assets (transaction_id, league_id, week, player_id, roster_id, action)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_INSERT_PICK_SQL = """
+    INSERT INTO transaction_picks
+        (transaction_id, league_id, week, season, round, roster_id, previous_owner_id, owner_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_UPSERT_MARK_SQL = """
+    INSERT OR REPLACE INTO transaction_weeks (league_id, week, version, final, synced_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+class WeekMark(NamedTuple):
+    version: Optional[str]  # Content hash of the payload the week's rows were built from
+    final: bool
+
+
+# league_id -> {week: mark}, loaded from transaction_weeks
+_marks: Dict[str, Dict[int, WeekMark]] = {}
+_syncing: Dict[str, asyncio.Task] = {}
+# (query, args) -> (generation, models)
+_queries: "OrderedDict[Tuple, Tuple[int, Any]]" = OrderedDict()
+_generation = 0
+# (generation, transaction ids written, ids removed) per sync that changed rows, oldest first
+_changes: Deque[Tuple[int, Set[str], Set[str]]] = deque(maxlen=MAX_TRACKED_CHANGES)
+weeks_synced = 0
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _week_rows(league_id: str, week: int, transactions: Sequence[Transaction]) -> Tuple[List, List, List]:
+    """Rows for league_transactions, transaction_assets and transaction_picks."""
+    transaction_rows, asset_rows, pick_rows = [], [], []
+    for position, tx in enumerate(transactions):
+        transaction_rows.append((
+            tx.transaction_id, league_id, week, position, tx.type, tx.status,
+            tx.status_updated, tx.leg, tx.model_dump_json(),
+        ))
+        for action, moves in (("add", tx.adds), ("drop", tx.drops)):
+            for player_id, roster_id in (moves or {}).items():
+                asset_rows.append((tx.transaction_id, league_id, week, player_id, _as_int(roster_id), action))
+        for pick in tx.draft_picks or []:
+            pick_rows.append((
+                tx.transaction_id, league_id, week, pick.season, pick.round,
+                pick.roster_id, pick.previous_owner_id, pick.owner_id,
+            ))
+    return transaction_rows, asset_rows, pick_rows
+
+
+def _transactions_url(league_id: str, week: int) -> str:
+    return f"{client.API_URL}/league/{league_id}/transactions/{week}"
+
+
+async def _league_history(league_id: str) -> List[Dict[str, Any]]:
+    """League objects of every season in the league's history, newest first as Sleeper lists them."""
+    league_history_data = await client.get_league_history(league_id)
+    return [item for item in league_history_data or [] if item.get("league_id")] or [{"league_id": league_id}]
+
+
+async def _stored_marks(league_ids: Sequence[str]) -> Dict[str, Dict[int, WeekMark]]:
+    missing = [league_id for league_id in league_ids if league_id not in _marks]
+    if missing:
+        db = await database.get_db()
+        rows = await db.execute_fetchall(
+            f"SELECT league_id, week, version, final FROM transaction_weeks WHERE league_id IN ({_placeholders(missing)})",
+            missing,
+        )
+        loaded: Dict[str, Dict[int, WeekMark]] = {league_id: {} for league_id in missing}
+        for league_id, week, version, final in rows:
+            loaded[league_id][week] = WeekMark(version, bool(final))
+        _marks.update(loaded)
+    return {league_id: _marks[league_id] for league_id in league_ids}
+
+
+def _weeks_to_poll(league: Dict[str, Any], nfl_state: Optional[Dict[str, Any]], marks: Dict[int, WeekMark]) -> List[Tuple[int, bool]]:
+    """(week, final once stored) for each week of a season that needs fetching."""
+    # Weeks after the league's last, or after the current one, have no transactions
+    weeks = league_calendar.transaction_weeks(league, nfl_state)
+    # Weeks already stored are not fetched either way, so only unstored weeks left out save a call
+    league_calendar.count_skipped(
+        league_calendar.transactions_url_pattern(league["league_id"]), [*weeks, *marks],
+    )
+    if cache_policy.is_complete_league(league, nfl_state):
+        settled_through = WEEKS
+    elif nfl_state is None:
+        settled_through = 0  # Without the NFL state nothing can be called settled
+    else:
+        settled_through = cache_policy.current_leg(league, nfl_state) - 2
+    return [(week, week <= settled_through) for week in weeks if week not in marks or not marks[week].final]
+
+
+async def _previous_rows(weeks: Sequence[Tuple[str, int]]) -> Dict[str, str]:
+    """transaction_id -> stored JSON for the given (league_id, week)s."""
+    db = await database.get_db()
+    previous = {}
+    for league_id, week in weeks:
+        rows = await db.execute_fetchall(
+            "SELECT transaction_id, data FROM league_transactions WHERE league_id = ? AND week = ?", (league_id, week),
+        )
+        previous.update((transaction_id, data) for transaction_id, data in rows)
+    return previous
+
+
+async def _sync_seasons(leagues: Sequence[Dict[str, Any]], refresh: bool) -> Tuple[Dict[str, Any], Dict[str, Optional[str]], Set[str]]:
+    """
+    The sync delta, the {url: version} dependencies read and the URLs served stale; each
+    caller records the last two for itself.
+    """
+    global _generation, weeks_synced
+    # Runs as a shared task, in a copy of the first caller's context: collect what it reads apart
+    read: Dict[str, Optional[str]] = {}
+    stale: Set[str] = set()
+    client.dependencies.set(read)
+    client.stale_urls.set(stale)
+    league_ids = [league["league_id"] for league in leagues]
+    nfl_state = await league_calendar.get_nfl_state()
+    marks = await _stored_marks(league_ids)
+
+    # 1. Weeks to fetch: not stored yet, or stored but not final. A refresh skips the client cache for
+    # weeks that can still change.
+    plan = [
+        (league["league_id"], week, final)
+        for league in leagues
+        for week, final in _weeks_to_poll(league, nfl_state, marks[league["league_id"]])
+    ]
+    if refresh:
+        await asyncio.gather(*[
+            client.purge_cache(_transactions_url(league_id, week)) for league_id, week, final in plan if not final
+        ])
+    results = await asyncio.gather(
+        *[client.get_league_transactions(league_id, week) for league_id, week, _ in plan],
+        return_exceptions=True,
+    )
+
+    # 2. Rebuild weeks whose payload changed; weeks that only became final just get a new mark.
+    # Failed fetches keep their rows and are retried next time.
+    rewritten, remarked = [], []
+    for (league_id, week, final), payload in zip(plan, results):
+        if payload is None:
+            payload = []  # Remembered miss: the week has no transactions
+        if not isinstance(payload, list):
+            continue
+        url = _transactions_url(league_id, week)
+        # The version of the payload in hand (None if stale), not whatever has been cached since
+        version = read.get(url)
+        # A stale copy served during an outage may be missing late changes: poll the week again
+        final = final and url not in stale
+        mark = marks[league_id].get(week)
+        if mark is not None and version is not None and mark.version == version:
+            if final:
+                remarked.append((league_id, week, version, final))
+            continue
+        transactions = validation.validate_list(validation.TRANSACTIONS, payload, league_id=league_id)
+        rewritten.append((league_id, week, version, final, _week_rows(league_id, week, transactions)))
+
+    previous = await _previous_rows([(league_id, week) for league_id, week, _, _, _ in rewritten if week in marks[league_id]])
+    current = {row[0]: row[-1] for _, _, _, _, rows in rewritten for row in rows[0]}
+    delta = {
+        "league_ids": league_ids,
+        "weeks_polled": len(plan),
+        "weeks_rewritten": len(rewritten),
+        "added": [transaction_id for transaction_id in current if transaction_id not in previous],
+        "updated": [transaction_id for transaction_id, data in current.items() if transaction_id in previous and previous[transaction_id] != data],
+        "removed": [transaction_id for transaction_id in previous if transaction_id not in current],
+    }
+    if not rewritten and not remarked:
+        return delta, read, stale
+
+    # 3. Write every changed week and its mark in one transaction, so readers never see a week
+    # half-replaced and a mark is never committed without its rows
+    synced_at = time.time()
+    weeks = [(league_id, week) for league_id, week, *_ in rewritten]
+    statements = [(sql, weeks) for sql in _DELETE_WEEK_SQL]
+    for table, sql in enumerate((_INSERT_TRANSACTION_SQL, _INSERT_ASSET_SQL, _INSERT_PICK_SQL)):
+        statements.append((sql, [row for *_, rows in rewritten for row in rows[table]]))
+    statements.append((_UPSERT_MARK_SQL, [
+        (league_id, week, version, int(final), synced_at) for league_id, week, version, final, *_ in rewritten + remarked
+    ]))
+    await database.write_transaction(statements)
+
+    for league_id, week, version, final, *_ in rewritten + remarked:
+        marks[league_id][week] = WeekMark(version, final)
+    if rewritten:
+        _generation += 1
+        _changes.append((_generation, {*delta["added"], *delta["updated"]}, set(delta["removed"])))
+        weeks_synced += len(rewritten)
+    return delta, read, stale
+
+
+async def sync_league(league_id: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Bring the stored rows for every season of a league up to date and report what changed:
+    weeks polled and rewritten, and the ids of transactions added, updated and removed.
+    `refresh` re-fetches the weeks that can still change from Sleeper rather than the cache.
+    Concurrent syncs of a league share one run.
+    """
+    leagues = await _league_history(league_id)
+    key = ",".join(league["league_id"] for league in leagues)
+    task = _syncing.get(key)
+    running = task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+    if refresh and running:
+        await asyncio.shield(task)  # Then start a fresh run that skips the cache
+    if refresh or not running:
+        task = asyncio.ensure_future(_sync_seasons(leagues, refresh))
+        _syncing[key] = task
+    delta, read, stale = await asyncio.shield(task)
+    # Every caller's response depends on the weeks polled, not just the one that started the run
+    for url, version in read.items():
+        client.record_dependency(url, version)
+    request_stale_urls = client.stale_urls.get()
+    if request_stale_urls is not None:
+        request_stale_urls.update(stale)
+    return delta
+
+
+async def _synced_league_ids(league_id: str) -> List[str]:
+    return (await sync_league(league_id))["league_ids"]
+
+
+def generation() -> int:
+    """Counter bumped whenever stored rows change."""
+    return _generation
+
+
+def changes_since(since: int) -> Optional[Tuple[Set[str], Set[str]]]:
+    """
+    Ids of transactions written (added or updated) and removed by syncs after generation
+    `since`, or None when they are no longer all known and readers should start over.
+    """
+    entries = [entry for entry in _changes if entry[0] > since]
+    if len(entries) != _generation - since:
+        return None
+    written: Set[str] = set()
+    removed: Set[str] = set()
+    for _, entry_written, entry_removed in entries:
+        written |= entry_written
+        removed |= entry_removed
+    return written, removed
+
+
+def _memoised(key: Tuple) -> Any:
+    cached = _queries.get(key)
+    if cached is not None and cached[0] == _generation:
+        _queries.move_to_end(key)
+        return cached[1]
+    return None
+
+
+def _remember(key: Tuple, value: Any) -> Any:
+    _queries[key] = (_generation, value)
+    _queries.move_to_end(key)
+    if len(_queries) > MAX_MEMOISED_QUERIES:
+        _queries.popitem(last=False)
+    return value
+
+
+def _placeholders(values: Sequence[Any]) -> str:
+    return ",".join("?" * len(values))
+
+
+async def _select_transactions(where: str, params: Sequence[Any], league_ids: Sequence[str]) -> List[Transaction]:
+    # Seasons in history order, then weeks, then payload order: the order the weekly payloads list them
+    db = await database.get_db()
+    rows = await db.execute_fetchall(
+        f"SELECT league_id, data FROM league_transactions WHERE {where} ORDER BY league_id, week, position",
+        params,
+    )
+    by_league: Dict[str, List[bytes]] = {}
+    for league_id, data in rows:
+        by_league.setdefault(league_id, []).append(data if isinstance(data, bytes) else data.encode())
+    ordered = [data for league_id in league_ids for data in by_league.get(league_id, [])]
+    if not ordered:
+        return []
+    return validation.TRANSACTIONS.validate_json(b"[" + b",".join(ordered) + b"]")
+
+
+async def league_transactions(league_id: str, type: Optional[str] = None) -> List[Transaction]:
+    """Every transaction across the league's history, optionally of one type. Treat as read-only."""
+    league_ids = await _synced_league_ids(league_id)
+    key = ("league", tuple(league_ids), type)
+    cached = _memoised(key)
+    if cached is not None:
+        return cached
+    where = f"league_id IN ({_placeholders(league_ids)})"
+    params: List[Any] = list(league_ids)
+    if type is not None:
+        where += " AND type = ?"
+        params.append(type)
+    return _remember(key, await _select_transactions(where, params, league_ids))
+
+
+async def get_transaction(league_id: str, transaction_id: str) -> Optional[Transaction]:
+    """One transaction from any season of the league, or None."""
+    league_ids = await _synced_league_ids(league_id)
+    db = await database.get_db()
+    rows = await db.execute_fetchall(
+        f"SELECT data FROM league_transactions WHERE transaction_id = ? AND league_id IN ({_placeholders(league_ids)})",
+        [transaction_id, *league_ids],
+    )
+    return Transaction.model_validate_json(rows[0][0]) if rows else None
+
+
+async def transactions_by_id(league_id: str, transaction_ids: Iterable[str]) -> List[Transaction]:
+    """The league's transactions among `transaction_ids`, in history order."""
+    transaction_ids = list(transaction_ids)
+    if not transaction_ids:
+        return []
+    league_ids = await _synced_league_ids(league_id)
+    where = f"league_id IN ({_placeholders(league_ids)}) AND transaction_id IN ({_placeholders(transaction_ids)})"
+    return await _select_transactions(where, [*league_ids, *transaction_ids], league_ids)
+
+
+async def player_transactions(league_id: str, player_id: str) -> List[Transaction]:
+    """Transactions across the league's history that added or dropped a player. Treat as read-only."""
+    league_ids = await _synced_league_ids(league_id)
+    key = ("player", tuple(league_ids), player_id)
+    cached = _memoised(key)
+    if cached is not None:
+        return cached
+    where = (
+        f"league_id IN ({_placeholders(league_ids)}) AND transaction_id IN "
+        "(SELECT transaction_id FROM transaction_assets WHERE player_id = ?)"
+    )
+    return _remember(key, await _select_transactions(where, [*league_ids, player_id], league_ids))
+
+
+async def transaction_counts(league_id: str) -> Dict[str, int]:
+    """league_id -> number of stored transactions, for each season of the league's history that has any."""
+    league_ids = await _synced_league_ids(league_id)
+    db = await database.get_db()
+    rows = await db.execute_fetchall(
+        f"SELECT league_id, COUNT(*) FROM league_transactions WHERE league_id IN ({_placeholders(league_ids)}) GROUP BY league_id",
+        league_ids,
+    )
+    return {row[0]: row[1] for row in rows}
+
+
+async def league_player_ids(league_id: str) -> Set[str]:
+    """Every player added or dropped in any season of the league."""
+    league_ids = await _synced_league_ids(league_id)
+    db = await database.get_db()
+    rows = await db.execute_fetchall(
+        f"SELECT DISTINCT player_id FROM transaction_assets WHERE league_id IN ({_placeholders(league_ids)})",
+        league_ids,
+    )
+    return {row[0] for row in rows}
+
+
+async def purge_league(league_id: str) -> int:
+    """
+    Drop one season's stored rows and week marks, so the next sync fetches every week again.
+    Returns the transactions removed.
+    """
+    global _generation
+    db = await database.get_db()
+    count = (await db.execute_fetchall(
+        "SELECT COUNT(*) FROM league_transactions WHERE league_id = ?", (league_id,),
+    ))[0][0]
+    statements = [(sql.replace(" AND week = ?", ""), [(league_id,)]) for sql in _DELETE_WEEK_SQL]
+    statements.append(("DELETE FROM transaction_weeks WHERE league_id = ?", [(league_id,)]))
+    await database.write_transaction(statements)
+    _marks.pop(league_id, None)
+    # Memoised queries are dropped; without a change entry, changes_since() tells readers to start over
+    _generation += 1
+    return count
+
+
+def reset():
+    """Forget synced versions and memoised queries, e.g. after pointing at another database. For tests."""
+    global _generation
+    _marks.clear()
+    _syncing.clear()
+    _queries.clear()
+    _changes.clear()
+    _generation += 1
@@ -0,0 +1,72 @@
+"""
+Bulk validation of Sleeper list payloads into models.
+
+Each payload list is validated by one TypeAdapter call instead of a Model(**item) per item,
+and the result is memoised on the payload object: the client cache hands out the same
+object until the entry is refreshed, so repeat requests reuse the models as they are.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from .models.sleeper import Matchup, Roster, Stats, Transaction
+
+TRANSACTIONS = TypeAdapter(List[Transaction])
+MATCHUPS = TypeAdapter(List[Matchup])
+ROSTERS = TypeAdapter(List[Roster])
+STATS = TypeAdapter(List[Stats])
+SEASON_STATS = TypeAdapter(Dict[str, Dict[int, Stats]])
+
+# Validated payloads kept, most recently used last. Entries pin their payload, so keep this
+# well under the number of payloads the client's memory cache holds
+MAX_MEMOISED_PAYLOADS = 1024
+
+# (adapter, id(payload), extra fields) -> (payload, models); the payload is held so its id stays unique
+_validated: "OrderedDict[Tuple[int, int, Tuple], Tuple[Any, List[Any]]]" = OrderedDict()
+validations = 0
+
+
+def _memoised(key: Tuple, payload: Any, validate: Callable[[], List[Any]]) -> List[Any]:
+    global validations
+    cached = _validated.get(key)
+    if cached is not None and cached[0] is payload:
+        _validated.move_to_end(key)
+        return cached[1]
+    models = validate()
+    validations += 1
+    _validated[key] = (payload, models)
+    if len(_validated) > MAX_MEMOISED_PAYLOADS:
+        _validated.popitem(last=False)
+    return models
+
+
+def validate_list(adapter: TypeAdapter, payload: Optional[List[Dict[str, Any]]], **fields) -> List[Any]:
+    """
+    Models for every item of a list payload, with `fields` (e.g. league_id) added to each item.
+    Payloads are shared with the client cache and never mutated. Treat the result as read-only.
+    """
+    if not payload:
+        return []
+    key = (id(adapter), id(payload), tuple(sorted(fields.items())))
+    return _memoised(
+        key, payload,
+        lambda: adapter.validate_python([{**item, **fields} for item in payload] if fields else payload),
+    )
+
+
+def validate_weekly_stats(payload: Optional[Dict[str, Any]], season: str, week: int) -> List[Stats]:
+    """Stats models for one week's {player_id: stats} payload, skipping players without a stats object."""
+    if not isinstance(payload, dict):
+        return []
+    key = (id(STATS), id(payload), (("season", season), ("week", week)))
+    return _memoised(key, payload, lambda: STATS.validate_python([
+        {**stats_data, "player_id": player_id, "week": week, "season": season}
+        for player_id, stats_data in payload.items()
+        if isinstance(stats_data, dict)
+    ]))
+
+
+def reset():
+    """Forget every memoised payload. For tests."""
+    _validated.clear()
@@ -0,0 +1,90 @@
+"""
+Size and decode-time comparison of api_cache payload formats.
+
+    python -m benchmarks.cache_payloads                 # synthetic players/stats payloads
+    python -m benchmarks.cache_payloads sleeper_cache.db  # every row of an existing cache
+"""
+import json
+import random
+import sqlite3
+import sys
+import time
+
+from backend import codec
+
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DEF"]
+STAT_KEYS = ["pts_ppr", "pts_half_ppr", "pts_std", "rec", "rec_yd", "rush_yd", "pass_yd", "rec_td", "gp", "off_snp"]
+
+
+def synthetic_payloads():
+    rng = random.Random(0)
+    players = {
+        str(i): {
+            "player_id": str(i),
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "full_name": f"First{i} Last{i}",
+            "position": rng.choice(POSITIONS),
+            "team": rng.choice(["KC", "BUF", "SF", "DAL", None]),
+            "age": rng.randint(21, 38),
+            "fantasy_positions": [rng.choice(POSITIONS)],
+            "search_rank": rng.randint(1, 9999999),
+            "status": "Active",
+        }
+        for i in range(10000)
+    }
+    stats = {str(i): {key: round(rng.uniform(0, 30), 2) for key in STAT_KEYS} for i in range(3000)}
+    yield "players/nfl", json.dumps(players).encode()
+    yield "stats (one week)", json.dumps(stats).encode()
+
+
+def db_payloads(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("""
+        SELECT c.url, COALESCE(b.data, c.data), COALESCE(b.format, c.format)
+        FROM api_cache c LEFT JOIN api_blobs b ON b.hash = c.blob_hash
+    """)
+    for url, data, fmt in rows:
+        value, _ = codec.decode(data, fmt)
+        yield url, json.dumps(value).encode()
+    conn.close()
+
+
+def timed(fn, arg, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    payloads = db_payloads(sys.argv[1]) if len(sys.argv) > 1 else synthetic_payloads()
+    totals = {"text_bytes": 0, "stored_bytes": 0, "text_decode": 0.0, "stored_decode": 0.0}
+    for name, raw_json in payloads:
+        stored = codec.encode(raw_json)
+        text_decode = timed(json.loads, raw_json)
+        stored_decode = timed(lambda data: codec.decode(data, codec.CURRENT_FORMAT), stored)
+        totals["text_bytes"] += len(raw_json)
+        totals["stored_bytes"] += len(stored)
+        totals["text_decode"] += text_decode
+        totals["stored_decode"] += stored_decode
+        print(
+            f"{name[-40:]:<40} {len(raw_json) / 1024:>10.1f} KB -> {len(stored) / 1024:>9.1f} KB   "
+            f"decode {text_decode * 1000:>8.2f} ms -> {stored_decode * 1000:>8.2f} ms"
+        )
+
+    if totals["text_bytes"]:
+        print(
+            f"\ntotal size  {totals['text_bytes'] / 1024 / 1024:.1f} MB -> {totals['stored_bytes'] / 1024 / 1024:.1f} MB "
+            f"({totals['stored_bytes'] / totals['text_bytes']:.1%})"
+        )
+        print(
+            f"total decode {totals['text_decode'] * 1000:.1f} ms -> {totals['stored_decode'] * 1000:.1f} ms "
+            f"({totals['stored_decode'] / totals['text_decode']:.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Time to turn Sleeper list payloads into models: one Model(**item) per item versus one
+TypeAdapter call per payload (from parsed JSON, and straight from the raw bytes).
+
+    python -m benchmarks.model_validation
+"""
+import json
+import random
+import time
+
+from backend import validation
+from backend.models.sleeper import Matchup, Roster, Transaction
+
+
+def synthetic_payloads():
+    rng = random.Random(0)
+    player_ids = [str(i) for i in range(1, 5000)]
+    transactions = [
+        {
+            "transaction_id": str(100000 + i),
+            "type": rng.choice(["trade", "waiver", "free_agent"]),
+            "status": "complete",
+            "status_updated": 1694000000000 + i * 60000,
+            "leg": rng.randint(1, 18),
+            "adds": {rng.choice(player_ids): rng.randint(1, 12)},
+            "drops": {rng.choice(player_ids): rng.randint(1, 12)},
+            "roster_ids": [rng.randint(1, 12), rng.randint(1, 12)],
+            "draft_picks": [
+                {"season": "2025", "round": rng.randint(1, 4), "roster_id": rng.randint(1, 12), "previous_owner_id": rng.randint(1, 12), "owner_id": rng.randint(1, 12)}
+                for _ in range(rng.randint(0, 2))
+            ],
+            "metadata": None,
+        }
+        for i in range(200)
+    ]
+    matchups = [
+        {
+            "matchup_id": i // 2 + 1, "roster_id": i + 1, "points": round(rng.uniform(60, 180), 2),
+            "players": rng.sample(player_ids, 25), "starters": rng.sample(player_ids, 10),
+        }
+        for i in range(12)
+    ]
+    rosters = [
+        {
+            "roster_id": i + 1, "league_id": "L1", "owner_id": str(1000 + i), "players": rng.sample(player_ids, 25),
+            "starters": rng.sample(player_ids, 10), "reserve": [], "settings": {"wins": rng.randint(0, 14)}, "metadata": {},
+        }
+        for i in range(12)
+    ]
+    # One season of a league: 18 weeks of transactions and matchups, rosters once
+    yield "transactions (x18)", Transaction, validation.TRANSACTIONS, transactions, {"league_id": "L1"}, 18
+    yield "matchups (x18)", Matchup, validation.MATCHUPS, matchups, {"league_id": "L1", "week": 1}, 18
+    yield "rosters", Roster, validation.ROSTERS, rosters, {}, 1
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    for name, model, adapter, payload, fields, copies in synthetic_payloads():
+        raw = json.dumps([{**item, **fields} for item in payload]).encode()
+        # The client cache hands out parsed payloads; from-bytes parsing is shown for reference
+        per_item = timed(lambda: [[model(**{**item, **fields}) for item in payload] for _ in range(copies)])
+        bulk = timed(lambda: [adapter.validate_python([{**item, **fields} for item in payload]) for _ in range(copies)])
+        from_bytes = timed(lambda: [adapter.validate_json(raw) for _ in range(copies)])
+        validation.reset()
+        validation.validate_list(adapter, payload, **fields)
+        memoised = timed(lambda: [validation.validate_list(adapter, payload, **fields) for _ in range(copies)])
+        print(
+            f"{name:<20} Model(**item) {per_item * 1000:>7.2f} ms   TypeAdapter {bulk * 1000:>7.2f} ms ({bulk / per_item:.0%})   "
+            f"from bytes {from_bytes * 1000:>7.2f} ms   memoised {memoised * 1000:>7.3f} ms"
+        )
+
+        # Returning models through response_model: dump to dicts, validate again, encode
+        models = adapter.validate_python([{**item, **fields} for item in payload])
+        revalidated = timed(lambda: json.dumps(adapter.dump_python(adapter.validate_python(adapter.dump_python(models)), mode="json")).encode())
+        dumped = timed(lambda: adapter.dump_json(models))
+        print(f"{'':<20} response: dump + revalidate {revalidated * 1000:>7.2f} ms   dump_json {dumped * 1000:>7.2f} ms ({dumped / revalidated:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -80,24 +80,19 @@ class ApiClient {
     return response.data || {}
   }
 
-  async searchPlayers(query: string): Promise<Player[]> {
-    // For now, we'll get all players and filter client-side
-    // In the future, we could add a server-side search endpoint
-    const allPlayers = await this.getAllPlayers()
-    const players = Object.values(allPlayers)
-    
+  async searchPlayers(
+    query: string,
+    options: { limit?: number; position?: string; team?: string; leagueId?: string } = {}
+  ): Promise<Player[]> {
     if (!query || query.length < 2) {
       return []
     }
-    
-    const searchTerm = query.toLowerCase()
-    return players
-      .filter(player => 
-        player.full_name?.toLowerCase().includes(searchTerm) ||
-        player.first_name?.toLowerCase().includes(searchTerm) ||
-        player.last_name?.toLowerCase().includes(searchTerm)
-      )
-      .slice(0, 10) // Limit to 10 results
+
+    const { limit = 10, position, team, leagueId } = options
+    const response = await this.client.get('/players/search', {
+      params: { q: query, limit, position, team, league_id: leagueId },
+    })
+    return response.data || []
   }
 
   // Asset chain endpoints
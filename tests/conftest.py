@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import client, database, lifecycle_index, transaction_store
+from backend.rate_limiter import TokenBucket
+
+
+class FakeUpstream(dict):
+    """
+    Payloads by API path (e.g. "/league/L1") served in place of Sleeper. Paths in `failing`
+    answer 503; transaction weeks not listed are empty; any other path is a 404.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.failing = set()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path[len("/v1"):]
+        if path in self.failing:
+            return httpx.Response(503)
+        if path in self:
+            return httpx.Response(200, json=self[path])
+        if "/transactions/" in path:
+            return httpx.Response(200, json=[])
+        return httpx.Response(404, json=None)
+
+    def run(self, coro_fn):
+        async def wrapper():
+            try:
+                return await coro_fn()
+            finally:
+                await _close_connections()
+        return asyncio.run(wrapper())
+
+
+async def _close_connections():
+    await database.close_db()
+    await client.close_http_client()
+
+
+def _reset_stores():
+    # A connection left open by an earlier test would keep using that test's database file
+    asyncio.run(_close_connections())
+    client.memory_cache.clear()
+    transaction_store.reset()
+    lifecycle_index.reset()
+
+
+@pytest.fixture
+def upstream(request, tmp_path, monkeypatch):
+    """A FakeUpstream serving the test module's RESPONSES (mutable per test), on a fresh database."""
+    responses = FakeUpstream(getattr(request.module, "RESPONSES", {}))
+    _reset_stores()
+    monkeypatch.setattr(database, "DATABASE_URL", str(tmp_path / "sleeper_cache.db"))
+    monkeypatch.setattr(client, "_create_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(responses.handler)))
+    monkeypatch.setattr(client, "rate_limiter", TokenBucket(1000.0, 1000))  # Leave the shared bucket full for other tests
+    yield responses
+    _reset_stores()
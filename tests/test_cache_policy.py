@@ -0,0 +1,37 @@
+from backend import cache_policy
+from backend.client import API_URL
+
+NFL_STATE = {"season": "2024", "league_season": "2024", "week": 10, "leg": 10, "season_type": "regular"}
+ACTIVE_LEAGUE = {"league_id": "2", "season": "2024", "status": "in_season"}
+COMPLETE_LEAGUE = {"league_id": "1", "season": "2023", "status": "complete"}
+
+
+def ttl(url, **context):
+    resource, params = cache_policy.classify(url)
+    return cache_policy.ttl_for(resource, params, nfl_state=NFL_STATE, **context)
+
+
+def test_classifies_urls():
+    assert cache_policy.classify(f"{API_URL}/league/2/transactions/3") == ("transactions", {"league_id": "2", "week": "3"})
+    assert cache_policy.classify(f"{API_URL}/user/abc/leagues/nfl/2023") == ("user_leagues", {"user_id": "abc", "season": "2023"})
+    assert cache_policy.classify(f"{API_URL}/players/nfl")[0] == "players"
+    assert cache_policy.classify("https://example.com/unknown")[0] == "other"
+
+
+def test_completed_seasons_never_expire():
+    assert ttl(f"{API_URL}/league/1/transactions/3", league=COMPLETE_LEAGUE) is None
+    assert ttl(f"{API_URL}/league/1/matchups/17", league=COMPLETE_LEAGUE) is None
+    assert ttl(f"{API_URL}/league/1/traded_picks", league=COMPLETE_LEAGUE) is None
+    assert ttl(f"{API_URL}/stats/nfl/regular/2023/5") is None
+    assert ttl(f"{API_URL}/draft/9/picks", draft={"status": "complete"}) is None
+
+
+def test_active_season_weeks():
+    assert ttl(f"{API_URL}/league/2/transactions/10", league=ACTIVE_LEAGUE) == cache_policy.LIVE_TTL_SECONDS
+    assert ttl(f"{API_URL}/league/2/transactions/9", league=ACTIVE_LEAGUE) == cache_policy.LIVE_TTL_SECONDS
+    assert ttl(f"{API_URL}/league/2/transactions/3", league=ACTIVE_LEAGUE) == cache_policy.SETTLED_WEEK_TTL_SECONDS
+    assert ttl(f"{API_URL}/league/2/transactions/15", league=ACTIVE_LEAGUE) == cache_policy.FUTURE_WEEK_TTL_SECONDS
+
+
+def test_players_refresh_daily():
+    assert ttl(f"{API_URL}/players/nfl") == cache_policy.DAY
@@ -0,0 +1,385 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from backend import client, codec, database
+
+LEAGUE_URL = f"{client.API_URL}/league/123"
+LEAGUE = {"league_id": "123", "name": "Test League", "season": "2023", "status": "complete"}
+NFL_STATE_URL = f"{client.API_URL}/state/nfl"
+NFL_STATE = {"season": "2024", "league_season": "2024", "week": 6, "leg": 6, "season_type": "regular"}
+
+
+class FakeSleeper:
+    """
+    Serves canned responses in place of the Sleeper API and records every call.
+
+    A list of (status, body) responses for a URL is served in order, repeating the last one.
+    """
+
+    def __init__(self):
+        self.responses = {NFL_STATE_URL: (200, NFL_STATE)}
+        self.calls = []
+
+    def calls_to(self, url):
+        return self.calls.count(url)
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        self.calls.append(url)
+        await asyncio.sleep(0.01)  # Give concurrent callers a chance to overlap
+        response = self.responses.get(url, (404, None))
+        if isinstance(response, list):
+            response = response.pop(0) if len(response) > 1 else response[0]
+        status, body = response
+        return httpx.Response(status, json=body)
+
+    def run(self, coro_fn):
+        async def wrapper():
+            client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+            client._http_client_loop = asyncio.get_running_loop()
+            try:
+                return await coro_fn()
+            finally:
+                await _close_connections()
+        return asyncio.run(wrapper())
+
+
+async def _close_connections():
+    await database.close_db()
+    await client.close_http_client()
+
+
+@pytest.fixture
+def sleeper(tmp_path, monkeypatch):
+    # A connection left open by an earlier test would keep using that test's database file
+    asyncio.run(_close_connections())
+    monkeypatch.setattr(database, "DATABASE_URL", str(tmp_path / "sleeper_cache.db"))
+    monkeypatch.setattr(client, "_consecutive_failures", 0)
+    monkeypatch.setattr(client, "_circuit_open_until", 0.0)
+    monkeypatch.setattr(client, "_negative_hits", 0)
+    monkeypatch.setattr(client, "_throttled_responses", 0)
+    monkeypatch.setattr(client, "_retries", 0)
+    monkeypatch.setattr(client, "UPSTREAM_RETRY_BASE_DELAY_SECONDS", 0.0)
+    client.memory_cache.clear()
+    yield FakeSleeper()
+    client.memory_cache.clear()
+
+
+def test_second_get_is_served_from_cache(sleeper):
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+
+    async def scenario():
+        first = await client.get(LEAGUE_URL)
+        second = await client.get(LEAGUE_URL)
+        return first, second
+
+    first, second = sleeper.run(scenario)
+    assert first == second == LEAGUE
+    assert sleeper.calls_to(LEAGUE_URL) == 1
+
+
+def test_current_version_is_not_counted_as_a_lookup(sleeper):
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+
+    async def scenario():
+        await client.get(LEAGUE_URL)
+        before = client.memory_cache.stats()
+        versions = client.current_version(LEAGUE_URL), client.current_version(NFL_STATE_URL + "/missing")
+        return before, versions, client.memory_cache.stats()
+
+    before, (version, missing), after = sleeper.run(scenario)
+    assert version is not None and missing is None
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+
+
+def test_sqlite_tier_serves_after_memory_is_cleared(sleeper):
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+
+    async def scenario():
+        await client.get(LEAGUE_URL)
+        await database.flush_writes()
+        client.memory_cache.clear()
+        return await client.get(LEAGUE_URL)
+
+    assert sleeper.run(scenario) == LEAGUE
+    assert sleeper.calls_to(LEAGUE_URL) == 1
+
+
+def test_concurrent_gets_share_one_upstream_fetch(sleeper):
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+
+    async def scenario():
+        return await asyncio.gather(*[client.get(LEAGUE_URL) for _ in range(10)])
+
+    results = sleeper.run(scenario)
+    assert all(result == LEAGUE for result in results)
+    assert sleeper.calls_to(LEAGUE_URL) == 1
+    assert client.cache_stats()["in_flight"] == 0
+
+
+ACTIVE_LEAGUE_URL = f"{client.API_URL}/league/456"
+ACTIVE_LEAGUE = {"league_id": "456", "name": "Test League", "season": "2024", "status": "in_season"}
+
+
+async def seed_cache(url, payload, age):
+    db = await database.get_db()
+    fetched_at = datetime.utcnow() - age
+    await db.execute(
+        "INSERT OR REPLACE INTO api_cache (url, data, timestamp) VALUES (?, ?, ?)",
+        (url, json.dumps(payload), fetched_at.isoformat()),
+    )
+    await db.commit()
+
+
+def test_recently_expired_entry_is_served_stale_and_refreshed(sleeper):
+    refreshed = {**ACTIVE_LEAGUE, "name": "Renamed League"}
+    sleeper.responses[ACTIVE_LEAGUE_URL] = (200, refreshed)
+
+    async def scenario():
+        await seed_cache(ACTIVE_LEAGUE_URL, ACTIVE_LEAGUE, age=timedelta(hours=2))
+        request_stale_urls = set()
+        request_dependencies = {}
+        client.stale_urls.set(request_stale_urls)
+        client.dependencies.set(request_dependencies)
+        first = await client.get(ACTIVE_LEAGUE_URL)
+        first_version = request_dependencies[ACTIVE_LEAGUE_URL]
+        await asyncio.sleep(0.05)  # Let the background refresh land
+        second = await client.get(ACTIVE_LEAGUE_URL)
+        return first, second, request_stale_urls, first_version
+
+    first, second, request_stale_urls, first_version = sleeper.run(scenario)
+    assert first == ACTIVE_LEAGUE
+    assert second == refreshed
+    assert request_stale_urls == {ACTIVE_LEAGUE_URL}
+    assert first_version is None  # Stale reads are not tagged
+
+
+def test_stale_copy_is_served_when_upstream_errors(sleeper):
+    sleeper.responses[ACTIVE_LEAGUE_URL] = (503, {"error": "unavailable"})
+
+    async def scenario():
+        await seed_cache(ACTIVE_LEAGUE_URL, ACTIVE_LEAGUE, age=timedelta(days=3))
+        return await client.get(ACTIVE_LEAGUE_URL)
+
+    assert sleeper.run(scenario) == ACTIVE_LEAGUE
+    assert sleeper.calls_to(ACTIVE_LEAGUE_URL) == 1 + client.UPSTREAM_MAX_RETRIES
+
+
+def test_cached_row_is_served_with_the_circuit_open_and_no_cached_context(sleeper, monkeypatch):
+    rosters_url = f"{ACTIVE_LEAGUE_URL}/rosters"
+    rosters = [{"roster_id": 1, "owner_id": "u1"}]
+    monkeypatch.setattr(client, "_circuit_open_until", time.time() + 60)
+
+    async def scenario():
+        # The league and NFL state the TTL policy reads are not cached and cannot be fetched
+        await seed_cache(rosters_url, rosters, age=timedelta(minutes=1))
+        return await client.get(rosters_url)
+
+    assert sleeper.run(scenario) == rosters
+    assert sleeper.calls == []
+
+
+def test_missing_resources_are_negatively_cached(sleeper):
+    missing_url = f"{client.API_URL}/league/999"
+
+    async def scenario():
+        first = await client.get(missing_url)
+        await database.flush_writes()
+        client.memory_cache.clear()
+        second = await client.get(missing_url)
+        return first, second
+
+    assert sleeper.run(scenario) == (None, None)
+    assert sleeper.calls_to(missing_url) == 1
+    assert client.cache_stats()["negative_hits"] == 1
+
+
+def test_legacy_json_rows_are_read_and_migrated(sleeper):
+    async def scenario():
+        await seed_cache(LEAGUE_URL, LEAGUE, age=timedelta(minutes=1))
+        legacy = await client.get(LEAGUE_URL)
+        await database.close_db()
+        converted = await database.migrate_payloads()
+        client.memory_cache.clear()
+        migrated = await client.get(LEAGUE_URL)
+        db = await database.get_db()
+        formats = await db.execute_fetchall("SELECT format FROM api_cache WHERE url = ?", (LEAGUE_URL,))
+        return legacy, converted, migrated, formats
+
+    legacy, converted, migrated, formats = sleeper.run(scenario)
+    assert legacy == migrated == LEAGUE
+    assert converted == 1
+    assert [row[0] for row in formats] == [codec.CURRENT_FORMAT]
+    assert sleeper.calls_to(LEAGUE_URL) == 0
+
+
+def test_throttled_requests_are_retried(sleeper):
+    sleeper.responses[LEAGUE_URL] = [(429, None), (503, None), (200, LEAGUE)]
+
+    async def scenario():
+        return await client.get(LEAGUE_URL)
+
+    assert sleeper.run(scenario) == LEAGUE
+    assert sleeper.calls_to(LEAGUE_URL) == 3
+    stats = client.upstream_stats()
+    assert stats["throttled_responses"] == 1
+    assert stats["retries"] == 2
+
+
+def test_maintenance_purges_expired_and_evicts_least_recently_used(sleeper):
+    async def scenario():
+        db = await database.get_db()
+        now = datetime.utcnow().timestamp()
+        rows = [
+            ("expired", now - database.CACHE_EXPIRED_RETENTION_SECONDS - 60, now),
+            ("old_access", None, now - 300),
+            ("recent_access", None, now),
+        ]
+        for name, expires_at, last_accessed in rows:
+            await db.execute(
+                "INSERT INTO api_cache (url, data, format, expires_at, last_accessed) VALUES (?, ?, ?, ?, ?)",
+                (f"{client.API_URL}/{name}", b"x" * 1000, codec.CURRENT_FORMAT, expires_at, last_accessed),
+            )
+        await db.execute(database.INSERT_BLOB_SQL, ("orphan", b"y" * 1000, codec.CURRENT_FORMAT))
+        await db.commit()
+        report = await database.run_maintenance(max_bytes=1500)
+        remaining = await db.execute_fetchall("SELECT url FROM api_cache")
+        return report, [row[0] for row in remaining]
+
+    report, remaining = sleeper.run(scenario)
+    assert report["expired_rows_purged"] == 1
+    assert report["orphaned_blobs_purged"] == 1
+    assert report["rows_evicted"] == 1
+    assert remaining == [f"{client.API_URL}/recent_access"]
+
+
+def test_memory_tier_hits_refresh_last_accessed(sleeper, monkeypatch):
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+    monkeypatch.setattr(client, "_access_recorded", {})
+
+    async def last_accessed():
+        await database.flush_writes()
+        db = await database.get_db()
+        return (await db.execute_fetchall("SELECT last_accessed FROM api_cache WHERE url = ?", (LEAGUE_URL,)))[0][0]
+
+    async def scenario():
+        await client.get(LEAGUE_URL)
+        fetched = await last_accessed()
+        client._access_recorded.clear()  # As if the last recorded access were long ago
+        await client.get(LEAGUE_URL)
+        return fetched, await last_accessed()
+
+    fetched, hit = sleeper.run(scenario)
+    assert sleeper.calls_to(LEAGUE_URL) == 1
+    assert hit > fetched
+
+
+def test_maintenance_between_write_batches_keeps_new_blobs(sleeper, monkeypatch):
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+    monkeypatch.setattr(database, "WRITE_BATCH_SIZE", 1)
+
+    async def scenario():
+        db = await database.get_db()
+        commit = db.commit
+        maintaining = False
+
+        async def commit_then_maintain():
+            # Run maintenance's cleanup after every batch the writer commits
+            nonlocal maintaining
+            await commit()
+            if not maintaining:
+                maintaining = True
+                try:
+                    await database._run_maintenance(db, database.CACHE_MAX_BYTES)
+                finally:
+                    maintaining = False
+
+        monkeypatch.setattr(db, "commit", commit_then_maintain)
+        await client.get(LEAGUE_URL)
+        await database.flush_writes()
+        client.memory_cache.clear()
+        return await client.get(LEAGUE_URL)
+
+    assert sleeper.run(scenario) == LEAGUE
+    assert sleeper.calls_to(LEAGUE_URL) == 1  # Served from SQLite: the row still has its blob
+
+
+def test_purge_league_clears_both_tiers(sleeper):
+    rosters_url = f"{LEAGUE_URL}/rosters"
+    other_league_url = f"{LEAGUE_URL}4"
+    sleeper.responses[LEAGUE_URL] = (200, LEAGUE)
+    sleeper.responses[rosters_url] = (200, [])
+    sleeper.responses[other_league_url] = (200, {**LEAGUE, "league_id": "1234"})
+
+    async def scenario():
+        for url in (LEAGUE_URL, rosters_url, other_league_url):
+            await client.get(url)
+        await database.flush_writes()
+        purged = await client.purge_league("123")
+        await client.get(LEAGUE_URL)
+        await client.get(other_league_url)
+        return purged
+
+    assert sleeper.run(scenario) == {"memory_entries": 2, "rows": 2}
+    assert sleeper.calls_to(LEAGUE_URL) == 2
+    assert sleeper.calls_to(other_league_url) == 1
+
+
+def test_identical_payloads_share_one_blob(sleeper):
+    week_urls = [f"{LEAGUE_URL}/transactions/{week}" for week in (1, 2, 3)]
+    for url in week_urls:
+        sleeper.responses[url] = (200, [])
+
+    async def blob_refcounts():
+        db = await database.get_db()
+        return [tuple(row) for row in await db.execute_fetchall(
+            "SELECT data, refcount FROM api_blobs WHERE hash = ?", (codec.content_hash(b"[]"),)
+        )]
+
+    async def scenario():
+        for url in week_urls:
+            await client.get(url)
+        await database.flush_writes()
+        shared = await blob_refcounts()
+        await client.purge_cache(week_urls[0])
+        after_one_purge = await blob_refcounts()
+        await client.purge_league("123")
+        return shared, after_one_purge, await blob_refcounts()
+
+    shared, after_one_purge, after_all_purged = sleeper.run(scenario)
+    assert shared == [(codec.encode(b"[]"), 3)]
+    assert after_one_purge == [(codec.encode(b"[]"), 2)]
+    assert after_all_purged == []
+
+
+def test_client_bound_to_another_running_loop_is_closed_there(monkeypatch):
+    monkeypatch.setattr(client, "_http_client", None)
+    monkeypatch.setattr(client, "_http_client_loop", None)
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        async def create():
+            return client.get_http_client()
+        old_client = asyncio.run_coroutine_threadsafe(create(), other_loop).result()
+
+        async def replace():
+            new_client = client.get_http_client()
+            await client.close_http_client()
+            return new_client
+        assert asyncio.run(replace()) is not old_client
+
+        deadline = time.time() + 5
+        while not old_client.is_closed and time.time() < deadline:
+            time.sleep(0.01)  # The close runs on the other loop's thread
+        assert old_client.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from backend import database
+
+INSERT_SQL = "INSERT INTO api_negative_cache (url, status) VALUES (?, ?)"
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # A connection left open by an earlier test would keep using that test's database file
+    asyncio.run(database.close_db())
+    monkeypatch.setattr(database, "DATABASE_URL", str(tmp_path / "sleeper_cache.db"))
+    monkeypatch.setattr(database, "WRITE_BATCH_SIZE", 2)
+
+
+def run(coro_fn):
+    async def wrapper():
+        try:
+            return await coro_fn()
+        finally:
+            await database.close_db()
+    return asyncio.run(wrapper())
+
+
+async def stored_urls():
+    db = await database.get_db()
+    return [row[0] for row in await db.execute_fetchall("SELECT url FROM api_negative_cache ORDER BY url")]
+
+
+def test_queued_writes_are_committed_in_batches_on_flush(db_path):
+    async def scenario():
+        await database.get_db()
+        for n in range(5):
+            database.enqueue_write(INSERT_SQL, (f"u{n}", 404))
+        before_flush = await stored_urls()
+        await database.flush_writes()
+        return before_flush, await stored_urls()
+
+    before_flush, after_flush = run(scenario)
+
+    assert before_flush == []  # Queued, not yet written
+    assert after_flush == ["u0", "u1", "u2", "u3", "u4"]
+
+
+def test_failed_batch_is_dropped_counted_and_the_writer_carries_on(db_path):
+    async def scenario():
+        await database.get_db()
+        # Batches of two: the duplicate fails the first batch, the second still commits
+        database.enqueue_write(INSERT_SQL, ("a", 404))
+        database.enqueue_write(INSERT_SQL, ("a", 404))
+        database.enqueue_write(INSERT_SQL, ("b", 404))
+        await database.flush_writes()
+        return await stored_urls()
+
+    dropped = database.dropped_write_batches
+    assert run(scenario) == ["b"]
+    assert database.dropped_write_batches == dropped + 1
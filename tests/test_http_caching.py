@@ -0,0 +1,116 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import client, http_caching, player_index
+from backend.main import app
+
+MATCHUPS = [
+    {"matchup_id": i // 2 + 1, "roster_id": i + 1, "points": 100.5 + i, "players": [str(p) for p in range(200)], "starters": ["1", "2"]}
+    for i in range(4)
+]
+
+RESPONSES = {"/league/123/matchups/1": MATCHUPS}
+
+
+@pytest.fixture
+def api(upstream, monkeypatch):
+    """A TestClient, with its lifespan running, whose upstream is a fake serving MATCHUPS, counting endpoint runs."""
+    endpoint_runs = []
+    original_get_league_matchups = client.get_league_matchups
+
+    async def counting_get_league_matchups(league_id, week):
+        endpoint_runs.append((league_id, week))
+        return await original_get_league_matchups(league_id, week)
+
+    monkeypatch.setattr(client, "get_league_matchups", counting_get_league_matchups)
+    http_caching.reset()
+    # The lifespan closes the shared database and HTTP client before the temporary database goes
+    with TestClient(app) as test_client:
+        yield test_client, endpoint_runs
+    http_caching.reset()
+    player_index.reset()
+
+
+def test_conditional_get_skips_the_endpoint(api):
+    test_client, endpoint_runs = api
+    first = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200
+    assert "content-encoding" not in first.headers
+    assert first.headers["cache-control"] == "no-cache"
+
+    second = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert len(endpoint_runs) == 1
+
+    # Once the data behind it is no longer held fresh, the endpoint runs again; same data, still 304
+    client.memory_cache.clear()
+    third = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert third.status_code == 304
+    assert len(endpoint_runs) == 2
+
+    assert test_client.get("/league/123/matchups/1", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_responses_built_around_a_failed_load_are_not_tagged(api, upstream, monkeypatch):
+    test_client, _ = api
+    monkeypatch.setattr(client, "UPSTREAM_MAX_RETRIES", 0)
+    for week in range(1, 19):
+        upstream[f"/stats/nfl/regular/2020/{week}"] = {"4046": {"pts_ppr": float(week), "gp": 1}}
+    upstream.failing.add("/stats/nfl/regular/2020/3")
+
+    partial = test_client.get("/stats/nfl/2020")
+    assert partial.status_code == 200
+    assert "3" not in partial.json()["4046"]
+    assert "etag" not in partial.headers
+    # Past-season weeks never expire, so a tag on the partial body would be answered 304 for good
+    assert http_caching.current_etag("/stats/nfl/2020") is None
+
+    upstream.failing.clear()
+    recovered = test_client.get("/stats/nfl/2020")
+    assert recovered.status_code == 200
+    assert "3" in recovered.json()["4046"]
+    revalidated = test_client.get("/stats/nfl/2020", headers={"If-None-Match": recovered.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_large_responses_are_compressed_with_their_own_etag(api):
+    test_client, _ = api
+    response = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"].endswith('-gzip"')
+    assert response.json()[0]["players"] == MATCHUPS[0]["players"]
+
+    revalidated = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_not_modified_carries_the_etag_of_the_negotiated_encoding(api):
+    test_client, _ = api
+    gzip_tag = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    identity_tag = gzip_tag[:-len('-gzip"')] + '"'
+
+    # Answered without running the endpoint, then after the data is reloaded
+    for _ in range(2):
+        identity = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "identity", "If-None-Match": gzip_tag})
+        assert identity.status_code == 304
+        assert identity.headers["etag"] == identity_tag
+        client.memory_cache.clear()
+
+    revalidated = test_client.get("/league/123/matchups/1", headers={"Accept-Encoding": "gzip", "If-None-Match": identity_tag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzip_tag
+
+
+def test_negotiation_helpers():
+    assert http_caching.choose_encoding("gzip;q=0, deflate") is None
+    assert http_caching.choose_encoding("*") == ("br" if http_caching.BROTLI_ENABLED else "gzip")
+    assert http_caching.choose_encoding("gzip, br;q=0") == "gzip"
+    assert http_caching.choose_encoding(None) is None
+    assert http_caching.matching_tag('W/"abc", "def-gzip"', '"def"') == '"def-gzip"'
+    assert http_caching.matching_tag('"abc"', '"def"') is None
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+from backend import client, database, league_calendar
+
+NFL_STATE = {"season": "2024", "week": 6, "leg": 6, "season_type": "regular"}
+SETTINGS = {"start_week": 1, "playoff_week_start": 15, "playoff_teams": 6, "playoff_round_type": 0}
+
+
+def test_final_week_follows_playoff_settings():
+    assert league_calendar.final_week(SETTINGS) == 17
+    assert league_calendar.final_week({**SETTINGS, "playoff_teams": 4}) == 16
+    assert league_calendar.final_week({**SETTINGS, "playoff_round_type": 1}) == 18  # Two-week championship
+    assert league_calendar.final_week({**SETTINGS, "playoff_round_type": 2}) == 18  # Capped at the NFL season
+    assert league_calendar.final_week({**SETTINGS, "last_scored_leg": 18}) == 18
+    assert league_calendar.final_week({}) == league_calendar.WEEKS
+
+
+def test_league_weeks_stop_at_the_current_week_of_an_active_season():
+    active = {"league_id": "1", "season": "2024", "status": "in_season", "settings": {**SETTINGS, "start_week": 3}}
+    complete = {"league_id": "2", "season": "2023", "status": "complete", "settings": SETTINGS}
+    next_season = {"league_id": "3", "season": "2025", "status": "pre_draft", "settings": SETTINGS}
+
+    assert league_calendar.transaction_weeks(active, NFL_STATE) == [1, 2, 3, 4, 5, 6]
+    assert league_calendar.matchup_weeks(active, NFL_STATE) == [3, 4, 5, 6]
+    assert league_calendar.transaction_weeks(complete, NFL_STATE) == list(range(1, 18))
+    assert league_calendar.transaction_weeks(next_season, NFL_STATE) == [1]
+    # Without the NFL state, every week the league could play
+    assert league_calendar.matchup_weeks(active, None) == list(range(3, 18))
+
+
+def test_stats_weeks_and_saved_calls():
+    assert league_calendar.stats_weeks("2020", None) == list(range(1, 19))
+    assert league_calendar.stats_weeks("2100", None) == []
+
+    before = league_calendar.calls_saved
+    url_pattern = "https://example.test/saved-calls/{week}"
+    league_calendar.count_skipped(url_pattern, [1, 2, 3])
+    assert league_calendar.calls_saved - before == 15
+    # Skipping the same weeks again on the next page view saves nothing more
+    league_calendar.count_skipped(url_pattern, [1, 2])
+    assert league_calendar.calls_saved - before == 16
+
+
+def test_weeks_fall_back_to_the_full_range_with_the_circuit_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_URL", str(tmp_path / "sleeper_cache.db"))
+    monkeypatch.setattr(client, "_circuit_open_until", time.time() + 60)
+    client.memory_cache.clear()
+
+    async def scenario():
+        try:
+            return await league_calendar.get_transaction_weeks("1"), await league_calendar.get_matchup_weeks("1")
+        finally:
+            await database.close_db()
+
+    # Neither the league nor the NFL state is cached, and Sleeper cannot be called
+    assert asyncio.run(scenario()) == (list(range(1, 19)), list(range(1, 19)))
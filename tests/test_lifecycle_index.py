@@ -0,0 +1,77 @@
+from backend import lifecycle_index, transaction_store
+from backend.services import sleeper_service
+
+NFL_STATE = {"season": "2024", "week": 5, "leg": 5, "season_type": "regular"}
+
+
+def league(league_id, season, status, previous_league_id=None):
+    return {"league_id": league_id, "previous_league_id": previous_league_id, "season": season, "status": status}
+
+
+def draft(draft_id, league_id, season):
+    return {"draft_id": draft_id, "league_id": league_id, "status": "complete", "type": "snake",
+            "season": season, "settings": {}, "metadata": {}}
+
+
+def pick(draft_id, player_id, pick_no, roster_id):
+    return {"draft_id": draft_id, "player_id": player_id, "pick_no": pick_no, "round": 1, "roster_id": roster_id, "metadata": {}}
+
+
+def trade(transaction_id, player_id, from_roster, to_roster, timestamp):
+    return {"transaction_id": transaction_id, "type": "trade", "status": "complete", "status_updated": timestamp,
+            "adds": {player_id: to_roster}, "drops": {player_id: from_roster}, "roster_ids": [from_roster, to_roster]}
+
+
+# Served by the conftest `upstream` fixture; other transaction weeks are empty
+RESPONSES = {
+    "/state/nfl": NFL_STATE,
+    "/league/L2": league("L2", "2024", "in_season", "L1"),
+    "/league/L1": league("L1", "2023", "complete"),
+    "/league/L2/drafts": [draft("d2", "L2", "2024")],
+    "/league/L1/drafts": [draft("d1", "L1", "2023")],
+    "/draft/d2/picks": [pick("d2", "1466", 1, 2)],
+    "/draft/d1/picks": [pick("d1", "4046", 1, 1), pick("d1", "1466", 2, 1)],
+    "/league/L1/transactions/4": [trade("t1", "1466", 1, 3, 1_000)],
+    "/league/L2/transactions/5": [trade("t2", "4046", 1, 2, 2_000)],
+}
+
+
+def test_lifecycle_covers_the_history_once_in_order(upstream):
+    async def scenario():
+        kelce = await sleeper_service.get_player_lifecycle("L2", "1466")
+        mahomes = await sleeper_service.get_player_lifecycle("L2", "4046")
+        unknown = await sleeper_service.get_player_lifecycle("L2", "missing")
+        return kelce, mahomes, unknown
+
+    builds = lifecycle_index.builds
+    kelce, mahomes, unknown = upstream.run(scenario)
+
+    # Drafts oldest first, then transactions by time; each transaction once, not once per season
+    assert [(event["type"], event["details"].get("draft_id") or event["details"]["transaction_id"]) for event in kelce] == [
+        ("snake draft", "d1"), ("snake draft", "d2"), ("trade", "t1"),
+    ]
+    assert [event["details"].get("transaction_id") for event in mahomes] == [None, "t2"]
+    assert mahomes[1]["details"]["league_id"] == "L2"
+    assert unknown == []
+    assert lifecycle_index.builds == builds + 1
+
+
+def test_synced_transactions_update_the_index_in_place(upstream):
+    async def scenario():
+        before = await sleeper_service.get_player_lifecycle("L2", "4046")
+        upstream["/league/L2/transactions/5"] = [
+            trade("t2", "4046", 1, 2, 2_000),
+            trade("t3", "4046", 2, 4, 3_000),
+        ]
+        delta = await transaction_store.sync_league("L2", refresh=True)
+        after = await sleeper_service.get_player_lifecycle("L2", "4046")
+        return before, delta, after
+
+    builds, updates = lifecycle_index.builds, lifecycle_index.updates
+    before, delta, after = upstream.run(scenario)
+
+    assert delta["added"] == ["t3"]
+    assert [event["details"].get("transaction_id") for event in before] == [None, "t2"]
+    assert [event["details"].get("transaction_id") for event in after] == [None, "t2", "t3"]
+    assert lifecycle_index.builds == builds + 1
+    assert lifecycle_index.updates == updates + 1
@@ -0,0 +1,49 @@
+from backend.memory_cache import MemoryCache, MISS
+
+
+def test_returns_cached_falsy_payloads():
+    cache = MemoryCache(max_entries=10, max_bytes=1000)
+    cache.set("empty_week", [], size=2)
+    assert cache.get("empty_week") == []
+    assert cache.get("missing") is MISS
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = MemoryCache(max_entries=10, max_bytes=100)
+    cache.set("a", "a", size=40)
+    cache.set("b", "b", size=40)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", "c", size=40)
+    assert cache.get("b") is MISS
+    assert cache.get("a") == "a"
+    assert cache.get("c") == "c"
+    assert cache.current_bytes == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_by_entry_count():
+    cache = MemoryCache(max_entries=2, max_bytes=1000)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key, size=1)
+    assert len(cache) == 2
+    assert cache.get("a") is MISS
+
+
+def test_skips_payloads_larger_than_budget():
+    cache = MemoryCache(max_entries=10, max_bytes=100)
+    cache.set("a", "a", size=10)
+    cache.set("huge", "huge", size=1000)
+    assert cache.get("huge") is MISS
+    assert cache.get("a") == "a"
+
+
+def test_expired_entries_are_misses():
+    cache = MemoryCache(max_entries=10, max_bytes=100)
+    cache.set("a", "a", size=1, ttl_seconds=-1)
+    cache.set("b", "b", size=1, ttl_seconds=None)
+    assert cache.get("a") is MISS
+    assert cache.get("b") == "b"
+    assert cache.stats()["expirations"] == 1
+    assert cache.current_bytes == 1
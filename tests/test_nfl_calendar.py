@@ -0,0 +1,39 @@
+from datetime import date, datetime, timezone
+
+from backend import nfl_calendar
+
+
+def _ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def test_weeks_start_the_tuesday_after_labor_day():
+    assert nfl_calendar.labor_day(2023) == date(2023, 9, 4)
+    assert nfl_calendar.labor_day(2020) == date(2020, 9, 7)
+    assert nfl_calendar.week_start(2023, 1).date() == date(2023, 9, 5)
+    assert nfl_calendar.week_start(2023, 18).date() == date(2024, 1, 2)
+
+
+def test_timestamps_map_to_weeks_in_bulk():
+    ordinals = nfl_calendar.timestamp_ordinals([
+        _ms(2023, 9, 1),    # Before week 1: offseason
+        _ms(2023, 9, 10),   # Sunday of week 1
+        _ms(2023, 9, 12, 3),  # Monday night, still week 1
+        _ms(2023, 9, 13),   # Waivers of week 2
+        _ms(2024, 1, 7),    # Week 18
+        _ms(2024, 2, 11),   # Super Bowl: offseason before 2024
+    ])
+    assert [nfl_calendar.season_week(ordinal) for ordinal in ordinals] == [
+        (2023, 0), (2023, 1), (2023, 1), (2023, 2), (2023, 18), (2024, 0),
+    ]
+    assert list(nfl_calendar.timestamp_ordinals([])) == []
+
+
+def test_event_ordinal_prefers_leg():
+    # Processed just after week 5's boundary but for week 4
+    assert nfl_calendar.event_ordinal(_ms(2023, 10, 4), "2023", 4) == nfl_calendar.week_ordinal(2023, 4)
+    assert nfl_calendar.event_ordinal(_ms(2023, 10, 4), "2023") == nfl_calendar.week_ordinal(2023, 5)
+    # Drafts have no timestamp: offseason before their season
+    assert nfl_calendar.event_ordinal(None, "2023") == nfl_calendar.week_ordinal(2023, 0)
+    assert nfl_calendar.event_ordinal(None) is None
+    assert list(nfl_calendar.season_ordinals(2023))[:2] == [nfl_calendar.week_ordinal(2023, 1), nfl_calendar.week_ordinal(2023, 2)]
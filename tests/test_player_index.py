@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+from backend import client, database, player_index
+
+PLAYERS = {
+    "4046": {"player_id": "4046", "first_name": "Patrick", "last_name": "Mahomes", "full_name": "Patrick Mahomes",
+             "position": "QB", "team": "KC", "age": 28, "search_rank": 1, "college": "Texas Tech"},
+    "KC": {"player_id": "KC", "first_name": "Kansas City", "last_name": "Chiefs", "position": "DEF", "team": "KC"},
+    "1466": {"player_id": "1466", "first_name": "Travis", "last_name": "Kelce", "position": "TE", "team": "KC", "age": 34},
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_URL", str(tmp_path / "sleeper_cache.db"))
+    player_index.reset()
+    yield
+    player_index.reset()
+
+
+@pytest.fixture
+def players_payload(monkeypatch):
+    """Serve PLAYERS in place of client.get_all_players, counting calls."""
+    calls = []
+
+    async def fake_get_all_players():
+        calls.append(1)
+        return PLAYERS
+
+    monkeypatch.setattr(client, "get_all_players", fake_get_all_players)
+    return calls
+
+
+def test_records_expose_player_fields():
+    index = player_index.build_player_index(PLAYERS)
+    assert len(index) == 3
+    assert index["4046"].position == "QB"
+    assert index.name("4046") == "Patrick Mahomes"
+    assert index.get("KC").age is None
+    assert index.get("missing") is None
+    assert index["4046"].as_player_dict() == {
+        "player_id": "4046", "full_name": "Patrick Mahomes", "first_name": "Patrick",
+        "last_name": "Mahomes", "position": "QB", "team": "KC", "age": 28,
+    }
+
+
+def test_snapshot_round_trips_index(tmp_path):
+    index = player_index.build_player_index(PLAYERS)
+    path = str(tmp_path / "players.snapshot")
+    player_index.write_snapshot(path, index, expires_at=1234.5)
+    snapshot = player_index.open_snapshot(path)
+
+    assert snapshot.expires_at == 1234.5
+    assert list(snapshot) == list(PLAYERS)  # Payload order, not id order
+    assert list(snapshot.records()) == list(index.records())
+    assert snapshot["1466"] == index["1466"]
+    assert "KC" in snapshot and "missing" not in snapshot
+    assert snapshot.get("missing") is None
+    with pytest.raises(KeyError):
+        snapshot["0"]
+
+
+def test_snapshot_written_by_another_worker_is_mapped_without_loading_players(players_payload):
+    index = player_index.build_player_index(PLAYERS)
+    player_index.write_snapshot(player_index.snapshot_path(), index, expires_at=time.time() + 3600)
+
+    result = asyncio.run(player_index.get_player_index())
+    assert isinstance(result, player_index.PlayerSnapshot)
+    assert result.name("1466") == "Travis Kelce"
+    assert players_payload == []
+
+
+def test_first_build_writes_snapshot_and_expired_snapshot_refreshes_in_background(players_payload):
+    async def scenario():
+        built = await player_index.get_player_index()
+        player_index.write_snapshot(player_index.snapshot_path(), built, expires_at=time.time() - 1)
+        expired = await player_index.get_player_index()
+        await asyncio.sleep(0.05)  # Let the background refresh publish a new snapshot
+        refreshed = await player_index.get_player_index()
+        return built, expired, refreshed
+
+    built, expired, refreshed = asyncio.run(scenario())
+    assert isinstance(built, player_index.PlayerSnapshot)
+    assert expired.expires_at < time.time()  # Served while the refresh runs
+    assert refreshed.expires_at > time.time()
+    assert len(players_payload) == 2
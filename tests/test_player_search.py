@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import player_index, player_search
+from backend.main import app
+from backend.services import sleeper_service
+
+PLAYERS = {
+    "4046": {"first_name": "Patrick", "last_name": "Mahomes", "position": "QB", "team": "KC", "search_rank": 1},
+    "1466": {"first_name": "Travis", "last_name": "Kelce", "position": "TE", "team": "KC", "search_rank": 5},
+    "8150": {"first_name": "D'Andre", "last_name": "Swift", "position": "RB", "team": "CHI", "search_rank": 40},
+    "7564": {"first_name": "Ja'Marr", "last_name": "Chase", "position": "WR", "team": "CIN", "search_rank": 3},
+    "9999": {"first_name": "Chase", "last_name": "Brown", "position": "RB", "team": "CIN", "search_rank": 60},
+    "5000": {"first_name": "Patrick", "last_name": "Taylor", "position": "RB", "team": None},
+    "KC": {"first_name": "Kansas City", "last_name": "Chiefs", "position": "DEF", "team": "KC"},
+}
+
+
+@pytest.fixture
+def search_index():
+    return player_search.PlayerSearchIndex(player_index.build_player_index(PLAYERS))
+
+
+def ids(matches):
+    return [player_id for player_id, _ in matches]
+
+
+def test_matches_rank_by_tier_then_search_rank(search_index):
+    # Exact and prefix matches on the full name beat first/last-name prefixes
+    assert ids(search_index.search("chase brown")) == ["9999"]
+    assert ids(search_index.search("chase")) == ["9999", "7564"]
+    assert ids(search_index.search("patrick")) == ["4046", "5000"]
+    assert ids(search_index.search("PAT")) == ["4046", "5000"]
+    assert ids(search_index.search("patrick", limit=1)) == ["4046"]
+    assert search_index.search("p") == []
+
+
+def test_accents_punctuation_and_substrings(search_index):
+    assert ids(search_index.search("dandre")) == []  # Apostrophes split words
+    assert ids(search_index.search("d'andré")) == ["8150"]
+    assert ids(search_index.search("d andre sw")) == ["8150"]
+    assert ids(search_index.search("ahom")) == ["4046"]  # Inside a word
+    assert ids(search_index.search("city chi")) == ["KC"]
+
+
+def test_filters(search_index):
+    assert ids(search_index.search("chase", position="wr")) == ["7564"]
+    assert ids(search_index.search("patrick", team="kc")) == ["4046"]
+    assert ids(search_index.search("patrick", player_ids={"5000", "unknown"})) == ["5000"]
+    assert search_index.search("patrick", player_ids=set()) == []
+
+
+def test_search_endpoint(monkeypatch):
+    index = player_index.build_player_index(PLAYERS)
+
+    async def fake_get_player_index():
+        return index
+
+    async def fake_get_league_player_ids(league_id):
+        return {"1466", "7564"}
+
+    monkeypatch.setattr(player_index, "get_player_index", fake_get_player_index)
+    monkeypatch.setattr(sleeper_service, "get_league_player_ids", fake_get_league_player_ids)
+    player_search.reset()
+    test_client = TestClient(app)
+
+    response = test_client.get("/players/search", params={"q": "chase"})
+    assert response.status_code == 200
+    assert [player["player_id"] for player in response.json()] == ["9999", "7564"]
+    assert response.json()[1]["first_name"] == "Ja'Marr"
+
+    league_response = test_client.get("/players/search", params={"q": "chase", "league_id": "123"})
+    assert [player["player_id"] for player in league_response.json()] == ["7564"]
+    loads = player_search.league_player_loads
+    test_client.get("/players/search", params={"q": "ja", "league_id": "123"})
+    assert player_search.league_player_loads == loads  # The league's players are reused per keystroke
+
+    builds = player_search.builds
+    test_client.get("/players/search", params={"q": "kelce"})
+    assert player_search.builds == builds  # Built once per player index
+    assert test_client.get("/players/search", params={"q": "chase", "limit": 500}).status_code == 422
+    player_search.reset()
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from backend.rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+
+def test_bucket_allows_burst_then_rate():
+    bucket = TokenBucket(rate=100, capacity=5)
+
+    async def scenario():
+        start = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(scenario())
+    # 5 tokens from the burst, 5 more at 100/s
+    assert 0.04 <= elapsed < 0.5
+    assert bucket.waits >= 1
+
+
+def test_pause_holds_back_callers():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(0.05)
+    assert asyncio.run(bucket.acquire()) >= 0.04
+
+
+def test_backoff_honours_retry_after():
+    for attempt in range(5):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=2.0) <= 2.0
+    assert backoff_delay(0, base=0.5, cap=2.0, retry_after=7) == 7
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
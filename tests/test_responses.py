@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from backend import player_index, responses
+from backend.main import app
+from backend.models.sleeper import AssetNode, PlayerStint, TradeEdge, TradeGraph
+
+
+def _fastapi_body(value):
+    # What JSONResponse sends for a value returned through response_model
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def test_model_response_matches_fastapi_encoding():
+    graph = TradeGraph(
+        league_id="L1",
+        nodes={"4046": AssetNode(asset_id="4046", asset_type="player", asset_name="Patrick Mahomes", current_owner=2, metadata={"ppg": 21.75})},
+        edges=[TradeEdge(transaction_id="1", timestamp=1694000000000, from_roster_id=1, to_roster_id=2, asset_id="4046")],
+        transactions={"1": {"status": "complete", "adds": {"4046": 2}, "note": "Échange"}},
+        roster_names={1: "Team Ünïcode", 2: "Team B"},
+        timeline=["1"],
+    )
+    stint = PlayerStint(start_date=datetime(2023, 9, 5, 9), team_name="Team B", owner_username="b", owner_display_name="B", aggregated_stats={})
+
+    assert responses.model_response(graph).body == _fastapi_body(graph)
+    assert responses.model_response(stint).body == _fastapi_body(stint)
+    assert responses.encode({1: {"name": "Ünïcode", "points": 12.5, "none": None}}) == _fastapi_body({1: {"name": "Ünïcode", "points": 12.5, "none": None}})
+
+
+def test_players_body_is_prebuilt_per_index(monkeypatch):
+    index = player_index.build_player_index({
+        "4046": {"first_name": "Patrick", "last_name": "Mahomes", "position": "QB", "team": "KC", "age": 28},
+        "DAL": {"first_name": "Dallas", "last_name": "Cowboys", "position": "DEF", "team": "DAL"},
+    })
+
+    async def fake_get_player_index():
+        return index
+
+    monkeypatch.setattr(player_index, "get_player_index", fake_get_player_index)
+    responses.reset()
+    test_client = TestClient(app)
+    first = test_client.get("/players")
+    builds = responses.builds
+    second = test_client.get("/players")
+
+    assert first.status_code == 200
+    assert first.content == second.content
+    assert responses.builds == builds
+    assert first.content == _fastapi_body({player_id: record.as_player_dict() for player_id, record in index.records()})
@@ -0,0 +1,78 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend import client, player_index, scoring, stats_store
+from backend.models.sleeper import League
+
+WEEKLY = {
+    1: {
+        "4046": {"pass_yd": 300.0, "pass_td": 3, "pass_int": 1, "pts_ppr": 22.0, "gp": 1},
+        "1466": {"rec": 8, "rec_yd": 90.0, "rec_td": 1, "pts_ppr": 23.0, "gp": 1},
+    },
+    2: {"1466": {"rec": 5, "rec_yd": 40.0, "pts_ppr": 9.0, "gp": 1}},
+}
+
+PLAYERS = {
+    "4046": player_index.PlayerRecord("4046", None, "Patrick", "Mahomes", "QB", "KC", 28, 1),
+    "1466": player_index.PlayerRecord("1466", None, "Travis", "Kelce", "TE", "KC", 34, 2),
+}
+
+TE_PREMIUM = {"pass_yd": 0.04, "pass_td": 4, "pass_int": -2, "rec": 1, "rec_yd": 0.1, "rec_td": 6, "bonus_rec_te": 0.5}
+
+
+def _league(scoring_settings, league_id="L1"):
+    return League(
+        league_id=league_id, name="Test", season="2023", total_rosters=12, status="complete",
+        settings={}, scoring_settings=scoring_settings, roster_positions=[],
+    )
+
+
+@pytest.fixture
+def season(monkeypatch):
+    async def fake_get_player_weekly_stats(season, week):
+        return WEEKLY.get(week, {})
+
+    async def fake_get_player_index():
+        return PLAYERS
+
+    monkeypatch.setattr(client, "get_player_weekly_stats", fake_get_player_weekly_stats)
+    monkeypatch.setattr(player_index, "get_player_index", fake_get_player_index)
+    stats_store.reset()
+    scoring.reset()
+    yield
+    stats_store.reset()
+    scoring.reset()
+
+
+def test_points_follow_league_scoring():
+    stats = stats_store.SeasonStats("2023", [WEEKLY.get(week) for week in range(1, 19)])
+    points = scoring.SeasonPoints(stats, scoring.ScoringWeights(TE_PREMIUM), [PLAYERS[pid].position for pid in stats.rows])
+
+    assert points.player_row("4046")[0] == pytest.approx(12 + 12 - 2)
+    # 8 rec + 4 TE premium + 9 yards + 6 TD, then 5 + 2.5 + 4
+    assert points.player_row("1466")[:2] == pytest.approx([27.0, 11.5])
+    assert points.total("1466", week_mask=np.arange(stats_store.WEEKS) == 1) == pytest.approx(11.5)
+    assert points.total("missing") == 0.0
+
+
+def test_empty_scoring_falls_back_to_ppr():
+    stats = stats_store.SeasonStats("2023", [WEEKLY.get(week) for week in range(1, 19)])
+    points = scoring.SeasonPoints(stats, scoring.ScoringWeights({}), [])
+    assert points.total("1466") == 32.0
+
+
+def test_season_points_cached_per_league(season):
+    computations = scoring.computations
+
+    async def scenario():
+        first = await scoring.get_season_points(_league(TE_PREMIUM))
+        again = await scoring.get_season_points(_league(TE_PREMIUM))
+        other = await scoring.get_season_points(_league({"rec": 0.5, "rec_yd": 0.1}, league_id="L2"))
+        return first, again, other
+
+    first, again, other = asyncio.run(scenario())
+    assert first is again
+    assert scoring.computations == computations + 2
+    assert other.total("1466") == pytest.approx(6.5 + 13.0)
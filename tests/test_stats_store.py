@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import client, player_index, responses, stats_store
+from backend.main import app
+from backend.services import sleeper_service
+
+WEEKLY = {
+    1: {"4046": {"pts_ppr": 20.5, "gp": 1}, "1466": {"pts_ppr": 12.0, "gp": 1}},
+    2: {"4046": {"pts_ppr": 18.25, "gp": 1}, "1466": {"gp": 0}},
+    3: {"1466": {"pts_ppr": 9.5, "gp": 1}, "9999": {"pts_ppr": 1.0}, "bad": None},
+}
+
+
+@pytest.fixture
+def weekly_stats(monkeypatch):
+    """Serve WEEKLY in place of client.get_player_weekly_stats, counting calls, with no player directory."""
+    calls = []
+
+    async def fake_get_player_weekly_stats(season, week):
+        calls.append((season, week))
+        return WEEKLY.get(week, {})
+
+    async def empty_index():
+        return player_index.EMPTY_INDEX
+
+    monkeypatch.setattr(client, "get_player_weekly_stats", fake_get_player_weekly_stats)
+    monkeypatch.setattr(player_index, "get_player_index", empty_index)
+    stats_store.reset()
+    yield calls
+    stats_store.reset()
+
+
+def test_columns_and_aggregations():
+    season = stats_store.SeasonStats("2023", [WEEKLY.get(week) for week in range(1, 19)])
+    assert season.player_ids == ["4046", "1466", "9999"]  # First appearance order
+    assert season.column("pts_ppr").shape == (3, stats_store.WEEKS)
+    assert season.player_weeks("1466") == [1, 2, 3]
+    assert season.total("4046") == 38.75
+    assert season.total("1466", week_mask=np.arange(stats_store.WEEKS) >= 1) == 9.5
+    assert season.active_weeks("1466").sum() == 2
+    assert season.total("missing") == 0.0
+    assert season.player_row("9999", "gp")[2] != season.player_row("9999", "gp")[2]  # NaN
+
+
+def test_columns_built_from_threads_are_shared():
+    season = stats_store.SeasonStats("2023", [WEEKLY.get(week) for week in range(1, 19)])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        built = list(pool.map(lambda _: season.column("pts_ppr"), range(32)))
+        stacked = list(pool.map(lambda _: season.columns(["gp", "pts_ppr"]), range(32)))
+    assert all(matrix is built[0] for matrix in built)
+    assert all(np.array_equal(matrix, stacked[0], equal_nan=True) for matrix in stacked)
+
+
+def test_season_store_is_memoised(weekly_stats):
+    async def scenario():
+        return await stats_store.get_season_stats("2023"), await stats_store.get_season_stats("2023")
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert stats_store.builds >= 1
+
+
+def test_aggregated_stats_match_weekly_models(weekly_stats):
+    async def scenario():
+        return (
+            await sleeper_service.get_player_aggregated_stats("1466", "2023"),
+            await sleeper_service.get_all_player_weekly_stats_for_season("2023"),
+        )
+
+    aggregated, weekly_models = asyncio.run(scenario())
+    expected_points = sum(stats.pts_ppr or 0 for stats in weekly_models["1466"].values())
+    expected_games = sum(1 for stats in weekly_models["1466"].values() if stats.gp and stats.gp > 0)
+    assert aggregated["total_points"] == round(expected_points, 2)
+    assert aggregated["avg_ppg"] == round(expected_points / expected_games, 2)
+    assert aggregated["games_played"] == expected_games
+
+
+def test_season_aggregates_rank_players_within_position():
+    season = stats_store.SeasonStats("2023", [WEEKLY.get(week) for week in range(1, 19)])
+    players = {
+        "4046": player_index.PlayerRecord("4046", None, "Patrick", "Mahomes", "QB", "KC", 28, 1),
+        "1466": player_index.PlayerRecord("1466", None, "Travis", "Kelce", "TE", "KC", 34, 2),
+        "9999": player_index.PlayerRecord("9999", None, "Backup", "Qb", "QB", "KC", 30, 3),
+    }
+    aggregates = stats_store.SeasonAggregates(season, players)
+
+    assert aggregates.for_player("4046") == {
+        "player_id": "4046", "season": "2023", "total_points": 38.75, "avg_ppg": 19.38,
+        "games_played": 2, "position": "QB", "position_rank": 1,
+    }
+    assert aggregates.for_player("9999")["position_rank"] == 2
+    assert aggregates.for_player("1466")["position_rank"] == 1
+    assert aggregates.for_player("missing")["total_points"] == 0.0
+
+
+def test_batch_endpoint_returns_aggregates_by_season(weekly_stats):
+    response = TestClient(app).get("/stats/aggregates", params={"player_ids": "4046,1466", "seasons": ["2022", "2023"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body) == ["2022", "2023"]
+    assert body["2023"]["1466"]["total_points"] == 21.5
+    assert body["2023"]["1466"]["games_played"] == 2
+
+
+def test_season_stats_endpoint_reuses_body(weekly_stats):
+    responses.reset()
+    test_client = TestClient(app)
+    first = test_client.get("/stats/nfl/2023")
+    builds = responses.builds
+    second = test_client.get("/stats/nfl/2023")
+
+    assert first.status_code == 200
+    assert first.content == second.content
+    assert responses.builds == builds
+    body = first.json()
+    assert body["1466"]["2"] == {"player_id": "1466", "week": 2, "season": "2023", "pts_ppr": None, "gp": 0}
+    assert body["bad"] == {}
@@ -0,0 +1,223 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend import client, database, http_caching, transaction_store
+from backend.services import sleeper_service
+
+NFL_STATE = {"season": "2024", "week": 5, "leg": 5, "season_type": "regular"}
+
+
+def trade(transaction_id, adds, drops, timestamp, draft_picks=None):
+    return {
+        "transaction_id": transaction_id, "type": "trade", "status": "complete", "status_updated": timestamp,
+        "leg": 1, "adds": adds, "drops": drops, "roster_ids": [1, 2], "draft_picks": draft_picks or [],
+    }
+
+
+# Served by the conftest `upstream` fixture; the NFL state is a 404 unless a test sets it
+RESPONSES = {
+    "/league/L2": {"league_id": "L2", "previous_league_id": "L1", "season": "2024", "status": "in_season"},
+    "/league/L1": {"league_id": "L1", "previous_league_id": None, "season": "2023", "status": "complete"},
+    "/league/L1/transactions/3": [
+        trade("t1", {"4046": 2}, {"4046": 1}, 1_000, [
+            {"season": "2024", "round": 1, "roster_id": 1, "previous_owner_id": 1, "owner_id": 2},
+        ]),
+        {"transaction_id": "w1", "type": "waiver", "status": "complete", "status_updated": 1_100,
+         "adds": {"1466": 1}, "drops": None, "roster_ids": [1]},
+    ],
+    "/league/L2/transactions/1": [trade("t2", {"1466": 2}, {"1466": 1}, 2_000)],
+}
+
+
+def test_queries_cover_every_season(upstream):
+    async def scenario():
+        all_transactions = await transaction_store.league_transactions("L2")
+        trades = await transaction_store.league_transactions("L2", type="trade")
+        older = await transaction_store.get_transaction("L2", "t1")
+        kelce = await transaction_store.player_transactions("L2", "1466")
+        player_ids = await transaction_store.league_player_ids("L2")
+        db = await database.get_db()
+        picks = [tuple(row) for row in await db.execute_fetchall("SELECT transaction_id, season, round, owner_id FROM transaction_picks")]
+        return all_transactions, trades, older, kelce, player_ids, picks
+
+    all_transactions, trades, older, kelce, player_ids, picks = upstream.run(scenario)
+
+    # Newest season first, then week and payload order, as the weekly payloads list them
+    assert [tx.transaction_id for tx in all_transactions] == ["t2", "t1", "w1"]
+    assert [tx.transaction_id for tx in trades] == ["t2", "t1"]
+    assert older.league_id == "L1" and older.adds == {"4046": 2}
+    assert older.draft_picks[0].owner_id == 2
+    assert [tx.transaction_id for tx in kelce] == ["t2", "w1"]
+    assert player_ids == {"4046", "1466"}
+    assert picks == [("t1", "2024", 1, 2)]
+    assert upstream.run(lambda: transaction_store.get_transaction("L2", "missing")) is None
+
+
+def test_weeks_are_rewritten_only_when_their_payload_changes(upstream):
+    async def scenario():
+        await transaction_store.league_transactions("L2")
+        first_sync = transaction_store.weeks_synced
+        await transaction_store.league_transactions("L2")
+        unchanged_sync = transaction_store.weeks_synced
+
+        # The current season gains a trade and loses nothing else
+        upstream["/league/L2/transactions/1"] = upstream["/league/L2/transactions/1"] + [trade("t3", {"4046": 1}, {"4046": 2}, 3_000)]
+        await client.purge_cache("/league/L2/transactions/1")
+        refreshed = await transaction_store.league_transactions("L2", type="trade")
+        return first_sync, unchanged_sync, refreshed
+
+    before = transaction_store.weeks_synced
+    first_sync, unchanged_sync, refreshed = upstream.run(scenario)
+
+    assert first_sync - before == 2 * 18
+    assert unchanged_sync == first_sync
+    assert transaction_store.weeks_synced == first_sync + 1
+    assert [tx.transaction_id for tx in refreshed] == ["t2", "t3", "t1"]
+
+
+def test_purging_a_league_refetches_its_final_weeks(upstream):
+    async def scenario():
+        await transaction_store.league_transactions("L2")
+        # L1's season is complete, so its weeks are final and a cache purge alone changes nothing
+        upstream["/league/L1/transactions/3"] = [trade("t4", {"4046": 2}, {"4046": 1}, 1_500)]
+        await client.purge_league("L1")
+        cache_only = await transaction_store.league_transactions("L2")
+        purged = await transaction_store.purge_league("L1")
+        return cache_only, purged, await transaction_store.league_transactions("L2")
+
+    cache_only, purged, refetched = upstream.run(scenario)
+
+    assert [tx.transaction_id for tx in cache_only] == ["t2", "t1", "w1"]
+    assert purged == 2
+    assert [tx.transaction_id for tx in refetched] == ["t2", "t4"]
+
+
+def test_historical_coverage_counts_stored_transactions(upstream):
+    for path in ("/league/L2", "/league/L1"):
+        upstream[path] = {**upstream[path], "name": "Test League", "total_rosters": 2, "settings": {}, "scoring_settings": {}, "roster_positions": []}
+    coverage = upstream.run(lambda: sleeper_service.get_historical_data_coverage("L2"))
+
+    assert coverage["total_transactions"] == 3
+    assert [(season["league_id"], season["transactions_count"]) for season in coverage["coverage_by_season"]] == [("L2", 1), ("L1", 2)]
+
+
+def test_sync_polls_only_weeks_that_can_still_change(upstream):
+    upstream["/state/nfl"] = NFL_STATE
+
+    async def scenario():
+        first = await transaction_store.sync_league("L2")
+        second = await transaction_store.sync_league("L2")
+
+        upstream["/league/L2/transactions/5"] = [trade("t5", {"4046": 1}, {"4046": 2}, 5_000)]
+        refreshed = await transaction_store.sync_league("L2", refresh=True)
+        db = await database.get_db()
+        marks = [tuple(row) for row in await db.execute_fetchall(
+            "SELECT week, final FROM transaction_weeks WHERE league_id = 'L2' ORDER BY week"
+        )]
+        return first, second, refreshed, marks
+
+    first, second, refreshed, marks = upstream.run(scenario)
+
+    # The completed season is read in full once; the active one up to its current week
+    assert first["weeks_polled"] == 18 + 5
+    assert sorted(first["added"]) == ["t1", "t2", "w1"]
+    # Weeks 1-3 are settled; only the current and previous week are polled again
+    assert marks == [(1, 1), (2, 1), (3, 1), (4, 0), (5, 0)]
+    assert second["weeks_polled"] == 2 and second["weeks_rewritten"] == 0
+    # The week 5 payload is still fresh in the cache; a refresh goes upstream for it
+    assert refreshed["weeks_polled"] == 2
+    assert refreshed["added"] == ["t5"] and refreshed["updated"] == refreshed["removed"] == []
+
+
+def test_a_failed_write_leaves_the_stored_weeks_and_marks_as_they_were(upstream, monkeypatch):
+    async def stored():
+        db = await database.get_db()
+        transactions = [row[0] for row in await db.execute_fetchall(
+            "SELECT transaction_id FROM league_transactions WHERE league_id = 'L2' ORDER BY transaction_id"
+        )]
+        marks = [tuple(row) for row in await db.execute_fetchall(
+            "SELECT week, version FROM transaction_weeks WHERE league_id = 'L2' AND week = 1"
+        )]
+        return transactions, marks
+
+    async def scenario():
+        await transaction_store.sync_league("L2")
+        before = await stored()
+
+        upstream["/league/L2/transactions/1"] = [trade("t3", {"4046": 1}, {"4046": 2}, 3_000)]
+        insert_pick_sql = transaction_store._INSERT_PICK_SQL
+        monkeypatch.setattr(transaction_store, "_INSERT_PICK_SQL", "INSERT INTO missing_table VALUES (?)")
+        with pytest.raises(Exception):
+            await transaction_store.sync_league("L2", refresh=True)
+        after_failure = await stored()
+
+        monkeypatch.setattr(transaction_store, "_INSERT_PICK_SQL", insert_pick_sql)
+        return before, after_failure, await transaction_store.sync_league("L2")
+
+    before, after_failure, retried = upstream.run(scenario)
+
+    assert before[0] == ["t2"]
+    assert after_failure == before
+    # The week was not marked with the new version, so the next sync rewrites it
+    assert retried["added"] == ["t3"] and retried["removed"] == ["t2"]
+
+
+def test_overlapping_requests_each_depend_on_the_weeks_synced(upstream):
+    week_url = f"{client.API_URL}/league/L2/transactions/1"
+
+    async def request():
+        request_dependencies = {}
+        client.dependencies.set(request_dependencies)
+        await transaction_store.league_transactions("L2")
+        return request_dependencies
+
+    async def scenario():
+        # Both requests share one sync run
+        first, second = await asyncio.gather(request(), request())
+        etag = http_caching.remember("/league/L2/trades", second)
+        unchanged = http_caching.current_etag("/league/L2/trades")
+
+        upstream["/league/L2/transactions/1"] = upstream["/league/L2/transactions/1"] + [trade("t3", {"4046": 1}, {"4046": 2}, 3_000)]
+        await transaction_store.sync_league("L2", refresh=True)
+        return first, second, etag, unchanged, http_caching.current_etag("/league/L2/trades")
+
+    http_caching.reset()
+    first, second, etag, unchanged, changed = upstream.run(scenario)
+    http_caching.reset()
+
+    assert week_url in first and week_url in second
+    assert unchanged == etag
+    assert changed is None
+
+
+def test_weeks_served_stale_are_not_made_final(upstream):
+    upstream["/state/nfl"] = NFL_STATE
+    late_waiver = trade("t4", {"4046": 2}, {"4046": 1}, 2_500)
+    upstream["/league/L2/transactions/1"] = upstream["/league/L2/transactions/1"] + [late_waiver]
+
+    async def week_one_mark():
+        db = await database.get_db()
+        return (await db.execute_fetchall("SELECT final FROM transaction_weeks WHERE league_id = 'L2' AND week = 1"))[0][0]
+
+    async def scenario():
+        # Week 1 is settled, but the only copy at hand is past its TTL and missing the late waiver
+        db = await database.get_db()
+        fetched_at = datetime.utcnow() - timedelta(hours=30)
+        await db.execute(
+            "INSERT INTO api_cache (url, data, timestamp) VALUES (?, ?, ?)",
+            (f"{client.API_URL}/league/L2/transactions/1", json.dumps(RESPONSES["/league/L2/transactions/1"]), fetched_at.isoformat()),
+        )
+        await db.commit()
+        first = await transaction_store.sync_league("L2")
+        stale_mark = await week_one_mark()
+        await asyncio.sleep(0.05)  # Let the background refresh land
+        second = await transaction_store.sync_league("L2")
+        return first, stale_mark, second, await week_one_mark()
+
+    first, stale_mark, second, fresh_mark = upstream.run(scenario)
+
+    assert "t4" not in first["added"] and stale_mark == 0
+    assert second["added"] == ["t4"] and fresh_mark == 1
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+
+from backend import client, validation
+from backend.main import app
+from backend.models.sleeper import DraftPickMovement
+
+TRANSACTIONS = [
+    {
+        "transaction_id": "1", "type": "trade", "status": "complete", "status_updated": 1694000000000, "leg": 1,
+        "adds": {"4046": 2}, "drops": {"4046": 1}, "roster_ids": [1, 2],
+        "draft_picks": [{"season": "2024", "round": 1, "roster_id": 1, "previous_owner_id": 1, "owner_id": 2}],
+    },
+    {"transaction_id": "2", "type": "waiver", "status": "complete", "adds": {"1466": 3}, "roster_ids": [3]},
+]
+
+MATCHUPS = [{"matchup_id": 1, "roster_id": 1, "points": 101.5, "players": ["4046"], "starters": ["4046"]}]
+
+
+def test_validate_list_adds_fields_and_memoises():
+    validation.reset()
+    transactions = validation.validate_list(validation.TRANSACTIONS, TRANSACTIONS, league_id="L1")
+    validations = validation.validations
+
+    assert [tx.league_id for tx in transactions] == ["L1", "L1"]
+    assert isinstance(transactions[0].draft_picks[0], DraftPickMovement)
+    assert "league_id" not in TRANSACTIONS[0]  # Shared payloads are not mutated
+    assert validation.validate_list(validation.TRANSACTIONS, TRANSACTIONS, league_id="L1") is transactions
+    assert validation.validations == validations
+    # Different extra fields, or a refreshed payload, validate again
+    assert validation.validate_list(validation.TRANSACTIONS, TRANSACTIONS, league_id="L2")[0].league_id == "L2"
+    assert validation.validate_list(validation.TRANSACTIONS, list(TRANSACTIONS), league_id="L1") is not transactions
+    assert validation.validate_list(validation.TRANSACTIONS, None) == []
+
+
+def test_malformed_draft_picks_are_skipped():
+    payload = [{**TRANSACTIONS[0], "draft_picks": [None, "bad", *TRANSACTIONS[0]["draft_picks"]]}]
+    transactions = validation.validate_list(validation.TRANSACTIONS, payload, league_id="L1")
+    assert [(pick.season, pick.owner_id) for pick in transactions[0].draft_picks] == [("2024", 2)]
+
+
+def test_weekly_stats_skip_players_without_stats():
+    stats = validation.validate_weekly_stats({"4046": {"pts_ppr": 20.5, "gp": 1, "rec": 3}, "bad": None}, "2023", 4)
+    assert [(s.player_id, s.week, s.season, s.pts_ppr) for s in stats] == [("4046", 4, "2023", 20.5)]
+
+
+def test_matchups_endpoint_serializes_validated_models(monkeypatch):
+    async def fake_get_league_matchups(league_id, week):
+        return MATCHUPS
+
+    monkeypatch.setattr(client, "get_league_matchups", fake_get_league_matchups)
+    response = TestClient(app).get("/league/L1/matchups/3")
+
+    assert response.status_code == 200
+    assert response.json() == [{**MATCHUPS[0], "league_id": "L1", "week": 3}]